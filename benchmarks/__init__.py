@@ -0,0 +1 @@
+"""Benchmarks for snug's own overhead. Run with ``python -m benchmarks``"""
@@ -0,0 +1,109 @@
+"""Run the benchmark suite, writing the results as JSON.
+
+Usage::
+
+    python -m benchmarks [-o results.json] [--compare old.json]
+                         [--scale 0.1] [suite ...]
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import snug
+
+SUITES = ("import", "http", "execute", "pagination", "loaders")
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(suites, scale):
+    results = {}
+    for name in suites:
+        print("running {}...".format(name), file=sys.stderr)
+        module = importlib.import_module("benchmarks.bench_" + name)
+        results[name] = module.run(scale=scale)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "snug": snug.__version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def compare(old, new):
+    """Print the relative change of the median timings between two runs"""
+    print(
+        "{:<50} {:>12} {:>12} {:>8}".format(
+            "benchmark", old["meta"]["commit"], new["meta"]["commit"], "ratio"
+        )
+    )
+    for suite, benchmarks in new["results"].items():
+        for name, summary in benchmarks.items():
+            try:
+                before = old["results"][suite][name]["median"]
+            except KeyError:
+                continue
+            after = summary["median"]
+            print(
+                "{:<50} {:>12} {:>12} {:>8.2f}".format(
+                    suite + " | " + name,
+                    before,
+                    after,
+                    after / before if before else float("nan"),
+                )
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument(
+        "suites", nargs="*", help="one or more of: " + ", ".join(SUITES)
+    )
+    parser.add_argument("-o", "--output", help="file to write results to")
+    parser.add_argument("--compare", help="results of a previous run")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiplier for the number of iterations",
+    )
+    args = parser.parse_args()
+    unknown = set(args.suites).difference(SUITES)
+    if unknown:
+        parser.error("unknown suites: " + ", ".join(sorted(unknown)))
+    results = run(args.suites or SUITES, args.scale)
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump(results, outfile, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as infile:
+            compare(json.load(infile), results)
+
+
+if __name__ == "__main__":
+    main()
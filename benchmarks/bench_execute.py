@@ -0,0 +1,144 @@
+"""Per-query overhead of ``execute``/``execute_async``,
+against the loopback server and an in-process :class:`snug.Loopback`"""
+
+import asyncio
+
+import snug
+
+from .clients import (
+    async_clients,
+    close_async_clients,
+    close_sync_clients,
+    sync_clients,
+)
+from .server import serving
+from .timing import measure, measure_async
+
+_RESPONSE = snug.Response(200, b'{"id": 1, "name": "foo"}')
+
+
+class item(snug.Query):
+    """A minimal single-request query"""
+
+    def __init__(self, url):
+        self.request = snug.GET(url)
+
+    def __iter__(self):
+        response = yield self.request
+        return response.status_code
+
+
+def sequential(urls):
+    """fetch the given URLs one after the other"""
+    statuses = []
+    for url in urls:
+        response = yield snug.GET(url)
+        statuses.append(response.status_code)
+    return statuses
+
+
+def fanout(urls):
+    """fetch the given URLs concurrently"""
+    responses = yield snug.gather(*map(snug.GET, urls))
+    return [r.status_code for r in responses]
+
+
+def _fanout_cases(loop, number):
+    """10 requests with 10ms simulated latency each"""
+    client = snug.Loopback(lambda req: _RESPONSE, latency=0.01)
+    urls = ["/item"] * 10
+    executor = snug.executor(client=client)
+    async_executor = snug.async_executor(client=client)
+    return {
+        "fan-out: sequential": measure(
+            lambda: executor(sequential(urls)), number
+        ),
+        "fan-out: gather": measure(lambda: executor(fanout(urls)), number),
+        "fan-out: sequential async": measure_async(
+            loop, lambda: async_executor(sequential(urls)), number
+        ),
+        "fan-out: gather async": measure_async(
+            loop, lambda: async_executor(fanout(urls)), number
+        ),
+    }
+
+
+def _sync_cases(name, client, url, number):
+    query = item(url)
+    executor = snug.executor(client=client)
+    return {
+        name
+        + ": send": measure(lambda: snug.send(client, query.request), number),
+        name
+        + ": execute": measure(
+            lambda: snug.execute(query, client=client), number
+        ),
+        name + ": executor": measure(lambda: executor(query), number),
+    }
+
+
+def _async_cases(loop, name, client, url, number):
+    query = item(url)
+    executor = snug.async_executor(client=client)
+    return {
+        name
+        + ": send_async": measure_async(
+            loop, lambda: snug.send_async(client, query.request), number
+        ),
+        name
+        + ": execute_async": measure_async(
+            loop, lambda: snug.execute_async(query, client=client), number
+        ),
+        name
+        + ": async executor": measure_async(
+            loop, lambda: executor(query), number
+        ),
+    }
+
+
+def run(scale=1.0):
+    results = {}
+    results.update(
+        _sync_cases(
+            "loopback",
+            snug.Loopback(lambda req: _RESPONSE),
+            "/item",
+            int(100000 * scale) or 1,
+        )
+    )
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        results.update(
+            _async_cases(
+                loop,
+                "loopback",
+                snug.Loopback(lambda req: _RESPONSE),
+                "/item",
+                int(100000 * scale) or 1,
+            )
+        )
+        results.update(_fanout_cases(loop, int(5 * scale) or 1))
+        with serving() as base_url:
+            number = int(300 * scale) or 1
+            clients = sync_clients()
+            try:
+                for name, client in clients.items():
+                    results.update(
+                        _sync_cases(name, client, base_url + "/item", number)
+                    )
+            finally:
+                close_sync_clients(clients)
+            clients = loop.run_until_complete(async_clients())
+            try:
+                for name, client in clients.items():
+                    results.update(
+                        _async_cases(
+                            loop, name, client, base_url + "/item", number
+                        )
+                    )
+            finally:
+                loop.run_until_complete(close_async_clients(clients))
+    finally:
+        loop.close()
+    return results
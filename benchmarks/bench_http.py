@@ -0,0 +1,51 @@
+"""Cost of constructing and deriving requests"""
+
+from operator import methodcaller
+
+import snug
+
+from .timing import measure
+
+
+def run(scale=1.0):
+    number = int(100000 * scale) or 1
+    request = snug.GET(
+        "repos/octocat/Hello-World/issues",
+        params={"state": "open"},
+        headers={"Accept": "application/json"},
+    )
+    template = snug.RequestTemplate(
+        "GET",
+        "https://api.github.com/repos/{owner}/{name}/issues",
+        params={"state": str, "since": methodcaller("isoformat")},
+        headers={"Accept": "application/json"},
+    )
+    return {
+        "Request()": measure(
+            lambda: snug.Request("GET", "repos/octocat/Hello-World"), number
+        ),
+        "GET()": measure(
+            lambda: snug.GET("repos/octocat/Hello-World"), number
+        ),
+        "with_prefix": measure(
+            lambda: request.with_prefix("https://api.github.com/"), number
+        ),
+        "with_headers": measure(
+            lambda: request.with_headers({"User-Agent": "snug"}), number
+        ),
+        "with_params": measure(
+            lambda: request.with_params({"page": "2"}), number
+        ),
+        "prefix+headers+params": measure(
+            lambda: request.with_prefix("https://api.github.com/")
+            .with_headers({"User-Agent": "snug"})
+            .with_params({"page": "2"}),
+            number,
+        ),
+        "RequestTemplate()": measure(
+            lambda: template(
+                owner="octocat", name="Hello-World", state="open", since=None
+            ),
+            number,
+        ),
+    }
@@ -0,0 +1,94 @@
+"""Measure the cost of importing snug with ``python -X importtime``
+
+Usage::
+
+    python benchmarks/bench_import.py [--repeat N]
+
+Prints the results as JSON.
+Also part of the full suite (``python -m benchmarks``).
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+#: modules which should not be imported by ``import snug`` itself
+DEFERRED_MODULES = (
+    "asyncio",
+    "aiohttp",
+    "requests",
+    "urllib.request",
+    "http.client",
+)
+
+
+def parse_importtime(output):
+    """Parse ``-X importtime`` output into a mapping of
+    module name to cumulative import time (microseconds)"""
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        try:
+            timings[name.strip()] = int(cumulative_us)
+        except ValueError:  # the header line
+            pass
+    return timings
+
+
+def measure_once(statement):
+    """Run a statement in a fresh interpreter, returning
+    the import timings and the deferred modules which were loaded"""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            statement + "; import sys; print(','.join(m for m in {!r} "
+            "if m in sys.modules))".format(DEFERRED_MODULES),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return (
+        parse_importtime(proc.stderr),
+        [m for m in proc.stdout.strip().split(",") if m],
+    )
+
+
+def run(scale=1.0, repeat=None):
+    """Measure the import time of snug, returning a JSON-serializable dict"""
+    if repeat is None:
+        repeat = max(3, int(10 * scale))
+    totals = []
+    for _ in range(repeat):
+        timings, loaded = measure_once("import snug")
+        totals.append(timings["snug"])
+    return {
+        "import snug": {
+            "unit": "us",
+            "median": statistics.median(totals),
+            "min": min(totals),
+            "max": max(totals),
+            "repeat": repeat,
+            "deferred_modules_loaded": loaded,
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    json.dump(run(repeat=args.repeat), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Loading API responses into the types of the example API wrappers"""
+
+import json
+import os
+import sys
+import typing as t
+from datetime import datetime, timedelta
+
+from .timing import measure
+
+LIST_SIZE = 30
+STATION_COUNT = 400
+# more than the size of the timestamp cache
+TIMESTAMP_COUNT = 5000
+EXAMPLES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples"
+)
+
+
+def _repo_summary(number):
+    return {
+        "id": number,
+        "owner": {
+            "login": "octocat",
+            "id": 1,
+            "avatar_url": "https://github.com/images/error/octocat.gif",
+            "gravatar_id": "",
+            "html_url": "https://github.com/octocat",
+            "type": "User",
+            "site_admin": False,
+        },
+        "name": "repo-{}".format(number),
+        "full_name": "octocat/repo-{}".format(number),
+        "description": "Repository number {}".format(number),
+        "private": False,
+        "fork": bool(number % 2),
+        "url": "https://api.github.com/repos/octocat/repo-{}".format(number),
+        "html_url": "https://github.com/octocat/repo-{}".format(number),
+    }
+
+
+_STATION = """\
+<Station>
+  <Code>S{0}</Code>
+  <Type>stoptreinstation</Type>
+  <Namen>
+    <Kort>Station {0}</Kort>
+    <Middel>Station {0}</Middel>
+    <Lang>Station number {0}</Lang>
+  </Namen>
+  <Land>NL</Land>
+  <UICCode>84{0:05}</UICCode>
+  <Lat>52.{0}</Lat>
+  <Lon>5.{0}</Lon>
+  <Synoniemen>
+    <Synoniem>Station ({0})</Synoniem>
+  </Synoniemen>
+</Station>
+"""
+
+
+def _ns_cases(number):
+    try:
+        from ns import load, types
+    except ImportError:  # the example dependencies are not installed
+        return {}
+    content = (
+        "<Stations>"
+        + "".join(_STATION.format(i) for i in range(STATION_COUNT))
+        + "</Stations>"
+    ).encode()
+    load_stations = load.list_loader(t.List[types.Station])
+    return {
+        "List[Station]: streaming XML": measure(
+            lambda: load_stations(content), number
+        )
+    }
+
+
+def _per_item(summary, count):
+    """convert timings per list to timings per item"""
+    return dict(
+        summary,
+        median=round(summary["median"] / count, 3),
+        min=round(summary["min"] / count, 3),
+        max=round(summary["max"] / count, 3),
+        ops_per_sec=round(summary["ops_per_sec"] * count, 1),
+    )
+
+
+def _timestamp_cases(number):
+    import timestamps
+
+    start = datetime(2018, 1, 22, 20, 20)
+    moments = [
+        start + timedelta(seconds=i * 61) for i in range(TIMESTAMP_COUNT)
+    ]
+    formats = {
+        "github": (
+            [m.strftime("%Y-%m-%dT%H:%M:%SZ") for m in moments],
+            lambda v: datetime.strptime(v, "%Y-%m-%dT%H:%M:%SZ"),
+            timestamps.parse_utc,
+        ),
+        "ns": (
+            [m.strftime("%Y-%m-%dT%H:%M:%S+0100") for m in moments],
+            lambda v: datetime.strptime(v, "%Y-%m-%dT%H:%M:%S%z"),
+            timestamps.parse_offset,
+        ),
+        "slack": (
+            [str(m.timestamp()) + "000247" for m in moments],
+            lambda v: datetime.utcfromtimestamp(float(v)),
+            timestamps.parse_epoch,
+        ),
+    }
+    results = {}
+    for example, (values, baseline, parse) in formats.items():
+        repeated = values[:100] * (TIMESTAMP_COUNT // 100)
+        for name, func, items in [
+            ("strptime" if example != "slack" else "float", baseline, values),
+            ("parser", parse, values),
+            ("parser, repeated values", parse, repeated),
+        ]:
+            results["{} timestamps: {}".format(example, name)] = _per_item(
+                measure(lambda: list(map(func, items)), number), len(items)
+            )
+    return results
+
+
+def run(scale=1.0):
+    if EXAMPLES not in sys.path:
+        # the examples are imported the same way as in their tests
+        sys.path.insert(0, EXAMPLES)
+    number = int(1000 * scale) or 1
+    results = _timestamp_cases(int(10 * scale) or 1)
+    results.update(_ns_cases(int(10 * scale) or 1))
+    try:
+        from github import load, types
+    except ImportError:  # the example dependencies are not installed
+        return results
+    content = json.dumps([_repo_summary(i) for i in range(LIST_SIZE)])
+    decoded = json.loads(content)
+    target = t.List[types.RepoSummary]
+    results.update(
+        {
+            "List[RepoSummary]: build loader per response": measure(
+                lambda: load.registry(target)(decoded), number
+            ),
+            "List[RepoSummary]: cached loader": measure(
+                lambda: load.loader(target)(decoded), number
+            ),
+            "List[RepoSummary]: decode + cached loader": measure(
+                lambda: load.loader(target)(json.loads(content)), number
+            ),
+        }
+    )
+    return results
@@ -0,0 +1,92 @@
+"""Throughput of ``paginated`` queries against the loopback server"""
+
+import asyncio
+import json
+
+import snug
+
+from .clients import (
+    async_clients,
+    close_async_clients,
+    close_sync_clients,
+    sync_clients,
+)
+from .server import PAGE_COUNT, serving
+from .timing import measure, measure_async
+
+
+class page(snug.Query):
+    """A page of items from the loopback server"""
+
+    def __init__(self, base_url, number=0):
+        self.base_url, self.number = base_url, number
+
+    def __iter__(self):
+        response = yield snug.GET(
+            self.base_url + "/pages", params={"page": str(self.number)}
+        )
+        content = json.loads(response.content)
+        return snug.Page(
+            content["items"],
+            next_query=(
+                None
+                if content["next"] is None
+                else page(self.base_url, content["next"])
+            ),
+        )
+
+
+async def _consume(aiterator):
+    async for _ in aiterator:
+        pass
+
+
+def _per_page(summary):
+    """convert timings per paginated query to timings per page"""
+    return dict(
+        summary,
+        median=round(summary["median"] / PAGE_COUNT, 3),
+        min=round(summary["min"] / PAGE_COUNT, 3),
+        max=round(summary["max"] / PAGE_COUNT, 3),
+        ops_per_sec=round(summary["ops_per_sec"] * PAGE_COUNT, 1),
+    )
+
+
+def run(scale=1.0):
+    number = int(30 * scale) or 1
+    results = {}
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        with serving() as base_url:
+            query = snug.paginated(page(base_url))
+            clients = sync_clients()
+            try:
+                for name, client in clients.items():
+                    results[name + ": pages"] = _per_page(
+                        measure(
+                            lambda: sum(
+                                1 for _ in snug.execute(query, client=client)
+                            ),
+                            number,
+                        )
+                    )
+            finally:
+                close_sync_clients(clients)
+            clients = loop.run_until_complete(async_clients())
+            try:
+                for name, client in clients.items():
+                    results[name + ": pages async"] = _per_page(
+                        measure_async(
+                            loop,
+                            lambda: _consume(
+                                snug.execute_async(query, client=client)
+                            ),
+                            number,
+                        )
+                    )
+            finally:
+                loop.run_until_complete(close_async_clients(clients))
+    finally:
+        loop.close()
+    return results
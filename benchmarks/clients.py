@@ -0,0 +1,56 @@
+"""Factories for each built-in client type.
+Clients of which the library is not installed are skipped."""
+
+import asyncio
+import urllib.request
+
+
+def sync_clients():
+    """The available synchronous clients, by name"""
+    clients = {"urllib": urllib.request.build_opener()}
+    try:
+        import requests
+    except ImportError:
+        pass
+    else:
+        clients["requests"] = requests.Session()
+    try:
+        import httpx
+    except ImportError:
+        pass
+    else:
+        clients["httpx"] = httpx.Client()
+    return clients
+
+
+def close_sync_clients(clients):
+    if "requests" in clients:
+        clients["requests"].close()
+    if "httpx" in clients:
+        clients["httpx"].close()
+
+
+async def async_clients():
+    """The available asynchronous clients, by name.
+    Must be called from within the event loop."""
+    clients = {"asyncio": asyncio.get_event_loop()}
+    try:
+        import aiohttp
+    except ImportError:
+        pass
+    else:
+        clients["aiohttp"] = aiohttp.ClientSession()
+    try:
+        import httpx
+    except ImportError:
+        pass
+    else:
+        clients["httpx"] = httpx.AsyncClient()
+    return clients
+
+
+async def close_async_clients(clients):
+    if "aiohttp" in clients:
+        await clients["aiohttp"].close()
+    if "httpx" in clients:
+        await clients["httpx"].aclose()
@@ -0,0 +1,69 @@
+"""An in-process loopback HTTP server to benchmark against"""
+
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+#: the number of pages served by the ``/pages`` endpoint
+PAGE_COUNT = 10
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves a few fixed endpoints:
+
+    * ``/item``: a small JSON object
+    * ``/pages?page=<n>``: a page of items, linking to the next page
+    * ``POST`` to any path: echoes the request body
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/item":
+            self._reply(200, b'{"id": 1, "name": "foo"}')
+        elif url.path == "/pages":
+            page = int(parse_qs(url.query).get("page", ["0"])[0])
+            self._reply(
+                200,
+                json.dumps(
+                    {
+                        "items": list(range(page * 10, page * 10 + 10)),
+                        "next": page + 1 if page + 1 < PAGE_COUNT else None,
+                    }
+                ).encode(),
+            )
+        else:
+            self._reply(404, b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self._reply(200, self.rfile.read(length))
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serving():
+    """Run the loopback server in a background thread,
+    yielding its base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield "http://127.0.0.1:{}".format(server.server_address[1])
+    finally:
+        server.shutdown()
+        server.server_close()
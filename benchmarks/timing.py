@@ -0,0 +1,46 @@
+"""Helpers for timing operations"""
+
+import statistics
+import time
+
+
+def summarize(timings, number):
+    """Summarize total timings of ``number`` operations each
+    into a JSON-serializable dict (in microseconds per operation)"""
+    per_op = [t / number * 1e6 for t in timings]
+    median = statistics.median(per_op)
+    return {
+        "unit": "us",
+        "median": round(median, 3),
+        "min": round(min(per_op), 3),
+        "max": round(max(per_op), 3),
+        "ops_per_sec": round(1e6 / median, 1) if median else None,
+        "number": number,
+        "repeat": len(timings),
+    }
+
+
+def measure(func, number, repeat=5):
+    """Time calling ``func`` ``number`` times, ``repeat`` times over"""
+    func()  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings, number)
+
+
+def measure_async(loop, func, number, repeat=5):
+    """Time awaiting ``func()`` ``number`` times, ``repeat`` times over"""
+
+    async def run_batch():
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        return time.perf_counter() - start
+
+    loop.run_until_complete(func())  # warm up
+    timings = [loop.run_until_complete(run_batch()) for _ in range(repeat)]
+    return summarize(timings, number)
@@ -1,15 +1,16 @@
 """deserialization tools"""
 import typing as t
 from datetime import datetime
-from functools import partial
+from functools import lru_cache
 
-from toolz import flip
 from valuable import load
 
+from timestamps import parse_utc
+
 from . import types
 
 registry = load.PrimitiveRegistry({
-    datetime: partial(flip(datetime.strptime),  '%Y-%m-%dT%H:%M:%SZ'),
+    datetime: parse_utc,
     **{
         c: c for c in [
             int,
@@ -22,3 +23,9 @@ registry = load.PrimitiveRegistry({
 }) | load.GenericRegistry({
     t.List: load.list_loader
 }) | load.get_optional_loader | load.AutoDataclassRegistry()
+
+
+@lru_cache(maxsize=None)
+def loader(cls):
+    """the loader for a type, built once and cached"""
+    return registry(cls)
@@ -1,23 +1,26 @@
 """the main API"""
 import abc
-import json
+import re
 import reprlib
 import typing as t
 from datetime import datetime
 from functools import singledispatch
 from operator import methodcaller
+from urllib.parse import parse_qs, urlsplit
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 import snug
 
 from .types import (Repo, Issue, RepoSummary, Organization,
                     OrganizationSummary, User)
-from .load import registry
+from .load import loader
 
 API_PREFIX = 'https://api.github.com/'
 HEADERS = {'Accept': 'application/vnd.github.v3+json'}
 
+_LINK_NEXT = re.compile(r'<([^>]+)>;\s*rel="next"')
+
 _repr = reprlib.Repr()
 _repr.maxstring = 45
 
@@ -69,7 +72,7 @@ class BaseQuery(snug.Query[T]):
         """check for errors"""
         if response.status_code == 400:
             try:
-                msg = json.loads(response.content)['message']
+                msg = response.json()['message']
             except (KeyError, ValueError):
                 msg = ''
             raise ApiError(msg)
@@ -83,8 +86,32 @@ class Retrieval(BaseQuery[T]):
 
     def parse(self, response):
         parsed = super().parse(response)
-        loader = registry(self.type)
-        return loader(json.loads(parsed.content))
+        return loader(self.type)(parsed.json())
+
+
+@dataclass
+class PageRetrieval(BaseQuery[snug.Page[t.Iterator[T]]]):
+    """base for retrieval of large lists, one page at a time.
+    Items are decoded and loaded one by one, as the page is iterated.
+    Use with :class:`snug.paginated` to retrieve all pages."""
+    @abc.abstractproperty
+    def item_type(self): pass
+
+    since: t.Optional[int] = None
+
+    def parse(self, response):
+        parsed = super().parse(response)
+        return snug.Page(
+            map(loader(self.item_type), parsed.iter_json()),
+            next_query=self.next_page(parsed))
+
+    def next_page(self, response):
+        """the query for the next page, from the 'Link' header"""
+        match = _LINK_NEXT.search(response.headers.get('Link', ''))
+        if match is None:
+            return None
+        since, = parse_qs(urlsplit(match.group(1)).query)['since']
+        return replace(self, since=int(since))
 
 
 @dataclass
@@ -150,6 +177,16 @@ class repos(Retrieval):
     request = snug.GET('repositories')
 
 
+@dataclass
+class repo_pages(PageRetrieval):
+    """all public repositories, one page at a time"""
+    item_type = RepoSummary
+
+    @property
+    def request(self):
+        return snug.GET('repositories', params={'since': self.since})
+
+
 @dataclass
 class org(Retrieval):
     """Organization lookup by login"""
@@ -168,6 +205,16 @@ class orgs(Retrieval):
     request = snug.GET('organizations')
 
 
+@dataclass
+class org_pages(PageRetrieval):
+    """all organizations, one page at a time"""
+    item_type = OrganizationSummary
+
+    @property
+    def request(self):
+        return snug.GET('organizations', params={'since': self.since})
+
+
 @dataclass
 class issues(Retrieval):
     """a selection of assigned issues"""
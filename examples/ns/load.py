@@ -1,16 +1,25 @@
-"""deserialization tools"""
+"""deserialization tools
+
+Responses are lists of records (stations, departures, journeys).
+These are parsed incrementally: each record is loaded in a single pass
+over its child elements as soon as it is complete, and then discarded.
+"""
 import typing as t
+from dataclasses import dataclass, fields
 from datetime import datetime
-from functools import partial
+from functools import lru_cache, partial
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+
+from valuable import load
 
-from toolz import compose, flip, valmap
-from valuable import load, xml
+from timestamps import parse_offset
 
 from . import types
 
 registry = load.PrimitiveRegistry({
     bool:     dict(true=True, false=False).__getitem__,
-    datetime: partial(flip(datetime.strptime), '%Y-%m-%dT%H:%M:%S%z'),
+    datetime: parse_offset,
     str:      str.strip,
     **{
         c: c for c in [
@@ -22,72 +31,230 @@ registry = load.PrimitiveRegistry({
     }
 }) | load.GenericRegistry({
     t.List: load.list_loader,
-}) | load.get_optional_loader | load.DataclassRegistry({
-    types.Station: {**valmap(xml.textgetter, {
-        'code':       'Code',
-        'type':       'Type',
-        'country':    'Land',
-        'uic':        'UICCode',
-        'lat':        'Lat',
-        'lon':        'Lon',
-        'name':       'Namen/Middel',
-        'full_name':  'Namen/Lang',
-        'short_name': 'Namen/Kort',
-    }), **{
-        'synonyms':   xml.textsgetter('Synoniemen/Synoniem'),
-    }},
-    types.Journey: {**valmap(xml.textgetter, {
-        'transfer_count':    'AantalOverstappen',
-        'planned_duration':  'GeplandeReisTijd',
-        'planned_departure': 'GeplandeVertrekTijd',
-        'planned_arrival':   'GeplandeAankomstTijd',
-        'actual_duration':   'ActueleReisTijd',
-        'actual_departure':  'ActueleVertrekTijd',
-        'actual_arrival':    'ActueleAankomstTijd',
-        'status':            'Status',
-    }), **{
-        'components':        xml.elemsgetter('ReisDeel'),
-        'notifications':     xml.elemsgetter('Melding'),
-    }, **{
-        'optimal':           xml.textgetter('Optimaal', default='false')
-    }},
-    types.Departure: {**valmap(xml.textgetter, {
-        'ride_number':      'RitNummer',
-        'time':             'VertrekTijd',
-        'destination':      'EindBestemming',
-        'train_type':       'TreinSoort',
-        'carrier':          'Vervoerder',
-        'platform':         'VertrekSpoor',
-    }), **{
-        'platform_changed': xml.attribgetter('VertrekSpoor', 'wijziging'),
-        'comments':         xml.textsgetter('Opmerkingen/Opmerking'),
-        'delay':            xml.textgetter('VertrekVertragingTekst',
-                                           default=None),
-        'travel_tip':       xml.textgetter('ReisTip', default=None),
-        'route_text':       xml.textgetter('RouteTekst', default=None),
-    }},
-    types.Journey.Component: {**valmap(xml.textgetter, {
-        'carrier':     'Vervoerder',
-        'type':        'VervoerType',
-        'ride_number': 'RitNummer',
-        'status':      'Status',
-    }), **{
-        'details':     xml.textsgetter('Reisdetails/Reisdetail'),
-        'kind':        xml.attribgetter('.', 'reisSoort'),
-        'stops':       xml.elemsgetter('ReisStop'),
-    }},
+}) | load.get_optional_loader
+"""loaders for field values"""
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class text:
+    """the text of the first element at a path"""
+    path:    str
+    default: t.Any = _MISSING
+    empty:   t.Any = _MISSING  # replaces empty text, if given
+
+    many = False
+
+    def collect(self, values, index, elem):
+        if values[index] is _MISSING:
+            values[index] = elem.text or ''
+
+    def finish(self, value, load_value):
+        if value is _MISSING:
+            if self.default is _MISSING:
+                raise LookupError(self.path)
+            value = self.default
+        elif not value and self.empty is not _MISSING:
+            value = self.empty
+        return load_value(value)
+
+
+@dataclass(frozen=True)
+class attrib:
+    """an attribute of the first element at a path"""
+    path:    str
+    name:    str
+    default: t.Any = _MISSING
+
+    many = False
+
+    def collect(self, values, index, elem):
+        if values[index] is _MISSING:
+            values[index] = elem.get(self.name, _MISSING)
+
+    def finish(self, value, load_value):
+        if value is _MISSING:
+            if self.default is _MISSING:
+                raise LookupError(self.path)
+            value = self.default
+        return load_value(value)
+
+
+@dataclass(frozen=True)
+class texts:
+    """the texts of all elements at a path"""
+    path: str
+
+    many = True
+
+    def collect(self, values, index, elem):
+        values[index].append(elem.text)
+
+    def finish(self, value, load_value):
+        return load_value(value)
+
+
+@dataclass(frozen=True)
+class elems(texts):
+    """all elements at a path, loaded as records"""
+
+    def collect(self, values, index, elem):
+        values[index].append(elem)
+
+
+specs = {
+    types.Station: {
+        'code':       text('Code'),
+        'type':       text('Type'),
+        'country':    text('Land'),
+        'uic':        text('UICCode'),
+        'lat':        text('Lat'),
+        'lon':        text('Lon'),
+        'name':       text('Namen/Middel'),
+        'full_name':  text('Namen/Lang'),
+        'short_name': text('Namen/Kort'),
+        'synonyms':   texts('Synoniemen/Synoniem'),
+    },
+    types.Journey: {
+        'transfer_count':    text('AantalOverstappen'),
+        'planned_duration':  text('GeplandeReisTijd'),
+        'planned_departure': text('GeplandeVertrekTijd'),
+        'planned_arrival':   text('GeplandeAankomstTijd'),
+        'actual_duration':   text('ActueleReisTijd'),
+        'actual_departure':  text('ActueleVertrekTijd'),
+        'actual_arrival':    text('ActueleAankomstTijd'),
+        'status':            text('Status'),
+        'components':        elems('ReisDeel'),
+        'notifications':     elems('Melding'),
+        'optimal':           text('Optimaal', default='false'),
+    },
+    types.Departure: {
+        'ride_number':      text('RitNummer'),
+        'time':             text('VertrekTijd'),
+        'destination':      text('EindBestemming'),
+        'train_type':       text('TreinSoort'),
+        'carrier':          text('Vervoerder'),
+        'platform':         text('VertrekSpoor'),
+        'platform_changed': attrib('VertrekSpoor', 'wijziging'),
+        'comments':         texts('Opmerkingen/Opmerking'),
+        'delay':            text('VertrekVertragingTekst', default=None),
+        'travel_tip':       text('ReisTip', default=None),
+        'route_text':       text('RouteTekst', default=None),
+    },
+    types.Journey.Component: {
+        'carrier':     text('Vervoerder'),
+        'type':        text('VervoerType'),
+        'ride_number': text('RitNummer'),
+        'status':      text('Status'),
+        'details':     texts('Reisdetails/Reisdetail'),
+        'kind':        attrib('.', 'reisSoort'),
+        'stops':       elems('ReisStop'),
+    },
     types.Journey.Component.Stop: {
-        'name':             xml.textgetter('Naam'),
-        'time':             compose(lambda x: x or None,
-                                    xml.textgetter('Tijd')),
-        'platform_changed': xml.attribgetter('Spoor', 'wijziging',
-                                             default=None),
-        'delay':            xml.textgetter('VertrekVertraging', default=None),
-        'platform':         xml.textgetter('Spoor', default=None)
+        'name':             text('Naam'),
+        'time':             text('Tijd', empty=None),
+        'platform_changed': attrib('Spoor', 'wijziging', default=None),
+        'delay':            text('VertrekVertraging', default=None),
+        'platform':         text('Spoor', default=None),
+    },
+    types.Journey.Notification: {
+        'id':      text('Id'),
+        'serious': text('Ernstig'),
+        'text':    text('Text'),
     },
-    types.Journey.Notification: valmap(xml.textgetter, {
-        'id':      'Id',
-        'serious': 'Ernstig',
-        'text':    'Text',
-    })
-})
+}
+"""where to find the fields of each record type in its element"""
+
+
+def _item_type(listtype):
+    """the item type of an (optional) list type"""
+    if getattr(listtype, '__origin__', None) is t.Union:
+        listtype = listtype.__args__[0]
+    itemtype, = listtype.__args__
+    return itemtype
+
+
+def _load_each(load_record, elements):
+    return list(map(load_record, elements))
+
+
+class RecordLoader:
+    """loads a record from its element, in one pass over its children.
+
+    Field values are collected by the tag of each child,
+    instead of searching the element for the path of every field.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        spec = specs[cls]
+        self.fields = []
+        # child tag -> [(field index, getter, remaining path)]
+        self.handlers = {}
+        # getters for attributes of the record element itself
+        self.own = []
+        for index, field in enumerate(fields(cls)):
+            getter = spec[field.name]
+            if isinstance(getter, elems):
+                load_field = partial(
+                    _load_each, record_loader(_item_type(field.type)))
+            elif getter.many:
+                load_field = partial(
+                    _load_each, registry(_item_type(field.type)))
+            else:
+                load_field = registry(field.type)
+            self.fields.append((getter, load_field))
+            if getter.path == '.':
+                self.own.append((index, getter))
+            else:
+                tag, _, rest = getter.path.partition('/')
+                self.handlers.setdefault(tag, []).append(
+                    (index, getter, rest))
+
+    def __call__(self, elem):
+        values = [[] if getter.many else _MISSING
+                  for getter, _ in self.fields]
+        handlers = self.handlers
+        for child in elem:
+            for index, getter, rest in handlers.get(child.tag, ()):
+                if rest:
+                    for target in child.iterfind(rest):
+                        getter.collect(values, index, target)
+                else:
+                    getter.collect(values, index, child)
+        for index, getter in self.own:
+            getter.collect(values, index, elem)
+        return self.cls(*(
+            getter.finish(value, load_field)
+            for (getter, load_field), value in zip(self.fields, values)))
+
+
+@lru_cache(maxsize=None)
+def record_loader(cls):
+    """the loader for a record type, built once and cached"""
+    return RecordLoader(cls)
+
+
+@lru_cache(maxsize=None)
+def list_loader(listtype):
+    """a loader for XML content with a list of records.
+    The content is parsed incrementally: each record is loaded
+    as soon as it is complete, after which its elements are freed."""
+    return partial(_load_records, record_loader(_item_type(listtype)))
+
+
+def _load_records(load_record, content):
+    events = iterparse(BytesIO(content), events=('start', 'end'))
+    _, root = next(events)
+    records = []
+    depth = 0
+    for event, elem in events:
+        if event == 'start':
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:  # a record (a child of the root) is complete
+            records.append(load_record(elem))
+            root.clear()
+    return records
@@ -1,6 +1,5 @@
 """the main API"""
 import typing as t
-import xml.etree.ElementTree
 from datetime import datetime
 from functools import singledispatch
 from operator import attrgetter, methodcaller
@@ -10,12 +9,10 @@ from gentools import (compose, map_return, map_send, map_yield, oneyield,
 
 import snug
 
-from .load import registry as loads
+from .load import list_loader
 from .types import Departure, Journey, Station
 
 API_PREFIX = 'https://webservices.ns.nl/ns-api-'
-parse_request = compose(xml.etree.ElementTree.fromstring,
-                        attrgetter('content'))
 
 
 execute = snug.execute
@@ -44,9 +41,9 @@ def basic_query(returns):
     """decorator factory for NS queries"""
     return compose(
         reusable,
-        map_send(parse_request),
+        map_send(attrgetter('content')),
         map_yield(prepare_params, snug.prefix_adder(API_PREFIX)),
-        map_return(loads(returns)),
+        map_return(list_loader(returns)),
         oneyield,
     )
 
@@ -5,9 +5,9 @@ import snug
 
 from .query import paginated_retrieval, json_post
 from .types import Channel, Page
-from .load import registry
+from .load import loader
 
-load_channel_list = registry(t.List[Channel])
+load_channel_list = loader(t.List[Channel])
 
 
 @paginated_retrieval('channels.list', itemtype=Channel)
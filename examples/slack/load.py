@@ -1,10 +1,11 @@
 """deserialization tools"""
 import typing as t
 from datetime import datetime
+from functools import lru_cache
 
 from valuable import load
+from timestamps import parse_epoch
 from . import types
-from toolz import compose
 
 
 def page_loader(subloaders, value):
@@ -23,7 +24,7 @@ def page_loader(subloaders, value):
 
 registry = load.MultiRegistry(
     load.PrimitiveRegistry({
-        datetime: compose(datetime.utcfromtimestamp, float),
+        datetime: parse_epoch,
         int:      int,
         float:    float,
         bool:     bool,
@@ -35,3 +36,9 @@ registry = load.MultiRegistry(
     }),
     load.AutoDataclassRegistry(),
 )
+
+
+@lru_cache(maxsize=None)
+def loader(cls):
+    """the loader for a type, built once and cached"""
+    return registry(cls)
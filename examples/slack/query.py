@@ -1,5 +1,4 @@
 """common logic for all queries"""
-import json
 from functools import partial, singledispatch
 from operator import itemgetter
 
@@ -7,7 +6,7 @@ import snug
 from gentools import (compose, map_yield, map_send, oneyield, reusable,
                       map_return)
 
-from .load import registry
+from .load import loader
 
 API_URL = 'https://slack.com/api/'
 
@@ -20,7 +19,7 @@ def _parse_content(response):
     """parse the response body as JSON, raise on errors"""
     if response.status_code != 200:
         raise ApiError(f'unknown error: {response.content.decode()}')
-    result = json.loads(response.content)
+    result = response.json()
     if not result['ok']:
         raise ApiError(f'{result["error"]}: {result.get("detail")}')
     return result
@@ -63,7 +62,7 @@ def json_post(methodname, rtype, key):
     """decorator factory for json POST queries"""
     return compose(
         reusable,
-        map_return(registry(rtype), itemgetter(key)),
+        map_return(loader(rtype), itemgetter(key)),
         basic_interaction,
         map_yield(partial(_json_as_post, methodname)),
         oneyield,
@@ -71,7 +70,5 @@ def json_post(methodname, rtype, key):
 
 
 def _json_as_post(methodname: str, body: dict) -> snug.Request:
-    return snug.POST(methodname,
-                     json.dumps({k: v for k, v in body.items()
-                                 if v is not None}),
-                     headers={'Content-Type': 'application/json'})
+    return snug.POST(methodname).with_json(
+        {k: v for k, v in body.items() if v is not None})
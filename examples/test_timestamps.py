@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from timestamps import parse_epoch, parse_offset, parse_utc
+
+
+def test_parse_utc():
+    assert parse_utc('2018-01-22T20:20:00Z') == datetime(2018, 1, 22, 20, 20)
+    assert parse_utc('2018-01-22T20:20:00Z') == datetime.strptime(
+        '2018-01-22T20:20:00Z', '%Y-%m-%dT%H:%M:%SZ')
+
+
+@pytest.mark.parametrize('value, offset', [
+    ('2018-01-22T20:20:00+0100', timedelta(hours=1)),
+    ('2018-01-22T20:20:00+01:00', timedelta(hours=1)),
+    ('2018-01-22T20:20:00-0530', -timedelta(hours=5, minutes=30)),
+])
+def test_parse_offset(value, offset):
+    parsed = parse_offset(value)
+    assert parsed == datetime(2018, 1, 22, 20, 20, tzinfo=timezone(offset))
+    assert parsed.utcoffset() == offset
+    assert parsed == datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+
+
+def test_parse_epoch():
+    assert parse_epoch('1503435956.000247') == datetime.utcfromtimestamp(
+        1503435956.000247)
+    assert parse_epoch(1360782804) == datetime(2013, 2, 13, 19, 13, 24)
+
+
+@pytest.mark.parametrize('parse, value', [
+    (parse_utc, '2018-01-22T20:20:00'),
+    (parse_utc, '2018-01-22 20:20:00Z'),
+    (parse_utc, '2018-01-22T20:20:00Z '),
+    (parse_utc, '2018-13-22T20:20:00Z'),
+    (parse_offset, '2018-01-22T20:20:00Z'),
+    (parse_offset, '2018-01-22T20:20:00+010'),
+    (parse_offset, '2018-01-32T20:20:00+0100'),
+    (parse_epoch, 'yesterday'),
+])
+def test_invalid(parse, value):
+    with pytest.raises(ValueError):
+        parse(value)
+
+
+def test_cached():
+    value = '2018-01-22T20:20:00+0100'
+    assert parse_offset(value) is parse_offset(value)
@@ -0,0 +1,52 @@
+"""fast parsing of the timestamp formats used by the example APIs.
+
+Fixed formats are matched with a regular expression,
+which is much faster than :meth:`~datetime.datetime.strptime`.
+Responses often repeat timestamps, so recent results are cached.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+__all__ = ['parse_utc', 'parse_offset', 'parse_epoch']
+
+CACHE_SIZE = 1024
+
+_DATETIME = r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)'
+_UTC = re.compile(_DATETIME + 'Z', re.ASCII)
+_OFFSET = re.compile(_DATETIME + r'([+-])(\d\d):?(\d\d)', re.ASCII)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_utc(value: str) -> datetime:
+    """parse a UTC timestamp (e.g. ``2018-01-22T20:20:00Z``)
+    into a naive datetime"""
+    match = _UTC.fullmatch(value)
+    if match is None:
+        raise ValueError(f'invalid UTC timestamp: {value!r}')
+    return datetime(*map(int, match.groups()))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_offset(value: str) -> datetime:
+    """parse a timestamp with UTC offset (e.g. ``2018-01-22T20:20:00+0100``)
+    into an aware datetime"""
+    match = _OFFSET.fullmatch(value)
+    if match is None:
+        raise ValueError(f'invalid timestamp with offset: {value!r}')
+    *fields, sign, hours, minutes = match.groups()
+    return datetime(*map(int, fields),
+                    tzinfo=_timezone(sign, hours, minutes))
+
+
+@lru_cache(maxsize=None)
+def _timezone(sign: str, hours: str, minutes: str) -> timezone:
+    offset = timedelta(hours=int(hours), minutes=int(minutes))
+    return timezone(-offset if sign == '-' else offset)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_epoch(value: str) -> datetime:
+    """parse a UNIX timestamp (e.g. ``'1503435956.000247'``)
+    into a naive UTC datetime"""
+    return datetime.utcfromtimestamp(float(value))
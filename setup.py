@@ -35,6 +35,7 @@ setup(
     extras_require={
         "aiohttp": ["aiohttp>=3.4.4,<3.8.0"],
         "requests": ["requests>=2.20,<2.26"],
+        "httpx": ["httpx[http2]>=0.18"],
     },
     keywords=[
         "api-wrapper",
@@ -46,5 +47,14 @@ setup(
         "rpc",
     ],
     python_requires=">=3.6",
-    packages=find_packages(exclude=("examples", "tests", "docs", "tutorial")),
+    packages=find_packages(
+        exclude=(
+            "examples",
+            "tests",
+            "docs",
+            "tutorial",
+            "benchmarks",
+            "benchmarks.*",
+        )
+    ),
 )
@@ -3,11 +3,38 @@ The entire public API is available at root level::
 
     from snug import Query, Request, send_async, PATCH, paginated, ...
 """
-from . import clients, http
+from . import (
+    batching,
+    caching,
+    clients,
+    har,
+    hooks,
+    http,
+    metrics,
+    profiling,
+    scheduling,
+)
 from .__about__ import *  # noqa
+from .batching import *  # noqa
+from .caching import *  # noqa
 from .clients import *  # noqa
+from .har import *  # noqa
+from .hooks import *  # noqa
 from .http import *  # noqa
+from .metrics import *  # noqa
 from .pagination import *  # noqa
+from .profiling import *  # noqa
 from .query import *  # noqa
+from .scheduling import *  # noqa
 
-__all__ = ["clients", "http"]
+__all__ = [
+    "batching",
+    "caching",
+    "clients",
+    "har",
+    "hooks",
+    "http",
+    "metrics",
+    "profiling",
+    "scheduling",
+]
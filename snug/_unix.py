@@ -0,0 +1,62 @@
+"""Unix domain socket support for the :mod:`urllib` client.
+Imported on demand, as it imports :mod:`urllib.request`."""
+import http.client
+import socket
+import urllib.request
+from functools import partial
+from urllib.parse import unquote
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection over a Unix domain socket"""
+
+    def __init__(self, socket_path, host, **kwargs):
+        super().__init__(host, **kwargs)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+        except BaseException:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class UnixSocketHandler(urllib.request.AbstractHTTPHandler):
+    """Sends requests for ``unix://`` and ``http+unix://`` URLs,
+    and for HTTP hosts mapped to a socket path, over Unix sockets"""
+
+    # before the default HTTP handler
+    handler_order = 400
+
+    def __init__(self, sockets=None):
+        super().__init__()
+        self.sockets = dict(sockets or {})
+
+    def http_open(self, req):
+        path = self.sockets.get(req.host)
+        if path is None:
+            return None  # let the regular HTTP handler deal with it
+        return self.do_open(partial(UnixHTTPConnection, path), req)
+
+    def unix_open(self, req):
+        return self.do_open(
+            lambda host, **kwargs: UnixHTTPConnection(
+                unquote(host), "localhost", **kwargs
+            ),
+            req,
+        )
+
+    def unix_request(self, req):
+        if not req.has_header("Host"):
+            req.add_unredirected_header("Host", "localhost")
+        return self.do_request_(req)
+
+
+# the handler methods are looked up by URL scheme
+setattr(UnixSocketHandler, "http+unix_open", UnixSocketHandler.unix_open)
+setattr(UnixSocketHandler, "http+unix_request", UnixSocketHandler.unix_request)
@@ -0,0 +1,47 @@
+"""Helpers shared by the hooks and client wrappers"""
+
+
+def _host(url):
+    """the network location of an URL, without parsing the entire URL"""
+    _, sep, rest = url.partition("://")
+    return rest.split("/", 1)[0].rpartition("@")[2] if sep else ""
+
+
+def _query_name(query):
+    # generator objects carry the name of their function
+    return getattr(query, "__qualname__", None) or type(query).__qualname__
+
+
+def _size(content):
+    try:
+        return len(content)
+    except TypeError:
+        return 0
+
+
+def _header(headers, name, default):
+    """the value of a header, by lowercase name"""
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return default
+
+
+def _header_items(headers):
+    """the (name, value) pairs of headers, including repeated headers
+    (which some header types combine in ``items()``)"""
+    return getattr(headers, "multi_items", headers.items)()
+
+
+def _awaitable(result, query):
+    """the result of an asynchronously executed query, if it is awaitable.
+    Executors which limit or order executions reject other results
+    (e.g. the async iterator of a paginated query), as the requests
+    for these are only sent later."""
+    if not hasattr(result, "__await__"):
+        raise TypeError(
+            "{} query does not resolve to an awaitable "
+            "(e.g. a paginated query), and can't be executed "
+            "by this executor".format(type(query).__qualname__)
+        )
+    return result
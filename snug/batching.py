@@ -0,0 +1,144 @@
+"""Automatic batching of queries during asynchronous execution
+
+.. versionadded:: 2.2
+"""
+from .query import AsyncExecutor
+
+__all__ = ["BatchingExecutor"]
+
+
+class _Pending(object):
+    """queries of one type waiting to be executed as a batch"""
+
+    __slots__ = "queries", "futures"
+
+    def __init__(self):
+        self.queries = []
+        self.futures = []
+
+
+class BatchingExecutor(object):
+    """An asynchronous executor which merges queries of batchable types
+    into bulk queries.
+
+    A query type is batchable if it defines a ``__batch__`` classmethod.
+    This takes a list of queries of the type,
+    and returns a single query which resolves to
+    a sequence of their results, in the same order.
+
+    Batchable queries passed to the executor are not executed immediately.
+    Instead, they are collected until the next iteration of the event loop
+    (or until ``window`` has passed), and then executed as one batch.
+    Each caller receives the result of its own query.
+    Other queries are executed as usual
+    (e.g. a :class:`~snug.pagination.paginated` query
+    resolves to an async iterator).
+
+    Parameters
+    ----------
+    window: float
+        The time (in seconds) to collect queries before executing a batch.
+        By default, only queries issued in the same iteration
+        of the event loop are batched.
+    max_batch_size: int or None
+        The maximum number of queries per batch
+    **kwargs
+        arguments to pass to :func:`~snug.query.execute_async`
+
+    Example
+    -------
+
+    >>> class user(snug.Query[dict]):
+    ...     def __init__(self, id):
+    ...         self.id = id
+    ...
+    ...     def __iter__(self):
+    ...         response = yield snug.GET(f'/users/{self.id}')
+    ...         return json.loads(response.content)
+    ...
+    ...     @classmethod
+    ...     def __batch__(cls, queries):
+    ...         return users([q.id for q in queries])
+    ...
+    >>> exec = snug.BatchingExecutor(client=aiohttp.ClientSession())
+    >>> # a single request is sent for all users
+    >>> await asyncio.gather(*(exec(user(id)) for id in range(20)))
+    """
+
+    __slots__ = "window", "max_batch_size", "_executor", "_pending", "_tasks"
+
+    def __init__(self, window=0, max_batch_size=None, **kwargs):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._executor = AsyncExecutor(**kwargs)
+        self._pending = {}
+        # references to the running batches, so they are not collected
+        self._tasks = set()
+
+    async def __call__(self, query):
+        """Execute a query asynchronously, returning its result.
+        Batchable queries are merged with others of their type.
+
+        Parameters
+        ----------
+        query: ~snug.query.Query[T]
+            The query to resolve
+
+        Returns
+        -------
+        T
+            the query result
+        """
+        querytype = type(query)
+        if not hasattr(querytype, "__batch__"):
+            result = self._executor(query)
+            return (await result) if hasattr(result, "__await__") else result
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        try:
+            pending = self._pending[querytype]
+        except KeyError:
+            pending = self._pending[querytype] = _Pending()
+            if self.window:
+                loop.call_later(self.window, self._flush, querytype, pending)
+            else:
+                loop.call_soon(self._flush, querytype, pending)
+        future = loop.create_future()
+        pending.queries.append(query)
+        pending.futures.append(future)
+        if len(pending.queries) == self.max_batch_size:
+            self._flush(querytype, pending)
+        return await future
+
+    def _flush(self, querytype, pending):
+        import asyncio
+
+        # the batch may already have been flushed when it became full
+        if self._pending.get(querytype) is not pending:
+            return
+        del self._pending[querytype]
+        task = asyncio.ensure_future(
+            self._execute(querytype, pending.queries, pending.futures)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, querytype, queries, futures):
+        try:
+            results = await self._executor(querytype.__batch__(queries))
+            results = list(results)
+            if len(results) != len(queries):
+                raise ValueError(
+                    "batch of {} {} queries returned {} results".format(
+                        len(queries), querytype.__qualname__, len(results)
+                    )
+                )
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,448 @@
+"""Persistent caching of responses, shared between processes
+
+.. versionadded:: 2.2
+"""
+import json
+import os
+import time
+
+from ._util import _header, _header_items
+from .clients import send, send_async
+from .http import Response
+from .query import execute, execute_async, gather
+
+__all__ = ["SQLiteCache", "CachingClient"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+#: the maximum time (in seconds) between writes of access times
+ACCESS_FLUSH_INTERVAL = 10
+
+
+class _Entry(object):
+    __slots__ = "response", "expires", "etag", "last_modified"
+
+    def __init__(self, response, expires, etag, last_modified):
+        self.response = response
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class SQLiteCache(object):
+    """A response cache stored in an SQLite database file.
+    Processes and threads using the same file share the cache.
+
+    The database is opened in write-ahead log mode,
+    so reading processes do not block each other,
+    and writes are short transactions.
+    Cache hits do not write to the database: the access times used for
+    eviction are written in batches, when storing a response or
+    at most every :data:`ACCESS_FLUSH_INTERVAL` seconds.
+
+    Parameters
+    ----------
+    path: str or ~os.PathLike
+        The path of the database file. It is created if needed.
+    max_size: int
+        The maximum total size (in bytes) of the cached content.
+        When exceeded, the least recently used responses are evicted.
+    timeout: float
+        The time (in seconds) to wait for a lock held by another process
+
+    Example
+    -------
+
+    >>> cache = snug.SQLiteCache('/var/cache/myapp/http.sqlite',
+    ...                          max_size=256 * 2 ** 20)
+    >>> client = snug.CachingClient(requests.Session(), cache, ttl=3600)
+    """
+
+    __slots__ = (
+        "path",
+        "max_size",
+        "timeout",
+        "_local",
+        "_lock",
+        "_accessed",
+        "_flushed",
+    )
+
+    def __init__(self, path, max_size=64 * 2**20, timeout=30):
+        import threading
+
+        self.path = os.fspath(path)
+        self.max_size = max_size
+        self.timeout = timeout
+        # sqlite connections may only be used in the thread creating them
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # access times by key, not yet written to the database
+        self._accessed = {}
+        self._flushed = time.time()
+        self._connection()
+
+    def _connection(self):
+        try:
+            return self._local.connection
+        except AttributeError:
+            import sqlite3
+
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+            return connection
+
+    def get(self, key):
+        """Look up a cached response, whether expired or not
+
+        Parameters
+        ----------
+        key: str
+            The cache key
+
+        Returns
+        -------
+        _Entry or None
+            The entry with the response, its expiry and validators
+        """
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT status, headers, content, expires, etag, last_modified "
+            "FROM responses WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with self._lock:
+            self._accessed[key] = now
+            due = now - self._flushed > ACCESS_FLUSH_INTERVAL
+        if due:
+            self._flush()
+        status, headers, content, expires, etag, last_modified = row
+        return _Entry(
+            Response(status, content, _message(json.loads(headers))),
+            expires,
+            etag,
+            last_modified,
+        )
+
+    def set(self, key, response, expires):
+        """Store a response, evicting others if the cache is full.
+        Responses larger than ``max_size`` are not stored.
+
+        Parameters
+        ----------
+        key: str
+            The cache key
+        response: ~snug.http.Response
+            The response to store
+        expires: float
+            The time (since the epoch) after which it is stale
+        """
+        size = len(response.content or b"")
+        if size > self.max_size:
+            return
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # eviction needs the latest access times
+            self._write_accessed(connection)
+            connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.status_code,
+                    json.dumps(list(_header_items(response.headers))),
+                    response.content,
+                    size,
+                    expires,
+                    now,
+                    _header(response.headers, "etag", None),
+                    _header(response.headers, "last-modified", None),
+                ),
+            )
+            self._evict(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def refresh(self, key, expires):
+        """Set a new expiry time for a stored response,
+        after it has been revalidated
+
+        Parameters
+        ----------
+        key: str
+            The cache key
+        expires: float
+            The time (since the epoch) after which it is stale
+        """
+        self._connection().execute(
+            "UPDATE responses SET expires = ?, accessed = ? WHERE key = ?",
+            (expires, time.time(), key),
+        )
+
+    def _flush(self):
+        """write the pending access times"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_accessed(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _write_accessed(self, connection):
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            self._flushed = time.time()
+        connection.executemany(
+            "UPDATE responses SET accessed = ? WHERE key = ?",
+            [(when, key) for key, when in accessed.items()],
+        )
+
+    def _evict(self, connection):
+        (excess,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) - ? FROM responses",
+            (self.max_size,),
+        ).fetchone()
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    @property
+    def size(self):
+        """The total size (in bytes) of the cached content"""
+        return (
+            self._connection()
+            .execute("SELECT COALESCE(SUM(size), 0) FROM responses")
+            .fetchone()[0]
+        )
+
+    def __len__(self):
+        return (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM responses")
+            .fetchone()[0]
+        )
+
+    def clear(self):
+        """Remove all cached responses"""
+        self._connection().execute("DELETE FROM responses")
+
+    def close(self):
+        """Write pending access times,
+        and close the database connection of the current thread"""
+        if self._accessed:
+            self._flush()
+        connection = self._local.__dict__.pop("connection", None)
+        if connection is not None:
+            connection.close()
+
+    def __repr__(self):
+        return "SQLiteCache({!r})".format(self.path)
+
+
+def _message(items):
+    """headers as a case-insensitive mapping, like those of the
+    :mod:`urllib` client. Repeated headers are kept."""
+    from http.client import HTTPMessage
+
+    message = HTTPMessage()
+    for name, value in items:
+        message[name] = value
+    return message
+
+
+def _cache_key(request):
+    import hashlib
+
+    return hashlib.sha256(
+        json.dumps(
+            [
+                request.method,
+                request.url,
+                sorted(request.params.items()),
+                sorted((k.lower(), v) for k, v in request.headers.items()),
+            ],
+            default=str,
+        ).encode()
+    ).hexdigest()
+
+
+class CachingClient(object):
+    """A client which caches responses of another client
+    in a persistent :class:`SQLiteCache`,
+    so they can be reused by other processes and later runs.
+    Registered with both :func:`~snug.clients.send`
+    and :func:`~snug.clients.send_async`.
+
+    Fresh responses are returned from the cache without sending a request.
+    Once expired, responses with an ``ETag`` or ``Last-Modified`` header
+    are revalidated with a conditional request. If the server responds with
+    ``304 Not Modified``, the cached response is used and kept for
+    another ``ttl`` seconds.
+
+    Requests are cached by method, URL, parameters and headers.
+    Responses with ``Cache-Control: no-store`` are never cached.
+
+    Note
+    ----
+    The cache is accessed synchronously, also when sending
+    requests asynchronously. Use a local disk for the database file.
+
+    Parameters
+    ----------
+    client
+        The client to send requests with.
+        Its type must be registered with :func:`~snug.clients.send`
+        or :func:`~snug.clients.send_async`.
+    cache: SQLiteCache or str or ~os.PathLike
+        The cache, or the path of its database file
+    ttl: float
+        The time (in seconds) responses stay fresh
+    methods: ~typing.Collection[str]
+        The request methods of which to cache responses
+    statuses: ~typing.Collection[int]
+        The status codes of responses to cache
+
+    Example
+    -------
+
+    >>> client = snug.CachingClient(requests.Session(),
+    ...                             '/tmp/ns-cache.sqlite', ttl=24 * 3600)
+    >>> client.prewarm([ns.stations()], auth=credentials)
+    >>> stations = snug.execute(ns.stations(), client=client,
+    ...                         auth=credentials)  # from the cache
+    """
+
+    __slots__ = "client", "cache", "ttl", "methods", "statuses"
+
+    def __init__(
+        self,
+        client,
+        cache,
+        ttl=300,
+        methods=("GET", "HEAD"),
+        statuses=(200, 203, 300, 301, 308, 404, 410),
+    ):
+        self.client = client
+        self.cache = (
+            cache if isinstance(cache, SQLiteCache) else SQLiteCache(cache)
+        )
+        self.ttl = ttl
+        self.methods = frozenset(methods)
+        self.statuses = frozenset(statuses)
+
+    def _lookup(self, request):
+        """the cache key, entry, and the request to send (if any)"""
+        if request.method not in self.methods:
+            return None, None, request
+        key = _cache_key(request)
+        entry = self.cache.get(key)
+        if entry is None:
+            return key, None, request
+        if entry.expires > time.time():
+            return key, entry, None
+        validators = {}
+        if entry.etag is not None:
+            validators["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            validators["If-Modified-Since"] = entry.last_modified
+        return key, entry, request.with_headers(validators)
+
+    def _store(self, key, entry, response):
+        """the response to return, after updating the cache"""
+        if key is None:
+            return response
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(key, time.time() + self.ttl)
+            return entry.response
+        if response.status_code in self.statuses and "no-store" not in (
+            _header(response.headers, "cache-control", "").lower()
+        ):
+            self.cache.set(key, response, time.time() + self.ttl)
+        return response
+
+    def prewarm(self, queries, auth=None):
+        """Execute queries, so that their responses are cached.
+        Requests with fresh responses in the cache are not sent again.
+        The queries are executed concurrently.
+
+        Parameters
+        ----------
+        queries: ~typing.Iterable[~snug.query.Query]
+            The queries to execute
+        auth
+            The authentication to use, see :func:`~snug.query.execute`
+        """
+        execute(_gathered(queries), client=self, auth=auth)
+
+    async def prewarm_async(self, queries, auth=None):
+        """Execute queries asynchronously, so that their responses are cached.
+        See :meth:`prewarm`.
+
+        Parameters
+        ----------
+        queries: ~typing.Iterable[~snug.query.Query]
+            The queries to execute
+        auth
+            The authentication to use, see :func:`~snug.query.execute_async`
+        """
+        await execute_async(_gathered(queries), client=self, auth=auth)
+
+    def __repr__(self):
+        return "CachingClient({!r}, {!r})".format(self.client, self.cache)
+
+
+def _gathered(queries):
+    """a query executing the given queries"""
+    return (yield gather(*queries))
+
+
+@send.register(CachingClient)
+def _caching_send(client, request):
+    """send a request, unless a fresh response is cached"""
+    key, entry, request = client._lookup(request)
+    if request is None:
+        return entry.response
+    return client._store(key, entry, send(client.client, request))
+
+
+@send_async.register(CachingClient)
+async def _caching_send_async(client, request):
+    """send a request asynchronously, unless a fresh response is cached"""
+    key, entry, request = client._lookup(request)
+    if request is None:
+        return entry.response
+    return client._store(key, entry, await send_async(client.client, request))
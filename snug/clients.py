@@ -1,20 +1,19 @@
 """Funtions for dealing with for HTTP clients in a unified manner"""
-import asyncio
+
 import sys
-import urllib.request
-from functools import partial, singledispatch
-from http.client import HTTPResponse
-from io import BytesIO
-from itertools import starmap
-from urllib.error import HTTPError
-from urllib.parse import urlencode
+import urllib.parse
+from functools import lru_cache, singledispatch
 
 from .http import Response
 
-__all__ = ["send", "send_async"]
+__all__ = ["send", "send_async", "Loopback", "unix_socket_opener"]
 
 
 _ASYNCIO_USER_AGENT = "Python-asyncio/3.{}".format(sys.version_info.minor)
+_CHUNK_SIZE = 65536
+# URL schemes for HTTP over a Unix socket,
+# with the percent-encoded socket path as host
+_UNIX_SCHEMES = ("unix", "http+unix")
 
 
 @singledispatch
@@ -35,6 +34,10 @@ def send(client, request):
           (e.g. from :func:`~urllib.request.build_opener`)
         * :class:`requests.Session`
           (if `requests <http://docs.python-requests.org/>`_ is installed)
+        * :class:`httpx.Client`
+          (if `httpx <https://www.python-httpx.org/>`_ is installed)
+
+          .. versionadded:: 2.2
 
     request: Request
         The request to send
@@ -52,6 +55,9 @@ def send(client, request):
     ...     r = client.send(request)
     ...     return Response(r.status, r.read(), headers=r.get_headers())
     """
+    impl = _builtin_impl(send, type(client))
+    if impl is not None:
+        return impl(client, request)
     raise TypeError("client {!r} not registered".format(client))
 
 
@@ -73,6 +79,12 @@ def send_async(client, request):
           (e.g. from :func:`~asyncio.get_event_loop`)
         * :class:`aiohttp.ClientSession`
           (if `aiohttp <http://aiohttp.readthedocs.io/>`_ is installed)
+        * :class:`httpx.AsyncClient`
+          (if `httpx <https://www.python-httpx.org/>`_ is installed).
+          Create it with ``http2=True`` to multiplex concurrent requests
+          over a single HTTP/2 connection per host.
+
+          .. versionadded:: 2.2
 
     request: Request
         The request to send
@@ -90,24 +102,207 @@ def send_async(client, request):
     ...     r = await client.send(request)
     ...     return Response(r.status, r.read(), headers=r.get_headers())
     """
+    impl = _builtin_impl(send_async, type(client))
+    if impl is not None:
+        return impl(client, request)
     raise TypeError("client {!r} not registered".format(client))
 
 
-@send.register(urllib.request.OpenerDirector)
+def _register_builtin(client_type):
+    """Register the built-in implementations for a client type, if any.
+
+    Registration is deferred until a client is first dispatched on,
+    so that importing snug does not import the client libraries.
+    Any library defining the client type has already been imported
+    at this point."""
+    for cls in client_type.__mro__:
+        register = _BUILTIN_CLIENTS.get(cls.__module__.partition(".")[0])
+        if register is not None:
+            register()
+
+
+def _builtin_impl(func, client_type):
+    """The built-in implementation of a send function for the given
+    client type, or None if there is none.
+    A library may define types which are not clients of ``func``
+    (e.g. an :mod:`asyncio` event loop is no client of :func:`send`)."""
+    _register_builtin(client_type)
+    impl = func.dispatch(client_type)
+    return None if impl is func.registry[object] else impl
+
+
+def _register_default(func, cls, impl):
+    """Register a built-in implementation, unless the user
+    registered their own for the class already"""
+    if cls not in func.registry:
+        func.register(cls, impl)
+
+
+def _dispatch(func, client_type):
+    """The implementation of a send function for the given client type,
+    taking the deferred built-in registrations into account."""
+    impl = func.dispatch(client_type)
+    if impl is func.registry[object]:
+        impl = _builtin_impl(func, client_type) or impl
+    return impl
+
+
+def _register_urllib():
+    import urllib.request
+
+    _register_default(send, urllib.request.OpenerDirector, _urllib_send)
+
+
 def _urllib_send(opener, req, **kwargs):
     """Send a request with an :mod:`urllib` opener"""
+    import urllib.request
+    from urllib.error import HTTPError
+
     if req.content and not any(
         h.lower() == "content-type" for h in req.headers
     ):
         req = req.with_headers({"Content-Type": "application/octet-stream"})
-    url = req.url + "?" + urlencode(req.params)
+    req = _with_accept_encoding(req)
+    url = req.url + "?" + urllib.parse.urlencode(req.params)
     raw_req = urllib.request.Request(url, req.content, headers=req.headers)
     raw_req.method = req.method
     try:
         res = opener.open(raw_req, **kwargs)
     except HTTPError as http_err:
         res = http_err
-    return Response(res.getcode(), content=res.read(), headers=res.headers)
+    return Response(
+        res.getcode(), content=_read_decoded(res), headers=res.headers
+    )
+
+
+def unix_socket_opener(sockets=None):
+    """Create a :mod:`urllib` opener which can send requests
+    over Unix domain sockets.
+
+    Requests are sent over a Unix socket if their URL has a
+    ``unix://`` or ``http+unix://`` scheme,
+    with the percent-encoded socket path as host
+    (e.g. ``unix://%2Frun%2Fproxy.sock/api/items``),
+    or if their host is mapped to a socket path with ``sockets``.
+    The default client of :func:`~snug.query.execute`
+    supports the URL schemes as well.
+
+    .. versionadded:: 2.2
+
+    Parameters
+    ----------
+    sockets: ~typing.Mapping[str, str] or None
+        Socket paths by host (including the port, if given in the URL).
+        Requests to other hosts are sent over TCP.
+
+    Returns
+    -------
+    urllib.request.OpenerDirector
+        The opener, to be used as client
+
+    Example
+    -------
+
+    >>> client = snug.unix_socket_opener({"api.local": "/run/proxy.sock"})
+    >>> snug.execute(snug.GET("http://api.local/items"), client=client)
+    """
+    import urllib.request
+
+    from ._unix import UnixSocketHandler
+
+    return urllib.request.build_opener(UnixSocketHandler(sockets))
+
+
+@lru_cache(maxsize=None)
+def _accept_encoding():
+    """the content encodings supported by the built-in clients"""
+    try:
+        import brotli  # noqa
+    except ImportError:
+        return "gzip, deflate"
+    return "gzip, deflate, br"
+
+
+def _with_accept_encoding(req):
+    if any(h.lower() == "accept-encoding" for h in req.headers):
+        return req
+    return req.with_headers({"Accept-Encoding": _accept_encoding()})
+
+
+class _DeflateDecoder(object):
+    """decodes zlib-wrapped or raw deflate data.
+    Servers use both for the "deflate" encoding."""
+
+    __slots__ = "_decoder"
+
+    def __init__(self):
+        self._decoder = None
+
+    def decompress(self, data):
+        import zlib
+
+        if self._decoder is None:
+            if not data:
+                return b""
+            # zlib-wrapped data starts with a 2-byte header
+            wrapped = (
+                len(data) > 1
+                and data[0] & 0x0F == 8
+                and (data[0] << 8 | data[1]) % 31 == 0
+            )
+            self._decoder = zlib.decompressobj(
+                zlib.MAX_WBITS if wrapped else -zlib.MAX_WBITS
+            )
+        return self._decoder.decompress(data)
+
+    def flush(self):
+        return b"" if self._decoder is None else self._decoder.flush()
+
+
+class _BrotliDecoder(object):
+    __slots__ = "_decoder"
+
+    def __init__(self):
+        import brotli
+
+        self._decoder = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self._decoder.process(data)
+
+    def flush(self):
+        return b""
+
+
+def _decoder(encoding):
+    """a decompressor for a content encoding,
+    or ``None`` if it is not supported"""
+    import zlib
+
+    encoding = (encoding or "").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        return _DeflateDecoder()
+    elif encoding == "br" and _accept_encoding().endswith("br"):
+        return _BrotliDecoder()
+    return None
+
+
+def _read_decoded(res):
+    """read the body of a response, decoding it incrementally
+    according to its Content-Encoding"""
+    decoder = _decoder(res.headers.get("Content-Encoding"))
+    if decoder is None:
+        return res.read()
+    chunks = []
+    while True:
+        chunk = res.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+        chunks.append(decoder.decompress(chunk))
+    chunks.append(decoder.flush())
+    return b"".join(chunks)
 
 
 class _SocketAdaptor:
@@ -118,24 +313,45 @@ class _SocketAdaptor:
         return self._file
 
 
-@send_async.register(asyncio.AbstractEventLoop)
+def _register_asyncio():
+    import asyncio
+
+    _register_default(send_async, asyncio.AbstractEventLoop, _asyncio_send)
+
+
 async def _asyncio_send(loop, req, *, timeout=10, max_redirects=10):
     """A rudimentary HTTP client using :mod:`asyncio`"""
+    import asyncio
+    from http.client import HTTPResponse
+    from io import BytesIO
+    from itertools import starmap
+
     if not any(h.lower() == "user-agent" for h in req.headers):
         req = req.with_headers({"User-Agent": _ASYNCIO_USER_AGENT})
+    req = _with_accept_encoding(req)
     url = urllib.parse.urlsplit(
         req.url + "?" + urllib.parse.urlencode(req.params)
     )
-    open_ = partial(asyncio.open_connection, url.hostname, loop=loop)
-    connect = open_(443, ssl=True) if url.scheme == "https" else open_(80)
-    reader, writer = await connect
+    if url.scheme in _UNIX_SCHEMES:
+        host = "localhost"
+        reader, writer = await asyncio.open_unix_connection(
+            urllib.parse.unquote(url.netloc)
+        )
+    else:
+        host = _host_header(url)
+        secure = url.scheme == "https"
+        reader, writer = await asyncio.open_connection(
+            url.hostname,
+            url.port or (443 if secure else 80),
+            ssl=secure or None,
+        )
     try:
         headers = "\r\n".join(
             [
                 "{} {} HTTP/1.1".format(
                     req.method, url.path + "?" + url.query
                 ),
-                "Host: " + url.hostname,
+                "Host: " + host,
                 "Connection: close",
                 "Content-Length: {}".format(len(req.content or b"")),
                 "\r\n".join(starmap("{}: {}".format, req.headers.items())),
@@ -162,44 +378,311 @@ async def _asyncio_send(loop, req, *, timeout=10, max_redirects=10):
             timeout=timeout,
             max_redirects=max_redirects - 1,
         )
-    return Response(status, content=resp.read(), headers=resp.headers)
+    return Response(status, content=_read_decoded(resp), headers=resp.headers)
+
 
+def _host_header(url):
+    """the Host header value for a split URL.
+    Unlike the network location, it excludes any user credentials."""
+    host = url.hostname or ""
+    if ":" in host:  # an IPv6 address
+        host = "[" + host + "]"
+    return host if url.port is None else "{}:{}".format(host, url.port)
 
-try:
+
+def _register_requests():
     import requests
-except ImportError:  # pragma: no cover
-    pass
-else:
-
-    @send.register(requests.Session)
-    def _requests_send(session, req):
-        """send a request with the `requests` library"""
-        res = session.request(
-            req.method,
-            req.url,
-            data=req.content,
-            params=req.params,
-            headers=req.headers,
-        )
-        return Response(res.status_code, res.content, headers=res.headers)
 
+    _register_default(send, requests.Session, _requests_send)
 
-try:
+
+def _requests_send(session, req):
+    """send a request with the `requests` library"""
+    res = session.request(
+        req.method,
+        req.url,
+        data=req.content,
+        params=req.params,
+        headers=req.headers,
+    )
+    return Response(res.status_code, res.content, headers=res.headers)
+
+
+def _register_aiohttp():
     import aiohttp
-except ImportError:  # pragma: no cover
+
+    _register_default(send_async, aiohttp.ClientSession, _aiohttp_send)
+
+
+async def _aiohttp_send(session, req):
+    """send a request with the `aiohttp` library"""
+    async with session.request(
+        req.method,
+        req.url,
+        params=req.params,
+        data=req.content,
+        headers=req.headers,
+    ) as resp:
+        return Response(
+            resp.status, content=await resp.read(), headers=resp.headers
+        )
+
+
+def _register_httpx():
+    import httpx
+
+    _register_default(send, httpx.Client, _httpx_send)
+    _register_default(send_async, httpx.AsyncClient, _httpx_send_async)
+
+
+def _httpx_send(client, req):
+    """send a request with a `httpx` client"""
+    res = client.request(
+        req.method,
+        req.url,
+        params=req.params,
+        content=req.content,
+        headers=req.headers,
+    )
+    return Response(res.status_code, content=res.content, headers=res.headers)
+
+
+async def _httpx_send_async(client, req):
+    """send a request with an asynchronous `httpx` client"""
+    res = await client.request(
+        req.method,
+        req.url,
+        params=req.params,
+        content=req.content,
+        headers=req.headers,
+    )
+    return Response(res.status_code, content=res.content, headers=res.headers)
+
+
+class Loopback(object):
+    """A client which passes requests directly to a handler
+    in the same process, without any sockets.
+    Registered with both :func:`send` and :func:`send_async`.
+
+    Useful for testing queries and for measuring their overhead.
+
+    .. versionadded:: 2.2
+
+    Parameters
+    ----------
+    handler: ~typing.Callable[[~snug.http.Request], ~snug.http.Response]
+        Callable which handles the request.
+        When sending asynchronously, it may also return an awaitable.
+    latency: float
+        Simulated latency (in seconds) to add to each request.
+
+    Example
+    -------
+
+    >>> client = snug.Loopback(lambda req: snug.Response(200, b'hello'))
+    >>> snug.execute(my_query, client=client)
+    """
+
+    __slots__ = "handler", "latency"
+
+    def __init__(self, handler, latency=0):
+        self.handler = handler
+        self.latency = latency
+
+    @classmethod
+    def wsgi(cls, app, latency=0):
+        """Create a client which sends requests to a WSGI application
+
+        Parameters
+        ----------
+        app
+            The WSGI application
+        latency: float
+            Simulated latency (in seconds) to add to each request.
+        """
+        return cls(_WSGIHandler(app), latency)
+
+    @classmethod
+    def asgi(cls, app, latency=0):
+        """Create a client which sends requests to an ASGI application.
+        Can only be used asynchronously.
+
+        Parameters
+        ----------
+        app
+            The ASGI application
+        latency: float
+            Simulated latency (in seconds) to add to each request.
+        """
+        return cls(_ASGIHandler(app), latency)
+
+    def __repr__(self):
+        return "Loopback({0.handler!r}, latency={0.latency!r})".format(self)
+
+
+@send.register(Loopback)
+def _loopback_send(client, req):
+    """send a request to a loopback client's handler"""
+    if client.latency:
+        import time
+
+        time.sleep(client.latency)
+    response = client.handler(req)
+    if hasattr(response, "__await__"):
+        getattr(response, "close", _noop)()
+        raise TypeError(
+            "handler of {!r} is asynchronous, "
+            "use send_async() instead".format(client)
+        )
+    return response
+
+
+@send_async.register(Loopback)
+async def _loopback_send_async(client, req):
+    """send a request to a loopback client's handler asynchronously"""
+    if client.latency:
+        import asyncio
+
+        await asyncio.sleep(client.latency)
+    response = client.handler(req)
+    if hasattr(response, "__await__"):
+        response = await response
+    return response
+
+
+def _noop():
     pass
-else:
-
-    @send_async.register(aiohttp.ClientSession)
-    async def _aiohttp_send(session, req):
-        """send a request with the `aiohttp` library"""
-        async with session.request(
-            req.method,
-            req.url,
-            params=req.params,
-            data=req.content,
-            headers=req.headers,
-        ) as resp:
-            return Response(
-                resp.status, content=await resp.read(), headers=resp.headers
-            )
+
+
+def _split_url(req):
+    """the parsed URL of a request, with its parameters in the query"""
+    url = urllib.parse.urlsplit(req.url)
+    query = urllib.parse.urlencode(req.params)
+    if url.query:
+        query = url.query + "&" + query if query else url.query
+    return url, query
+
+
+class _WSGIHandler(object):
+    __slots__ = "app"
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, req):
+        from io import BytesIO
+
+        url, query = _split_url(req)
+        content = req.content or b""
+        environ = {
+            "REQUEST_METHOD": req.method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": urllib.parse.unquote(url.path, "latin-1") or "/",
+            "QUERY_STRING": query,
+            "SERVER_NAME": url.hostname or "localhost",
+            "SERVER_PORT": str(
+                url.port or (443 if url.scheme == "https" else 80)
+            ),
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "CONTENT_LENGTH": str(len(content)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": url.scheme or "http",
+            "wsgi.input": BytesIO(content),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in req.headers.items():
+            key = name.upper().replace("-", "_")
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                key = "HTTP_" + key
+            environ[key] = value
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            started[:] = [status, headers]
+
+        body = self.app(environ, start_response)
+        try:
+            response_content = b"".join(body)
+        finally:
+            getattr(body, "close", _noop)()
+        status, headers = started
+        return Response(
+            int(status.split(None, 1)[0]), response_content, dict(headers)
+        )
+
+    def __repr__(self):
+        return "wsgi({!r})".format(self.app)
+
+
+class _ASGIHandler(object):
+    __slots__ = "app"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, req):
+        url, query = _split_url(req)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": req.method,
+            "scheme": url.scheme or "http",
+            "path": urllib.parse.unquote(url.path) or "/",
+            "raw_path": (url.path or "/").encode("latin-1"),
+            "query_string": query.encode("latin-1"),
+            "root_path": "",
+            "headers": [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in req.headers.items()
+            ],
+            "server": (
+                url.hostname or "localhost",
+                url.port or (443 if url.scheme == "https" else 80),
+            ),
+            "client": ("127.0.0.1", 0),
+        }
+        messages = [
+            {"type": "http.disconnect"},
+            {
+                "type": "http.request",
+                "body": req.content or b"",
+                "more_body": False,
+            },
+        ]
+        status = []
+        headers = {}
+        chunks = []
+
+        async def receive():
+            return messages.pop() if len(messages) > 1 else messages[0]
+
+        async def send_message(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+                headers.update(
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", ())
+                )
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send_message)
+        return Response(status[0], b"".join(chunks), headers)
+
+    def __repr__(self):
+        return "asgi({!r})".format(self.app)
+
+
+_BUILTIN_CLIENTS = {
+    "urllib": _register_urllib,
+    "asyncio": _register_asyncio,
+    "requests": _register_requests,
+    "aiohttp": _register_aiohttp,
+    "httpx": _register_httpx,
+}
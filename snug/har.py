@@ -0,0 +1,292 @@
+"""Recording of requests and responses in the HTTP Archive (HAR) format
+
+.. versionadded:: 2.2
+"""
+
+import json
+import time
+from base64 import b64encode
+from collections import deque
+from urllib.parse import urlencode
+
+from .__about__ import __version__
+from ._util import _header, _header_items, _size
+from .clients import send, send_async
+
+__all__ = ["HARRecorder"]
+
+
+class _Entry(object):
+    __slots__ = (
+        "started",
+        "duration",
+        "request",
+        "response",
+        "error",
+        "request_size",
+        "response_size",
+    )
+
+    def __init__(
+        self,
+        started,
+        duration,
+        request,
+        response,
+        error,
+        request_size,
+        response_size,
+    ):
+        self.started = started
+        self.duration = duration
+        self.request = request
+        self.response = response
+        self.error = error
+        # the sizes of the content before truncation
+        self.request_size = request_size
+        self.response_size = response_size
+
+
+class HARRecorder(object):
+    """A client which records the requests and responses
+    passing through another client,
+    so they can be exported as an HTTP Archive (HAR).
+    Registered with both :func:`~snug.clients.send`
+    and :func:`~snug.clients.send_async`.
+
+    Recording is kept cheap by sampling,
+    and by limiting the number of entries and the recorded body size.
+    The HAR data itself is only built on export.
+
+    Note
+    ----
+    As clients only report complete responses,
+    the total time of each request is recorded in the ``wait`` phase.
+    The ``blocked``, ``dns``, ``connect`` and ``ssl`` phases are
+    reported as unknown (``-1``), ``send`` and ``receive`` as ``0``.
+
+    Parameters
+    ----------
+    client
+        The client to send requests with.
+        Its type must be registered with :func:`~snug.clients.send`
+        or :func:`~snug.clients.send_async`.
+    sample_rate: float
+        Fraction of the requests to record (between 0 and 1)
+    max_entries: int
+        The maximum number of entries to keep.
+        Once reached, the oldest entries are discarded.
+    max_body_size: int
+        The maximum number of bytes of each request
+        and response body to record.
+
+    Example
+    -------
+
+    >>> recorder = snug.HARRecorder(requests.Session(), sample_rate=0.1)
+    >>> exec = snug.executor(client=recorder)
+    >>> ...
+    >>> recorder.write('snug.har')
+    """
+
+    __slots__ = (
+        "client",
+        "sample_rate",
+        "max_body_size",
+        "entries",
+        "_random",
+    )
+
+    def __init__(
+        self, client, sample_rate=1.0, max_entries=1000, max_body_size=65536
+    ):
+        import random
+
+        self.client = client
+        self.sample_rate = sample_rate
+        self.max_body_size = max_body_size
+        self.entries = deque(maxlen=max_entries)
+        self._random = random.random
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or self._random() < self.sample_rate
+
+    def _record(self, started, start, request, response, error):
+        duration = time.perf_counter() - start
+        limit = self.max_body_size
+        request_size = _size(request.content)
+        if request_size > limit:
+            request = request.replace(content=request.content[:limit])
+        response_size = -1
+        if response is not None:
+            response_size = _size(response.content)
+            if response_size > limit:
+                response = response.replace(content=response.content[:limit])
+        self.entries.append(
+            _Entry(
+                started,
+                duration,
+                request,
+                response,
+                error,
+                request_size,
+                response_size,
+            )
+        )
+
+    def clear(self):
+        """Discard all recorded entries"""
+        self.entries.clear()
+
+    def to_har(self):
+        """The recorded entries in HAR format
+
+        Returns
+        -------
+        dict
+            The HTTP archive, which can be serialized as JSON
+        """
+        return {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "snug", "version": __version__},
+                "entries": [_har_entry(e) for e in list(self.entries)],
+            }
+        }
+
+    def write(self, path):
+        """Write the recorded entries to a HAR file
+
+        Parameters
+        ----------
+        path: str
+            The path of the file to write
+        """
+        with open(path, "w") as outfile:
+            json.dump(self.to_har(), outfile, indent=1)
+
+    def __repr__(self):
+        return "HARRecorder({!r})".format(self.client)
+
+
+@send.register(HARRecorder)
+def _har_send(recorder, request):
+    """send a request, recording it if sampled"""
+    if not recorder._sampled():
+        return send(recorder.client, request)
+    started, start = time.time(), time.perf_counter()
+    try:
+        response = send(recorder.client, request)
+    except Exception as e:
+        recorder._record(started, start, request, None, e)
+        raise
+    recorder._record(started, start, request, response, None)
+    return response
+
+
+@send_async.register(HARRecorder)
+async def _har_send_async(recorder, request):
+    """send a request asynchronously, recording it if sampled"""
+    if not recorder._sampled():
+        return await send_async(recorder.client, request)
+    started, start = time.time(), time.perf_counter()
+    try:
+        response = await send_async(recorder.client, request)
+    except Exception as e:
+        recorder._record(started, start, request, None, e)
+        raise
+    recorder._record(started, start, request, response, None)
+    return response
+
+
+def _headers(headers):
+    return [{"name": k, "value": str(v)} for k, v in _header_items(headers)]
+
+
+def _content(content, mimetype):
+    """the HAR representation of body content"""
+    content = content or b""
+    try:
+        return {"mimeType": mimetype, "text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {
+            "mimeType": mimetype,
+            "text": b64encode(content).decode("ascii"),
+            "encoding": "base64",
+        }
+
+
+def _har_entry(entry):
+    from datetime import datetime, timezone
+
+    request, response = entry.request, entry.response
+    url = request.url
+    if request.params:
+        url += ("&" if "?" in url else "?") + urlencode(request.params)
+    duration = round(entry.duration * 1000, 3)
+    har_request = {
+        "method": request.method,
+        "url": url,
+        "httpVersion": "HTTP/1.1",
+        "cookies": [],
+        "headers": _headers(request.headers),
+        "queryString": [
+            {"name": k, "value": str(v)} for k, v in request.params.items()
+        ],
+        "headersSize": -1,
+        "bodySize": entry.request_size,
+    }
+    if request.content is not None:
+        har_request["postData"] = _content(
+            request.content,
+            _header(
+                request.headers, "content-type", "application/octet-stream"
+            ),
+        )
+    if response is None:
+        har_response = {
+            "status": 0,
+            "statusText": "",
+            "httpVersion": "",
+            "cookies": [],
+            "headers": [],
+            "content": {"size": 0, "mimeType": ""},
+            "redirectURL": "",
+            "headersSize": -1,
+            "bodySize": -1,
+            "_error": repr(entry.error),
+        }
+    else:
+        content = _content(
+            response.content, _header(response.headers, "content-type", "")
+        )
+        content["size"] = entry.response_size
+        har_response = {
+            "status": response.status_code,
+            "statusText": "",
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": _headers(response.headers),
+            "content": content,
+            "redirectURL": _header(response.headers, "location", ""),
+            "headersSize": -1,
+            "bodySize": entry.response_size,
+        }
+    return {
+        "startedDateTime": datetime.fromtimestamp(
+            entry.started, timezone.utc
+        ).isoformat(),
+        "time": duration,
+        "request": har_request,
+        "response": har_response,
+        "cache": {},
+        "timings": {
+            "blocked": -1,
+            "dns": -1,
+            "connect": -1,
+            "ssl": -1,
+            "send": 0,
+            "wait": duration,
+            "receive": 0,
+        },
+    }
@@ -0,0 +1,118 @@
+"""Hooks for observing query execution
+
+.. versionadded:: 2.2
+"""
+__all__ = ["Hook"]
+
+
+class Hook(object):
+    """Base class for hooks which observe query execution.
+    Subclasses override the methods of the events they are interested in.
+
+    Hooks are passed to :func:`~snug.query.executor`,
+    :func:`~snug.query.async_executor`, :func:`~snug.query.execute`
+    or :func:`~snug.query.execute_async` with the ``hooks`` argument.
+    Executions without hooks do not incur any overhead.
+
+    Each event has a ``time`` argument:
+    a monotonic timestamp from :func:`time.perf_counter`.
+
+    Note
+    ----
+    Queries with a custom :meth:`~snug.query.Query.__execute__` or
+    :meth:`~snug.query.Query.__execute_async__` only emit
+    :meth:`query_start` and :meth:`query_end`.
+    Queries they execute with an executor (e.g. the pages of a
+    :class:`~snug.pagination.paginated` query) emit their own events.
+
+    Example
+    -------
+
+    >>> class PrintRequests(snug.Hook):
+    ...     def request_sent(self, query, request, time):
+    ...         print(request)
+    ...
+    >>> exec = snug.executor(hooks=[PrintRequests()])
+    """
+
+    __slots__ = ()
+
+    def query_start(self, query, time, parent):
+        """The execution of a query starts
+
+        Parameters
+        ----------
+        query: ~snug.query.Query
+            The query being executed
+        time: float
+            Timestamp of the event
+        parent: ~snug.query.Query or None
+            The query which executes this query, if any.
+            For example: the :class:`~snug.pagination.paginated` query
+            executing its pages.
+        """
+
+    def query_end(self, query, time, error):
+        """The execution of a query ends
+
+        Parameters
+        ----------
+        query: ~snug.query.Query
+            The query being executed
+        time: float
+            Timestamp of the event
+        error: BaseException or None
+            The exception raised during execution, if any
+        """
+
+    def generator_resume(self, query, time):
+        """Control is passed to the query's generator
+        (e.g. to prepare a request or parse a response)
+
+        Parameters
+        ----------
+        query: ~snug.query.Query
+            The query being executed
+        time: float
+            Timestamp of the event
+        """
+
+    def generator_return(self, query, time):
+        """The query's generator passes back control,
+        by yielding a request or returning its result.
+
+        Parameters
+        ----------
+        query: ~snug.query.Query
+            The query being executed
+        time: float
+            Timestamp of the event
+        """
+
+    def request_sent(self, query, request, time):
+        """A request is about to be sent with the client
+
+        Parameters
+        ----------
+        query: ~snug.query.Query
+            The query being executed
+        request: ~snug.http.Request
+            The (authenticated) request
+        time: float
+            Timestamp of the event
+        """
+
+    def response_received(self, query, request, response, time):
+        """A response has been received from the client
+
+        Parameters
+        ----------
+        query: ~snug.query.Query
+            The query being executed
+        request: ~snug.http.Request
+            The (authenticated) request
+        response: ~snug.http.Response
+            The response
+        time: float
+            Timestamp of the event
+        """
@@ -4,13 +4,18 @@ from collections.abc import Mapping
 from functools import partial
 from itertools import chain
 from operator import attrgetter, methodcaller
+from string import Formatter
 
 __all__ = [
     "Request",
     "Response",
+    "RequestTemplate",
     "header_adder",
     "prefix_adder",
     "basic_auth",
+    "gzip_compressor",
+    "set_json_backend",
+    "iter_json_array",
     "GET",
     "POST",
     "PUT",
@@ -37,7 +42,7 @@ class _SlotsMixin(object):
     __slots__ = ()
 
     def _asdict(self):
-        return {a: getattr(self, a) for a in self.__slots__}
+        return {a: getattr(self, a) for a in self._fields}
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -82,7 +87,7 @@ class Request(_SlotsMixin):
         Request headers.
     """
 
-    __slots__ = "method", "url", "content", "params", "headers"
+    __slots__ = _fields = "method", "url", "content", "params", "headers"
     __hash__ = None
 
     def __init__(
@@ -129,6 +134,25 @@ class Request(_SlotsMixin):
         """
         return self.replace(params=_merge_maps(self.params, params))
 
+    def with_json(self, obj):
+        """Create a new request with JSON-encoded content,
+        and a ``Content-Type: application/json`` header.
+        Encoded with the backend set by :func:`set_json_backend`.
+
+        .. versionadded:: 2.2
+
+        Parameters
+        ----------
+        obj
+            the object to encode
+        """
+        return self.replace(
+            content=_json_codec()[1](obj),
+            headers=_merge_maps(
+                self.headers, {"Content-Type": "application/json"}
+            ),
+        )
+
     def __repr__(self):
         return (
             "<Request: {0.method} {0.url}, params={0.params!r}, "
@@ -149,7 +173,9 @@ class Response(_SlotsMixin):
         The headers of the response.
     """
 
-    __slots__ = "status_code", "content", "headers"
+    _fields = "status_code", "content", "headers"
+    # the decoded JSON content is cached in ``_json``
+    __slots__ = _fields + ("_json",)
     __hash__ = None
 
     def __init__(self, status_code, content=None, headers=_FrozenDict()):
@@ -157,12 +183,320 @@ class Response(_SlotsMixin):
         self.content = content
         self.headers = headers
 
+    def json(self):
+        """The content, decoded as JSON.
+        Decoded with the backend set by :func:`set_json_backend`,
+        once: later calls return the same object.
+
+        .. versionadded:: 2.2
+
+        Returns
+        -------
+        ~typing.Any
+            the decoded content
+        """
+        try:
+            return self._json
+        except AttributeError:
+            self._json = _json_codec()[0](self.content)
+            return self._json
+
+    def iter_json(self, chunk_size=65536):
+        """The content, decoded incrementally as a JSON array.
+        See :func:`iter_json_array`.
+
+        .. versionadded:: 2.2
+
+        Parameters
+        ----------
+        chunk_size: int
+            The number of bytes to decode at a time
+
+        Returns
+        -------
+        ~typing.Iterator[~typing.Any]
+            the decoded items of the array
+        """
+        from io import BytesIO
+
+        read = BytesIO(self.content).read
+        return iter_json_array(iter(partial(read, chunk_size), b""))
+
     def __repr__(self):
         return (
             "<Response: {0.status_code}, " "headers={0.headers!r}>"
         ).format(self)
 
 
+class RequestTemplate(object):
+    """A precompiled blueprint for creating :class:`Request` objects.
+
+    The URL pattern, headers and parameter encoders are processed once,
+    so that calling the template builds a finished request
+    in a single step.
+
+    .. versionadded:: 2.2
+
+    Parameters
+    ----------
+    method: str
+        The http method
+    url: str
+        The URL pattern. Placeholders in :meth:`str.format` style
+        (e.g. ``'repos/{owner}/{name}'``) are filled in
+        from the keyword arguments with the same name.
+    params: Mapping[str, ~typing.Callable[[~typing.Any], str]]
+        The query parameters the template accepts,
+        mapped to the callables which encode their values.
+    headers: Mapping
+        Headers to include in every request.
+
+    Example
+    -------
+
+    >>> comments = snug.RequestTemplate(
+    ...     'GET',
+    ...     'https://api.github.com/repos/{owner}/{name}/issues/{number}',
+    ...     params={'since': methodcaller('isoformat')},
+    ...     headers={'Accept': 'application/vnd.github.v3+json'})
+    >>> comments(owner='octocat', name='Hello-World', number=348,
+    ...          since=None)
+    <Request: GET https://api.github.com/repos/octocat/Hello-World/...>
+
+    Parameters passed as ``None`` are left out of the request.
+    """
+
+    __slots__ = "method", "url", "params", "headers", "_fields"
+
+    def __init__(
+        self, method, url, params=_FrozenDict(), headers=_FrozenDict()
+    ):
+        self.method = method
+        self.url = url
+        self.params = _FrozenDict(params)
+        self.headers = _FrozenDict(headers)
+        self._fields = frozenset(
+            name
+            for _, name, _, _ in Formatter().parse(url)
+            if name is not None
+        )
+        if not all(name.isidentifier() for name in self._fields):
+            raise ValueError(
+                "URL placeholders must be names, got {!r}".format(url)
+            )
+        overlap = self._fields.intersection(self.params)
+        if overlap:
+            raise ValueError(
+                "ambiguous placeholders: {}".format(", ".join(sorted(overlap)))
+            )
+
+    def __call__(self, content=None, **kwargs):
+        """Create a request from the template
+
+        Parameters
+        ----------
+        content: bytes or None
+            The request content
+        **kwargs
+            Values for the URL placeholders and query parameters
+
+        Returns
+        -------
+        Request
+            the finished request
+        """
+        encoders = self.params
+        params = {}
+        path_args = {}
+        for name, value in kwargs.items():
+            if name in self._fields:
+                path_args[name] = value
+            elif name in encoders:
+                if value is not None:
+                    params[name] = encoders[name](value)
+            else:
+                raise TypeError(
+                    "unexpected template argument {!r}".format(name)
+                )
+        if len(path_args) != len(self._fields):
+            raise TypeError(
+                "missing template arguments: {}".format(
+                    ", ".join(sorted(self._fields.difference(path_args)))
+                )
+            )
+        return Request(
+            self.method,
+            self.url.format_map(path_args),
+            content,
+            params,
+            self.headers,
+        )
+
+    def __repr__(self):
+        return "<RequestTemplate: {0.method} {0.url}>".format(self)
+
+
+_JSON_CODEC = None
+
+
+def _default_json_codec():
+    try:
+        import orjson
+    except ImportError:
+        import json
+
+        return json.loads, partial(_dumps_bytes, json.dumps)
+    return orjson.loads, orjson.dumps
+
+
+def _dumps_bytes(dumps, obj):
+    return dumps(obj).encode("utf-8")
+
+
+def _json_codec():
+    global _JSON_CODEC
+    if _JSON_CODEC is None:
+        _JSON_CODEC = _default_json_codec()
+    return _JSON_CODEC
+
+
+def set_json_backend(loads=None, dumps=None):
+    """Set the functions used by :meth:`Response.json`
+    and :meth:`Request.with_json`.
+
+    By default, `orjson <https://github.com/ijl/orjson>`_ is used
+    if it is installed, otherwise the standard :mod:`json` module.
+
+    .. versionadded:: 2.2
+
+    Parameters
+    ----------
+    loads: ~typing.Callable[[bytes], ~typing.Any] or None
+        Decodes JSON from bytes.
+        If neither argument is given, the default backend is restored.
+    dumps: ~typing.Callable[[~typing.Any], bytes] or None
+        Encodes an object as JSON bytes
+
+    Example
+    -------
+
+    >>> import json
+    >>> snug.set_json_backend(json.loads,
+    ...                       lambda obj: json.dumps(obj).encode())
+    """
+    global _JSON_CODEC
+    if loads is None and dumps is None:
+        _JSON_CODEC = None
+    elif loads is None or dumps is None:
+        raise TypeError("both loads and dumps are required")
+    else:
+        _JSON_CODEC = loads, dumps
+
+
+_JSON_WHITESPACE = frozenset(" \t\n\r")
+
+
+def iter_json_array(chunks):
+    """Decode a JSON array incrementally, yielding its items one by one.
+
+    Only the undecoded part of the input, and the item being decoded,
+    are kept in memory. This is useful for large arrays of which
+    the items are processed (or loaded into other objects) one at a time.
+    Items are decoded with the standard :mod:`json` module.
+
+    .. versionadded:: 2.2
+
+    Parameters
+    ----------
+    chunks: ~typing.Iterable[bytes]
+        The UTF-8 encoded array, in chunks of any size.
+        For example, the content of a response as it arrives.
+
+    Returns
+    -------
+    ~typing.Iterator[~typing.Any]
+        The decoded items
+
+    Raises
+    ------
+    ValueError
+        If the input is not a valid JSON array.
+        Items before the error are yielded as usual.
+
+    Example
+    -------
+
+    >>> items = snug.iter_json_array([b'[{"id": 1}, {"i', b'd": 2}]'])
+    >>> next(items)
+    {'id': 1}
+    """
+    import codecs
+    import json
+
+    decode_text = codecs.getincrementaldecoder("utf-8")().decode
+    scan = json.JSONDecoder().raw_decode
+    chunks = iter(chunks)
+
+    def read():
+        try:
+            return decode_text(next(chunks)), False
+        except StopIteration:
+            return decode_text(b"", True), True
+
+    buffer, pos, eof = "", 0, False
+    # the next token: "[", "item or ]", "item", ", or ]" or "end"
+    expect = "["
+    while True:
+        while pos < len(buffer) and buffer[pos] in _JSON_WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                break
+            buffer, eof = read()
+            pos = 0
+            continue
+        char = buffer[pos]
+        if expect == "[":
+            if char != "[":
+                raise ValueError("expected a JSON array")
+            pos += 1
+            expect = "item or ]"
+        elif expect == ", or ]" or (expect == "item or ]" and char == "]"):
+            if char == "]":
+                expect = "end"
+            elif char == ",":
+                expect = "item"
+            else:
+                raise ValueError("expected ',' or ']', got {!r}".format(char))
+            pos += 1
+        elif expect == "end":
+            raise ValueError("extra data after the JSON array")
+        else:
+            try:
+                item, end = scan(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                if eof or _json_item_ends(buffer, end):
+                    yield item
+                    pos = end
+                    expect = ", or ]"
+                    continue
+            # the item (a number, for example) may continue in the next chunk
+            text, eof = read()
+            buffer, pos = buffer[pos:] + text, 0
+    if expect != "end":
+        raise ValueError("incomplete JSON array")
+
+
+def _json_item_ends(buffer, end):
+    """whether a decoded array item is followed by a delimiter"""
+    while end < len(buffer) and buffer[end] in _JSON_WHITESPACE:
+        end += 1
+    return end < len(buffer) and buffer[end] in ",]"
+
+
 def basic_auth(credentials):
     """Create an HTTP basic authentication callable
 
@@ -180,6 +514,55 @@ def basic_auth(credentials):
     return header_adder({"Authorization": "Basic " + encoded})
 
 
+def gzip_compressor(min_size=1024, level=6):
+    """Create a callable which compresses request content with gzip
+
+    .. versionadded:: 2.2
+
+    Note
+    ----
+    Only use this for servers which accept compressed request content.
+
+    Parameters
+    ----------
+    min_size: int
+        The minimum content size (in bytes) to compress
+    level: int
+        The compression level (1-9)
+
+    Returns
+    -------
+    ~typing.Callable[[Request], Request]
+        A callable which compresses the content of a :class:`Request`,
+        unless it is smaller than ``min_size`` or already encoded.
+
+    Example
+    -------
+
+    >>> compress = snug.gzip_compressor(min_size=512)
+    >>> compress(snug.POST('https://test.dev', content=b'x' * 1000)).headers
+    {'Content-Encoding': 'gzip'}
+    """
+    return partial(_gzip_content, min_size, level)
+
+
+def _gzip_content(min_size, level, request):
+    import zlib
+
+    content = request.content
+    if (
+        content is None
+        or len(content) < min_size
+        or any(h.lower() == "content-encoding" for h in request.headers)
+    ):
+        return request
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return request.replace(
+        content=compressor.compress(content) + compressor.flush(),
+        headers=_merge_maps(request.headers, {"Content-Encoding": "gzip"}),
+    )
+
+
 prefix_adder = partial(methodcaller, "with_prefix")
 prefix_adder.__doc__ = """
 Make a callable which adds a prefix to a request url
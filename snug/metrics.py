@@ -0,0 +1,294 @@
+"""In-process metrics of query execution
+
+.. versionadded:: 2.2
+"""
+
+import threading
+from bisect import bisect_left
+
+from ._util import _host, _query_name, _size
+from .hooks import Hook
+
+__all__ = ["MetricsCollector"]
+
+#: default latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class _HostMetrics(object):
+    __slots__ = (
+        "requests",
+        "errors",
+        "statuses",
+        "bytes_sent",
+        "bytes_received",
+        "bucket_counts",
+        "latency_sum",
+    )
+
+    def __init__(self, bucket_count):
+        self.requests = 0
+        self.errors = 0
+        self.statuses = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        # the last bucket counts observations above the highest bound
+        self.bucket_counts = [0] * (bucket_count + 1)
+        self.latency_sum = 0.0
+
+
+class MetricsCollector(Hook):
+    """A :class:`~snug.hooks.Hook` which keeps metrics of
+    executed queries in memory.
+
+    Keeps track of:
+
+    * request counts, per host and per query type
+    * response status codes, per host
+    * bytes sent and received, per host
+    * requests which raised an error, per host
+    * request latency histograms, per host
+
+    Memory use is fixed per host and query type.
+
+    Parameters
+    ----------
+    buckets: ~typing.Sequence[float]
+        The upper bounds (in seconds) of the latency histogram buckets.
+
+    Example
+    -------
+
+    >>> metrics = snug.MetricsCollector()
+    >>> exec = snug.executor(hooks=[metrics])
+    >>> exec(some_query)
+    >>> metrics.snapshot()
+    {'hosts': {'api.github.com': {'requests': 1, ...}}, 'queries': {...}}
+    >>> print(metrics.to_prometheus())
+    # TYPE snug_requests_total counter
+    snug_requests_total{host="api.github.com"} 1
+    ...
+    """
+
+    __slots__ = "buckets", "_hosts", "_queries", "_pending", "_lock"
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._hosts = {}
+        self._queries = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _host_metrics(self, host):
+        try:
+            return self._hosts[host]
+        except KeyError:
+            return self._hosts.setdefault(
+                host, _HostMetrics(len(self.buckets))
+            )
+
+    def request_sent(self, query, request, time):
+        host = _host(request.url)
+        name = _query_name(query)
+        with self._lock:
+            metrics = self._host_metrics(host)
+            metrics.requests += 1
+            metrics.bytes_sent += _size(request.content)
+            self._queries[name] = self._queries.get(name, 0) + 1
+            # the same request object may be sent concurrently
+            self._pending.setdefault(id(request), []).append(
+                (time, query, host)
+            )
+
+    def response_received(self, query, request, response, time):
+        with self._lock:
+            pending = self._pending.get(id(request))
+            if not pending:  # the request was sent before the hook was used
+                return
+            start, _, host = pending.pop(0)
+            if not pending:
+                del self._pending[id(request)]
+            metrics = self._host_metrics(host)
+            status = getattr(response, "status_code", None)
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.bytes_received += _size(getattr(response, "content", None))
+            latency = time - start
+            metrics.bucket_counts[bisect_left(self.buckets, latency)] += 1
+            metrics.latency_sum += latency
+
+    def query_end(self, query, time, error):
+        if error is None:
+            return
+        # requests of the query which did not receive a response
+        with self._lock:
+            for key, pending in list(self._pending.items()):
+                remaining = []
+                for entry in pending:
+                    if entry[1] is query:
+                        self._host_metrics(entry[2]).errors += 1
+                    else:
+                        remaining.append(entry)
+                if remaining:
+                    self._pending[key] = remaining
+                else:
+                    del self._pending[key]
+
+    def reset(self):
+        """Clear all collected metrics"""
+        with self._lock:
+            self._hosts.clear()
+            self._queries.clear()
+
+    def snapshot(self):
+        """The collected metrics, as a dictionary
+
+        Returns
+        -------
+        dict
+            The metrics, with latencies in seconds.
+            Latency buckets are cumulative,
+            keyed by their upper bound.
+        """
+        with self._lock:
+            return {
+                "hosts": {
+                    host: {
+                        "requests": m.requests,
+                        "errors": m.errors,
+                        "statuses": dict(m.statuses),
+                        "bytes_sent": m.bytes_sent,
+                        "bytes_received": m.bytes_received,
+                        "latency": {
+                            "buckets": dict(
+                                zip(
+                                    self.buckets + (float("inf"),),
+                                    _cumulative(m.bucket_counts),
+                                )
+                            ),
+                            "sum": m.latency_sum,
+                            "count": sum(m.bucket_counts),
+                        },
+                    }
+                    for host, m in self._hosts.items()
+                },
+                "queries": {
+                    name: {"requests": count}
+                    for name, count in self._queries.items()
+                },
+            }
+
+    def to_prometheus(self, prefix="snug"):
+        """The collected metrics, in the Prometheus text format
+
+        Parameters
+        ----------
+        prefix: str
+            Prefix for the metric names
+
+        Returns
+        -------
+        str
+            The metrics in Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        hosts = sorted(snapshot["hosts"].items())
+        lines = []
+
+        def metric(name, kind, samples):
+            name = prefix + "_" + name
+            lines.append("# TYPE {} {}".format(name, kind))
+            for suffix, labels, value in samples:
+                lines.append(
+                    "{}{}{{{}}} {}".format(
+                        name,
+                        suffix,
+                        ",".join(
+                            '{}="{}"'.format(k, _escape(v)) for k, v in labels
+                        ),
+                        _format_value(value),
+                    )
+                )
+
+        for key, name in [
+            ("requests", "requests_total"),
+            ("errors", "request_errors_total"),
+            ("bytes_sent", "request_bytes_total"),
+            ("bytes_received", "response_bytes_total"),
+        ]:
+            metric(
+                name,
+                "counter",
+                [("", [("host", host)], m[key]) for host, m in hosts],
+            )
+        metric(
+            "responses_total",
+            "counter",
+            [
+                ("", [("host", host), ("status", status)], count)
+                for host, m in hosts
+                for status, count in sorted(
+                    m["statuses"].items(), key=lambda i: str(i[0])
+                )
+            ],
+        )
+        metric(
+            "query_requests_total",
+            "counter",
+            [
+                ("", [("query", name)], m["requests"])
+                for name, m in sorted(snapshot["queries"].items())
+            ],
+        )
+        metric(
+            "request_duration_seconds",
+            "histogram",
+            [
+                ("_bucket", [("host", host), ("le", bound)], count)
+                for host, m in hosts
+                for bound, count in m["latency"]["buckets"].items()
+            ]
+            + [
+                (suffix, [("host", host)], m["latency"][key])
+                for host, m in hosts
+                for suffix, key in [("_sum", "sum"), ("_count", "count")]
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+
+def _cumulative(counts):
+    total = 0
+    result = []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+def _escape(value):
+    if isinstance(value, float):
+        return _format_value(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
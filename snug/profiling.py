@@ -0,0 +1,397 @@
+"""Profiling of query execution
+
+.. versionadded:: 2.2
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+from ._util import _host, _query_name, _size
+from .hooks import Hook
+from .query import execute, execute_async
+
+__all__ = [
+    "Profiler",
+    "QueryProfile",
+    "ProfileStep",
+    "profile",
+    "profile_async",
+]
+
+#: the number of ended query profiles which child queries
+#: executed later (e.g. pages) are attached to
+MAX_ENDED_PROFILES = 1024
+
+
+class ProfileStep(
+    namedtuple(
+        "ProfileStep",
+        "kind start end request bytes_sent bytes_received status",
+    )
+):
+    """A step in the execution of a query: either time spent
+    in the query's generator, or time spent sending a request.
+
+    Attributes
+    ----------
+    kind: str
+        ``"generator"`` or ``"send"``
+    start: float
+        Timestamp of the start of the step
+    end: float
+        Timestamp of the end of the step
+    request: ~snug.http.Request or None
+        The request sent (only for ``"send"`` steps)
+    bytes_sent: int
+        The size of the request content
+    bytes_received: int
+        The size of the response content
+    status: int or None
+        The response status code (only for ``"send"`` steps)
+    """
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        """The duration of the step, in seconds"""
+        return self.end - self.start
+
+
+class QueryProfile(object):
+    """The profile of a single query execution.
+
+    Attributes
+    ----------
+    query: ~snug.query.Query
+        The executed query
+    start: float
+        Timestamp of the start of the execution
+    end: float or None
+        Timestamp of the end of the execution,
+        or ``None`` if it hasn't finished.
+    error: BaseException or None
+        The exception raised by the query, if any
+    steps: ~typing.List[ProfileStep]
+        The steps of the execution, in order of completion
+    children: ~typing.List[QueryProfile]
+        Profiles of the queries executed by this query
+        (e.g. the pages of a :class:`~snug.pagination.paginated` query)
+    """
+
+    __slots__ = "query", "start", "end", "error", "steps", "children"
+
+    def __init__(self, query, start):
+        self.query = query
+        self.start = start
+        self.end = None
+        self.error = None
+        self.steps = []
+        self.children = []
+
+    @property
+    def name(self):
+        """The name of the query"""
+        return _query_name(self.query)
+
+    @property
+    def duration(self):
+        """The duration of the execution, in seconds.
+        Doesn't include child queries executed after this query ended
+        (e.g. pages of a :class:`~snug.pagination.paginated` query)."""
+        return None if self.end is None else self.end - self.start
+
+    def _total(self, kind):
+        return sum(s.duration for s in self.steps if s.kind == kind)
+
+    @property
+    def send_time(self):
+        """Total time spent sending requests, in seconds"""
+        return self._total("send")
+
+    @property
+    def generator_time(self):
+        """Total time spent in the query's generator, in seconds"""
+        return self._total("generator")
+
+    @property
+    def bytes_sent(self):
+        """Total size of the request contents"""
+        return sum(s.bytes_sent for s in self.steps)
+
+    @property
+    def bytes_received(self):
+        """Total size of the response contents"""
+        return sum(s.bytes_received for s in self.steps)
+
+    @property
+    def step_count(self):
+        """The number of requests sent"""
+        return sum(1 for s in self.steps if s.kind == "send")
+
+    def as_dict(self):
+        """A breakdown of the profile as a (JSON-serializable) dict,
+        with child queries aggregated in ``"total"``.
+
+        Returns
+        -------
+        dict
+            The breakdown, with times in seconds
+        """
+        children = [c.as_dict() for c in self.children]
+        own = {
+            "duration": self.duration,
+            "send_time": self.send_time,
+            "generator_time": self.generator_time,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "steps": self.step_count,
+        }
+        total = dict(own)
+        for child in children:
+            for key in total:
+                if key != "duration":
+                    total[key] += child["total"][key]
+        return {
+            "query": self.name,
+            "error": None if self.error is None else repr(self.error),
+            "own": own,
+            "total": total,
+            "sends": [
+                {
+                    "request": "{} {}".format(s.request.method, s.request.url),
+                    "status": s.status,
+                    "duration": s.duration,
+                    "bytes_sent": s.bytes_sent,
+                    "bytes_received": s.bytes_received,
+                }
+                for s in self.steps
+                if s.kind == "send"
+            ],
+            "children": children,
+        }
+
+    def folded(self, _prefix=""):
+        """The profile in the "folded stacks" format,
+        as used by flame graph tools (e.g. ``flamegraph.pl``, speedscope).
+
+        Each line is a stack of frames separated by ``;``,
+        followed by the time spent in microseconds.
+        Child queries appear as nested frames.
+
+        Returns
+        -------
+        str
+            The profile as folded stacks
+        """
+        stack = _prefix + _frame(self.name)
+        lines = []
+        for step in self.steps:
+            frame = (
+                "send " + _host(step.request.url)
+                if step.kind == "send"
+                else "generator"
+            )
+            lines.append((stack + ";" + frame, step.duration))
+        if self.duration is not None:
+            other = self.duration - self.send_time - self.generator_time
+            lines.append((stack, other))
+        folded = [
+            "{} {}".format(frames, int(round(duration * 1e6)))
+            for frames, duration in lines
+            if duration > 0
+        ]
+        folded.extend(c.folded(stack + ";") for c in self.children)
+        return "\n".join(filter(None, folded))
+
+    def __repr__(self):
+        return "<QueryProfile: {} ({} steps)>".format(
+            self.name, self.step_count
+        )
+
+
+def _frame(name):
+    return name.replace(";", ":")
+
+
+def _pop(pending, key):
+    """remove the oldest of the values of a key, if any"""
+    values = pending.get(key)
+    if not values:
+        return None
+    value = values.pop(0)
+    if not values:
+        del pending[key]
+    return value
+
+
+class Profiler(Hook):
+    """A :class:`~snug.hooks.Hook` which records
+    a :class:`QueryProfile` of each execution.
+
+    Attributes
+    ----------
+    profiles: ~typing.List[QueryProfile]
+        Profiles of the top-level queries.
+        The profiles of nested queries are found in
+        :attr:`QueryProfile.children`.
+
+    Example
+    -------
+
+    >>> profiler = snug.Profiler()
+    >>> snug.execute(my_query, hooks=[profiler])
+    >>> profiler.profiles[0].as_dict()
+    {'query': 'my_query', 'own': {'duration': 0.4, 'send_time': 0.39, ...}}
+    >>> with open('query.folded', 'w') as f:
+    ...     f.write(profiler.folded())
+    """
+
+    __slots__ = (
+        "profiles",
+        "_running",
+        "_ended",
+        "_resumed",
+        "_sending",
+        "_lock",
+    )
+
+    def __init__(self):
+        self.profiles = []
+        # profiles of executing queries, by query id.
+        # The same query object may be executed concurrently.
+        self._running = {}
+        # recently ended profiles, to be found by child queries
+        # executed after their parent (e.g. pages of a paginated query)
+        self._ended = OrderedDict()
+        self._resumed = {}
+        self._sending = {}
+        self._lock = threading.Lock()
+
+    def _profile(self, query):
+        """the profile of the oldest running execution of a query"""
+        running = self._running.get(id(query))
+        return running[0] if running else None
+
+    def query_start(self, query, time, parent):
+        profile = QueryProfile(query, time)
+        with self._lock:
+            parent_profile = (
+                None
+                if parent is None
+                else self._profile(parent) or self._ended.get(id(parent))
+            )
+            if parent_profile is None:
+                self.profiles.append(profile)
+            else:
+                parent_profile.children.append(profile)
+            self._running.setdefault(id(query), []).append(profile)
+
+    def query_end(self, query, time, error):
+        key = id(query)
+        with self._lock:
+            profile = _pop(self._running, key)
+            if profile is None:
+                return
+            profile.end, profile.error = time, error
+            # the profile refers to the query, so its id is not reused
+            # while the entry exists
+            self._ended.pop(key, None)
+            self._ended[key] = profile
+            if len(self._ended) > MAX_ENDED_PROFILES:
+                self._ended.popitem(last=False)
+            if error is not None and key not in self._running:
+                # steps interrupted by the error
+                self._resumed.pop(key, None)
+                for pending in [k for k in self._sending if k[0] == key]:
+                    del self._sending[pending]
+
+    def generator_resume(self, query, time):
+        with self._lock:
+            self._resumed.setdefault(id(query), []).append(time)
+
+    def generator_return(self, query, time):
+        with self._lock:
+            start = _pop(self._resumed, id(query))
+            profile = self._profile(query)
+            if start is not None and profile is not None:
+                profile.steps.append(
+                    ProfileStep("generator", start, time, None, 0, 0, None)
+                )
+
+    def request_sent(self, query, request, time):
+        with self._lock:
+            self._sending.setdefault((id(query), id(request)), []).append(time)
+
+    def response_received(self, query, request, response, time):
+        with self._lock:
+            start = _pop(self._sending, (id(query), id(request)))
+            profile = self._profile(query)
+            if start is None or profile is None:
+                return
+            profile.steps.append(
+                ProfileStep(
+                    "send",
+                    start,
+                    time,
+                    request,
+                    _size(request.content),
+                    _size(getattr(response, "content", None)),
+                    getattr(response, "status_code", None),
+                )
+            )
+
+    def folded(self):
+        """All recorded profiles in the "folded stacks" format.
+        See :meth:`QueryProfile.folded`.
+
+        Returns
+        -------
+        str
+            The profiles as folded stacks
+        """
+        return "\n".join(p.folded() for p in self.profiles) + "\n"
+
+
+def profile(query, **kwargs):
+    """Execute a query while profiling it
+
+    Parameters
+    ----------
+    query: ~snug.query.Query[T]
+        The query to execute
+    **kwargs
+        Arguments to pass to :func:`~snug.query.execute`
+
+    Returns
+    -------
+    ~typing.Tuple[T, QueryProfile]
+        The query result and its profile
+    """
+    profiler = Profiler()
+    kwargs["hooks"] = tuple(kwargs.get("hooks", ())) + (profiler,)
+    result = execute(query, **kwargs)
+    return result, profiler.profiles[0]
+
+
+async def profile_async(query, **kwargs):
+    """Execute a query asynchronously while profiling it
+
+    Parameters
+    ----------
+    query: ~snug.query.Query[T]
+        The query to execute
+    **kwargs
+        Arguments to pass to :func:`~snug.query.execute_async`
+
+    Returns
+    -------
+    ~typing.Tuple[T, QueryProfile]
+        The query result and its profile
+    """
+    profiler = Profiler()
+    kwargs["hooks"] = tuple(kwargs.get("hooks", ())) + (profiler,)
+    result = execute_async(query, **kwargs)
+    if hasattr(result, "__await__"):
+        result = await result
+    return result, profiler.profiles[0]
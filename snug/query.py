@@ -1,11 +1,11 @@
 """Types and functionality relating to queries"""
-import asyncio
 import typing as t
-import urllib.request
-from functools import partial
+from collections import namedtuple
+from functools import lru_cache, partial
+from time import perf_counter
 
-from .clients import send, send_async
-from .http import basic_auth
+from .clients import _dispatch, send, send_async
+from .http import Request, basic_auth
 
 __all__ = [
     "Query",
@@ -13,11 +13,19 @@ __all__ = [
     "execute_async",
     "executor",
     "async_executor",
+    "Executor",
+    "AsyncExecutor",
+    "gather",
     "related",
+    "prefetch",
+    "Prefetched",
 ]
 
 T = t.TypeVar("T")
 
+#: the default maximum number of threads used to resolve a :class:`gather`
+DEFAULT_MAX_WORKERS = 16
+
 
 def _identity(obj):
     return obj
@@ -140,7 +148,13 @@ class Query(t.Generic[T]):
         gen = iter(self)
         request = next(gen)
         while True:
-            response = send(client, auth(request))
+            if type(request) is gather:
+                response = request._resolve(
+                    lambda r: send(client, auth(r)),
+                    partial(execute, auth=auth, client=client),
+                )
+            else:
+                response = send(client, auth(request))
             try:
                 request = gen.send(response)
             except StopIteration as e:
@@ -174,13 +188,113 @@ class Query(t.Generic[T]):
         gen = iter(self)
         request = next(gen)
         while True:
-            response = await send_async(client, auth(request))
+            if type(request) is gather:
+                response = await request._resolve_async(
+                    lambda r: send_async(client, auth(r)),
+                    partial(execute_async, auth=auth, client=client),
+                )
+            else:
+                response = await send_async(client, auth(request))
             try:
                 request = gen.send(response)
             except StopIteration as e:
                 return e.value
 
 
+class gather(object):
+    """A batch of requests and queries, to be resolved concurrently.
+    A query may yield a :class:`gather` instead of a single
+    :class:`~snug.http.Request`. It is then sent a tuple of
+    the responses and query results, in the same order.
+
+    Requests are sent concurrently: with :mod:`asyncio` tasks
+    when executing asynchronously, and with a thread pool otherwise.
+    Queries in the batch are executed with the same client
+    and authentication.
+
+    .. versionadded:: 2.2
+
+    Note
+    ----
+    When executing synchronously, the client is used from multiple threads.
+    Make sure it is thread-safe, or pass ``max_workers=1``.
+
+    Parameters
+    ----------
+    *items: Request or Query
+        The requests to send and queries to execute.
+        Objects implementing :meth:`~object.__iter__` are
+        executed as queries, other objects are sent as requests.
+    max_workers: int or None
+        The maximum number of threads used to resolve the batch
+        when executing synchronously.
+        By default, at most 16 threads (``DEFAULT_MAX_WORKERS``).
+
+    Example
+    -------
+
+    >>> def issues_with_comments(repo):
+    ...     response = yield snug.GET(f'{repo}/issues')
+    ...     issues = json.loads(response.content)
+    ...     responses = yield snug.gather(*(
+    ...         snug.GET(issue['comments_url']) for issue in issues))
+    ...     return [(issue, json.loads(r.content))
+    ...             for issue, r in zip(issues, responses)]
+    """
+
+    __slots__ = "items", "max_workers"
+
+    def __init__(self, *items, max_workers=None):
+        self.items = items
+        self.max_workers = max_workers
+
+    def _resolve(self, send_request, execute_query):
+        """resolve the items with the given (blocking) callables"""
+        items = self.items
+        resolve = partial(_resolve_item, send_request, execute_query)
+        if len(items) < 2 or self.max_workers == 1:
+            return tuple(map(resolve, items))
+        from concurrent.futures import ThreadPoolExecutor
+
+        # a pool per gather: items may block on nested gathers,
+        # which would deadlock a shared, bounded pool
+        with ThreadPoolExecutor(
+            min(len(items), self.max_workers or DEFAULT_MAX_WORKERS)
+        ) as pool:
+            return tuple(pool.map(resolve, items))
+
+    async def _resolve_async(self, send_request, execute_query):
+        """resolve the items with the given (awaitable-returning) callables"""
+        import asyncio
+
+        return tuple(
+            await asyncio.gather(
+                *(
+                    _maybe_await(
+                        _resolve_item(send_request, execute_query, item)
+                    )
+                    for item in self.items
+                )
+            )
+        )
+
+    def __repr__(self):
+        return "gather({})".format(", ".join(map(repr, self.items)))
+
+
+def _is_query(obj):
+    return not isinstance(obj, Request) and hasattr(type(obj), "__iter__")
+
+
+def _resolve_item(send_request, execute_query, item):
+    return execute_query(item) if _is_query(item) else send_request(item)
+
+
+async def _maybe_await(obj):
+    # e.g. the async iterator of a paginated query is not awaitable
+    return (await obj) if hasattr(obj, "__await__") else obj
+
+
 class related(object):
     """Decorate classes to make them callable as methods.
     This can be used to implement related queries
@@ -210,6 +324,98 @@ class related(object):
         return self._cls if obj is None else partial(self._cls, obj)
 
 
+class Prefetched(namedtuple("Prefetched", "result related")):
+    """The result of a :class:`prefetch` query
+
+    .. versionadded:: 2.2
+
+    Attributes
+    ----------
+    result
+        The result of the main query
+    related: ~typing.Dict[str, ~typing.Any]
+        The results of the related queries, by name.
+        A list of results if multiple queries were given.
+    """
+
+    __slots__ = ()
+
+
+class prefetch(Query[Prefetched]):
+    """A query which executes another query along with related queries.
+
+    Once the main query is resolved, all related queries are
+    executed concurrently (see :class:`gather`).
+    Related queries may themselves be :class:`prefetch` queries,
+    to load a graph of related resources.
+
+    .. versionadded:: 2.2
+
+    Parameters
+    ----------
+    query: Query[T]
+        The main query
+    *names: str
+        Names of related queries to execute,
+        called without arguments (see :class:`related`)
+    **related: ~typing.Callable[[Query[T], T], Query]
+        Callables returning a related query (or a list of queries,
+        or ``None``) from the main query and its result.
+
+    Example
+    -------
+
+    >>> # a repo, its issues, and the comments on each issue
+    >>> snug.execute(snug.prefetch(
+    ...     repo('Hello-World', owner='octocat'),
+    ...     issues=lambda repo, _: snug.prefetch(
+    ...         repo.issues(),
+    ...         comments=lambda _, issues: [
+    ...             repo.issue(i.number).comments() for i in issues
+    ...         ],
+    ...     ),
+    ... ))
+    Prefetched(result=Repo(...), related={'issues': Prefetched(...)})
+    """
+
+    __slots__ = "query", "related"
+
+    def __init__(self, query, *names, **related):
+        self.query = query
+        self.related = dict(
+            {name: partial(_call_related, name) for name in names}, **related
+        )
+
+    def __iter__(self):
+        (result,) = yield gather(self.query)
+        groups = {}
+        queries = []
+        for name, get in self.related.items():
+            related = get(self.query, result)
+            if isinstance(related, list):
+                groups[name] = slice(len(queries), len(queries) + len(related))
+                queries.extend(related)
+            elif related is not None:
+                groups[name] = len(queries)
+                queries.append(related)
+            else:
+                groups[name] = None
+        results = (yield gather(*queries)) if queries else ()
+        for name, index in groups.items():
+            if isinstance(index, slice):
+                groups[name] = list(results[index])
+            elif index is not None:
+                groups[name] = results[index]
+        return Prefetched(result, groups)
+
+    def __repr__(self):
+        return "prefetch({!r}, {})".format(self.query, ", ".join(self.related))
+
+
+def _call_related(name, query, result):
+    return getattr(query, name)()
+
+
 def _make_auth(auth):
     if auth is None:
         return _identity
@@ -219,7 +425,16 @@ def _make_auth(auth):
         return basic_auth(auth)
 
 
-def execute(query, auth=None, client=urllib.request.build_opener()):
+@lru_cache(maxsize=None)
+def _default_client():
+    import urllib.request
+
+    from ._unix import UnixSocketHandler
+
+    return urllib.request.build_opener(UnixSocketHandler())
+
+
+def execute(query, auth=None, client=None, hooks=()):
     """Execute a query, returning its result
 
     Parameters
@@ -238,17 +453,27 @@ def execute(query, auth=None, client=urllib.request.build_opener()):
         Its type must have been registered
         with :func:`~snug.clients.send`.
         If not given, the built-in :mod:`urllib` module is used.
+    hooks: ~typing.Iterable[~snug.hooks.Hook]
+        Hooks to observe the execution.
+
+        .. versionadded:: 2.2
 
     Returns
     -------
     T
         the query result
     """
+    if hooks or isinstance(auth, _HookedAuth):
+        return Executor(auth=auth, client=client, hooks=hooks)(query)
     exec_fn = getattr(type(query), "__execute__", Query.__execute__)
-    return exec_fn(query, client, _make_auth(auth))
+    return exec_fn(
+        query,
+        _default_client() if client is None else client,
+        _make_auth(auth),
+    )
 
 
-def execute_async(query, auth=None, client=None):
+def execute_async(query, auth=None, client=None, hooks=()):
     """Execute a query asynchronously, returning its result
 
     Parameters
@@ -267,6 +492,10 @@ def execute_async(query, auth=None, client=None):
         Its type must have been registered
         with :func:`~snug.clients.send_async`.
         If not given, the current event loop from :mod:`asyncio` is used.
+    hooks: ~typing.Iterable[~snug.hooks.Hook]
+        Hooks to observe the execution.
+
+        .. versionadded:: 2.2
 
     Returns
     -------
@@ -278,17 +507,429 @@ def execute_async(query, auth=None, client=None):
     The default client is very rudimentary.
     Consider using a :class:`aiohttp.ClientSession` instance as ``client``.
     """
+    import asyncio
+
+    if client is None:
+        client = asyncio.get_event_loop()
+    if hooks or isinstance(auth, _HookedAuth):
+        return AsyncExecutor(auth=auth, client=client, hooks=hooks)(query)
     exc_fn = getattr(type(query), "__execute_async__", Query.__execute_async__)
-    return exc_fn(
-        query,
-        asyncio.get_event_loop() if client is None else client,
-        _make_auth(auth),
+    return exc_fn(query, client, _make_auth(auth))
+
+
+class _HookedAuth(object):
+    """An authentication callable which carries hooks along.
+    Passed to custom :meth:`~Query.__execute__` implementations,
+    so that executors they create inherit the hooks,
+    and report the query as the parent of the queries they execute."""
+
+    __slots__ = "auth", "hooks", "parent"
+
+    def __init__(self, auth, hooks, parent):
+        self.auth, self.hooks, self.parent = auth, hooks, parent
+
+    def __call__(self, request):
+        return self.auth(request)
+
+
+def _resolve_auth(auth, hooks):
+    """the authentication callable, hooks and parent query to use"""
+    hooks = tuple(hooks)
+    if isinstance(auth, _HookedAuth):
+        return auth.auth, auth.hooks + hooks, auth.parent
+    return _make_auth(auth), hooks, None
+
+
+def _emit(hooks, event, *args):
+    for hook in hooks:
+        getattr(hook, event)(*args)
+
+
+class Executor(object):
+    """A compiled version of :func:`execute` with bound arguments.
+    The authentication callable and the client's
+    :func:`~snug.clients.send` implementation are resolved once,
+    as is the execution logic for each query type.
+
+    Usually created with :func:`executor`.
+
+    .. versionadded:: 2.2
+
+    Note
+    ----
+    Client types registered with :func:`~snug.clients.send`
+    after the executor was created are not taken into account.
+
+    Parameters
+    ----------
+    auth
+        The authentication, see :func:`execute`
+    client
+        The HTTP client, see :func:`execute`
+    hooks: ~typing.Iterable[~snug.hooks.Hook]
+        Hooks to observe the execution
+    """
+
+    __slots__ = (
+        "keywords",
+        "_client",
+        "_auth",
+        "_hooks",
+        "_parent",
+        "_send",
+        "_strategies",
+    )
+
+    def __init__(self, auth=None, client=None, hooks=()):
+        self.keywords = _keywords(auth, client, hooks)
+        self._client = _default_client() if client is None else client
+        self._auth, self._hooks, self._parent = _resolve_auth(auth, hooks)
+        self._send = _dispatch(send, type(self._client))
+        self._strategies = {}
+
+    def __call__(self, query, **kwargs):
+        """Execute a query, returning its result
+
+        Parameters
+        ----------
+        query: Query[T]
+            The query to resolve
+        **kwargs
+            arguments to override, see :func:`execute`
+
+        Returns
+        -------
+        T
+            the query result
+        """
+        if kwargs:
+            return execute(query, **_merge(self.keywords, kwargs))
+        try:
+            strategy = self._strategies[type(query)]
+        except KeyError:
+            strategy = self._strategies[type(query)] = self._compile(
+                type(query)
+            )
+        return strategy(query)
+
+    def _compile(self, querytype):
+        exec_fn = getattr(querytype, "__execute__", Query.__execute__)
+        if exec_fn is Query.__execute__:
+            return self._run_hooked if self._hooks else self._run
+        elif self._hooks:
+            return partial(
+                _call_hooked,
+                exec_fn,
+                self._client,
+                self._auth,
+                self._hooks,
+                self._parent,
+            )
+        return partial(_call_with, exec_fn, self._client, self._auth)
+
+    def _run(self, query):
+        send_, client, auth = self._send, self._client, self._auth
+        gen = iter(query)
+        request = next(gen)
+        while True:
+            if type(request) is gather:
+                response = request._resolve(
+                    lambda r: send_(client, auth(r)), self
+                )
+            else:
+                response = send_(client, auth(request))
+            try:
+                request = gen.send(response)
+            except StopIteration as e:
+                return e.value
+
+    def _run_hooked(self, query):
+        send_, client, auth = self._send, self._client, self._auth
+        hooks = self._hooks
+        _emit(hooks, "query_start", query, perf_counter(), self._parent)
+        try:
+            gen = iter(query)
+            _emit(hooks, "generator_resume", query, perf_counter())
+            try:
+                request = next(gen)
+            finally:
+                _emit(hooks, "generator_return", query, perf_counter())
+            send_hooked = partial(
+                _send_hooked, send_, client, auth, hooks, query
+            )
+            while True:
+                if type(request) is gather:
+                    response = request._resolve(
+                        send_hooked, self._nested(query)
+                    )
+                else:
+                    response = send_hooked(request)
+                _emit(hooks, "generator_resume", query, perf_counter())
+                try:
+                    request = gen.send(response)
+                except StopIteration as e:
+                    result = e.value
+                    break
+                finally:
+                    _emit(hooks, "generator_return", query, perf_counter())
+        except BaseException as e:
+            _emit(hooks, "query_end", query, perf_counter(), e)
+            raise
+        _emit(hooks, "query_end", query, perf_counter(), None)
+        return result
+
+    def _nested(self, parent):
+        """an executor for queries executed by the given query"""
+        return Executor(
+            client=self._client,
+            auth=_HookedAuth(self._auth, self._hooks, parent),
+        )
+
+
+class AsyncExecutor(object):
+    """A compiled version of :func:`execute_async` with bound arguments.
+    The authentication callable and the client's
+    :func:`~snug.clients.send_async` implementation are resolved once,
+    as is the execution logic for each query type.
+
+    Usually created with :func:`async_executor`.
+
+    .. versionadded:: 2.2
+
+    Note
+    ----
+    Client types registered with :func:`~snug.clients.send_async`
+    after the executor was created are not taken into account.
+    Without a ``client``, the current event loop is used:
+    the executor is compiled when first used in an event loop.
+
+    Parameters
+    ----------
+    auth
+        The authentication, see :func:`execute_async`
+    client
+        The HTTP client, see :func:`execute_async`
+    hooks: ~typing.Iterable[~snug.hooks.Hook]
+        Hooks to observe the execution
+    """
+
+    __slots__ = (
+        "keywords",
+        "_client",
+        "_auth",
+        "_hooks",
+        "_parent",
+        "_send",
+        "_strategies",
+        "_bound",
     )
 
+    def __init__(self, auth=None, client=None, hooks=()):
+        self.keywords = _keywords(auth, client, hooks)
+        self._client = client
+        self._auth, self._hooks, self._parent = _resolve_auth(auth, hooks)
+        self._send = (
+            None
+            if self._client is None
+            else _dispatch(send_async, type(self._client))
+        )
+        self._strategies = {}
+        # the compiled executor for the current event loop,
+        # if no client is given
+        self._bound = None
+
+    def __call__(self, query, **kwargs):
+        """Execute a query asynchronously, returning its result
+
+        Parameters
+        ----------
+        query: Query[T]
+            The query to resolve
+        **kwargs
+            arguments to override, see :func:`execute_async`
+
+        Returns
+        -------
+        ~typing.Awaitable[T]
+            the query result
+        """
+        if kwargs:
+            return execute_async(query, **_merge(self.keywords, kwargs))
+        if self._client is None:
+            return self._loop_executor()(query)
+        try:
+            strategy = self._strategies[type(query)]
+        except KeyError:
+            strategy = self._strategies[type(query)] = self._compile(
+                type(query)
+            )
+        return strategy(query)
+
+    def _loop_executor(self):
+        """the executor using the current event loop as client"""
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        bound = self._bound
+        if bound is None or bound._client is not loop:
+            bound = self._bound = AsyncExecutor(client=loop, **self.keywords)
+        return bound
+
+    def _compile(self, querytype):
+        exec_fn = getattr(
+            querytype, "__execute_async__", Query.__execute_async__
+        )
+        if exec_fn is Query.__execute_async__:
+            return self._run_hooked if self._hooks else self._run
+        elif self._hooks:
+            return partial(
+                _call_hooked_async,
+                exec_fn,
+                self._client,
+                self._auth,
+                self._hooks,
+                self._parent,
+            )
+        return partial(_call_with, exec_fn, self._client, self._auth)
+
+    async def _run(self, query):
+        send_, client, auth = self._send, self._client, self._auth
+        gen = iter(query)
+        request = next(gen)
+        while True:
+            if type(request) is gather:
+                response = await request._resolve_async(
+                    lambda r: send_(client, auth(r)), self
+                )
+            else:
+                response = await send_(client, auth(request))
+            try:
+                request = gen.send(response)
+            except StopIteration as e:
+                return e.value
+
+    async def _run_hooked(self, query):
+        send_, client, auth = self._send, self._client, self._auth
+        hooks = self._hooks
+        _emit(hooks, "query_start", query, perf_counter(), self._parent)
+        try:
+            gen = iter(query)
+            _emit(hooks, "generator_resume", query, perf_counter())
+            try:
+                request = next(gen)
+            finally:
+                _emit(hooks, "generator_return", query, perf_counter())
+            send_hooked = partial(
+                _send_hooked_async, send_, client, auth, hooks, query
+            )
+            while True:
+                if type(request) is gather:
+                    response = await request._resolve_async(
+                        send_hooked, self._nested(query)
+                    )
+                else:
+                    response = await send_hooked(request)
+                _emit(hooks, "generator_resume", query, perf_counter())
+                try:
+                    request = gen.send(response)
+                except StopIteration as e:
+                    result = e.value
+                    break
+                finally:
+                    _emit(hooks, "generator_return", query, perf_counter())
+        except BaseException as e:
+            _emit(hooks, "query_end", query, perf_counter(), e)
+            raise
+        _emit(hooks, "query_end", query, perf_counter(), None)
+        return result
+
+    def _nested(self, parent):
+        """an executor for queries executed by the given query"""
+        return AsyncExecutor(
+            client=self._client,
+            auth=_HookedAuth(self._auth, self._hooks, parent),
+        )
+
+
+def _send_hooked(send_, client, auth, hooks, query, request):
+    request = auth(request)
+    _emit(hooks, "request_sent", query, request, perf_counter())
+    response = send_(client, request)
+    _emit(hooks, "response_received", query, request, response, perf_counter())
+    return response
+
+
+async def _send_hooked_async(send_, client, auth, hooks, query, request):
+    request = auth(request)
+    _emit(hooks, "request_sent", query, request, perf_counter())
+    response = await send_(client, request)
+    _emit(hooks, "response_received", query, request, response, perf_counter())
+    return response
+
+
+def _call_with(exec_fn, client, auth, query):
+    return exec_fn(query, client, auth)
+
+
+def _call_hooked(exec_fn, client, auth, hooks, parent, query):
+    _emit(hooks, "query_start", query, perf_counter(), parent)
+    try:
+        result = exec_fn(query, client, _HookedAuth(auth, hooks, query))
+    except BaseException as e:
+        _emit(hooks, "query_end", query, perf_counter(), e)
+        raise
+    _emit(hooks, "query_end", query, perf_counter(), None)
+    return result
+
+
+def _call_hooked_async(exec_fn, client, auth, hooks, parent, query):
+    _emit(hooks, "query_start", query, perf_counter(), parent)
+    try:
+        result = exec_fn(query, client, _HookedAuth(auth, hooks, query))
+    except BaseException as e:
+        _emit(hooks, "query_end", query, perf_counter(), e)
+        raise
+    if hasattr(result, "__await__"):
+        return _await_hooked(result, hooks, query)
+    # e.g. an async iterator, which does not need to be awaited
+    _emit(hooks, "query_end", query, perf_counter(), None)
+    return result
+
+
+async def _await_hooked(awaitable, hooks, query):
+    try:
+        result = await awaitable
+    except BaseException as e:
+        _emit(hooks, "query_end", query, perf_counter(), e)
+        raise
+    _emit(hooks, "query_end", query, perf_counter(), None)
+    return result
+
+
+def _merge(m1, m2):
+    return dict(m1, **m2)
+
+
+def _keywords(auth, client, hooks):
+    """the arguments given to an executor, for overriding them"""
+    given = {}
+    if auth is not None:
+        given["auth"] = auth
+    if client is not None:
+        given["client"] = client
+    if hooks:
+        given["hooks"] = hooks
+    return given
+
 
 def executor(**kwargs):
     """Create a version of :func:`execute` with bound arguments.
 
+    .. versionchanged:: 2.2
+
+       Returns an :class:`Executor` instead of a
+       :func:`~functools.partial`.
+
     Parameters
     ----------
     **kwargs
@@ -296,15 +937,20 @@ def executor(**kwargs):
 
     Returns
     -------
-    ~typing.Callable[[Query[T]], T]
+    Executor
         an :func:`execute`-like function
     """
-    return partial(execute, **kwargs)
+    return Executor(**kwargs)
 
 
 def async_executor(**kwargs):
     """Create a version of :func:`execute_async` with bound arguments.
 
+    .. versionchanged:: 2.2
+
+       Returns an :class:`AsyncExecutor` instead of a
+       :func:`~functools.partial`.
+
     Parameters
     ----------
     **kwargs
@@ -312,7 +958,7 @@ def async_executor(**kwargs):
 
     Returns
     -------
-    ~typing.Callable[[Query[T]], ~typing.Awaitable[T]]
+    AsyncExecutor
         an :func:`execute_async`-like function
     """
-    return partial(execute_async, **kwargs)
+    return AsyncExecutor(**kwargs)
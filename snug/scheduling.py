@@ -0,0 +1,463 @@
+"""Scheduling and limiting of asynchronous query execution
+
+.. versionadded:: 2.2
+"""
+import heapq
+from collections import deque
+from functools import partial
+from itertools import count
+from time import perf_counter
+
+from ._util import _awaitable, _host
+from .clients import send_async
+from .query import AsyncExecutor
+
+__all__ = [
+    "PriorityExecutor",
+    "LoadShedError",
+    "AdaptiveLimiter",
+    "KeyedExecutor",
+]
+
+
+class LoadShedError(Exception):
+    """Raised for queued queries which are dropped
+    because the queue of a :class:`PriorityExecutor` is full"""
+
+
+class PriorityExecutor(object):
+    """An asynchronous executor which limits the number of
+    concurrently executing queries.
+    Queries waiting for their turn are kept in a bounded priority queue.
+
+    When the queue is full, the query with the lowest priority
+    is dropped (*shed*): awaiting its result raises :class:`LoadShedError`.
+
+    Note
+    ----
+    Queries must resolve to an awaitable. Queries resolving to
+    an async iterator (e.g. :class:`~snug.pagination.paginated`)
+    send their requests while being iterated, outside the limit,
+    and are rejected with a :class:`TypeError`.
+
+    Parameters
+    ----------
+    max_concurrency: int
+        The maximum number of queries executing at the same time
+    max_queued: int
+        The maximum number of queries waiting to be executed
+    **kwargs
+        arguments to pass to :func:`~snug.query.execute_async`
+
+    Example
+    -------
+
+    >>> exec = snug.PriorityExecutor(max_concurrency=10,
+    ...                              max_queued=100,
+    ...                              client=aiohttp.ClientSession())
+    >>> # interactive requests go first
+    >>> await exec(my_query, priority=0)
+    >>> # ...background work last
+    >>> try:
+    ...     await exec(backfill_query, priority=10)
+    ... except snug.LoadShedError:
+    ...     ...
+    """
+
+    __slots__ = (
+        "max_concurrency",
+        "max_queued",
+        "_executor",
+        "_queue",
+        "_running",
+        "_counter",
+    )
+
+    def __init__(self, max_concurrency=10, max_queued=100, **kwargs):
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self._executor = AsyncExecutor(**kwargs)
+        # heap of [priority, sequence number, future] entries
+        self._queue = []
+        self._running = 0
+        self._counter = count()
+
+    @property
+    def running(self):
+        """The number of queries currently executing"""
+        return self._running
+
+    @property
+    def queued(self):
+        """The number of queries waiting to be executed"""
+        return len(self._queue)
+
+    async def __call__(self, query, priority=0):
+        """Execute a query asynchronously, returning its result
+
+        Parameters
+        ----------
+        query: ~snug.query.Query[T]
+            The query to resolve
+        priority: int or float
+            The priority of the query.
+            Queries with lower values are executed first.
+            Queries with equal priority are executed in order.
+
+        Returns
+        -------
+        T
+            the query result
+
+        Raises
+        ------
+        LoadShedError
+            If the query was dropped from the queue
+        TypeError
+            If the query does not resolve to an awaitable
+        """
+        if self._running < self.max_concurrency and not self._queue:
+            self._running += 1
+        else:
+            await self._wait(priority)
+        try:
+            return await _awaitable(self._executor(query), query)
+        finally:
+            self._release()
+
+    async def _wait(self, priority):
+        import asyncio
+
+        entry = [
+            priority,
+            next(self._counter),
+            asyncio.get_event_loop().create_future(),
+        ]
+        heapq.heappush(self._queue, entry)
+        if len(self._queue) > self.max_queued:
+            self._shed(max(self._queue))
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry in self._queue:
+                self._remove(entry)
+            elif (
+                entry[2].done()
+                and not entry[2].cancelled()
+                and entry[2].exception() is None
+            ):
+                # granted a slot just before being cancelled
+                self._release()
+            raise
+
+    def _shed(self, entry):
+        self._remove(entry)
+        entry[2].set_exception(
+            LoadShedError(
+                "queue full ({} queries), dropped query "
+                "with priority {!r}".format(self.max_queued, entry[0])
+            )
+        )
+
+    def _remove(self, entry):
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+
+    def _release(self):
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                # the slot is handed over directly
+                future.set_result(None)
+                return
+        self._running -= 1
+
+
+class KeyedExecutor(object):
+    """An asynchronous executor which executes queries with the same key
+    one at a time, in the order they were submitted.
+    Queries with different keys are executed concurrently.
+
+    Note
+    ----
+    Queries must resolve to an awaitable, as with
+    :class:`PriorityExecutor`. Others (e.g.
+    :class:`~snug.pagination.paginated`) are rejected with a
+    :class:`TypeError`.
+
+    Parameters
+    ----------
+    max_concurrency: int or None
+        The maximum number of queries executing at the same time
+        (across all keys). ``None`` means no limit.
+    **kwargs
+        arguments to pass to :func:`~snug.query.execute_async`
+
+    Example
+    -------
+
+    >>> exec = snug.KeyedExecutor(max_concurrency=20,
+    ...                           client=aiohttp.ClientSession())
+    >>> # messages are posted in order per channel
+    >>> await asyncio.gather(*(
+    ...     exec(slack.chat.post_message(channel, text), key=channel)
+    ...     for channel, text in messages
+    ... ))
+    """
+
+    __slots__ = "max_concurrency", "_executor", "_tails", "_semaphore"
+
+    def __init__(self, max_concurrency=None, **kwargs):
+        self.max_concurrency = max_concurrency
+        self._executor = AsyncExecutor(**kwargs)
+        # per key: a future which is done once its last query is finished
+        self._tails = {}
+        self._semaphore = None
+
+    @property
+    def keys(self):
+        """The keys with queries executing or waiting
+
+        Returns
+        -------
+        ~typing.Set[~typing.Hashable]
+        """
+        return set(self._tails)
+
+    async def __call__(self, query, key):
+        """Execute a query asynchronously, returning its result
+
+        Parameters
+        ----------
+        query: ~snug.query.Query[T]
+            The query to resolve
+        key: ~typing.Hashable
+            Queries with the same key are executed in order
+
+        Returns
+        -------
+        T
+            the query result
+
+        Raises
+        ------
+        TypeError
+            If the query does not resolve to an awaitable
+        """
+        import asyncio
+
+        previous = self._tails.get(key)
+        done = self._tails[key] = asyncio.get_event_loop().create_future()
+        if previous is not None:
+            try:
+                # shielded: cancelling this call must not affect the other
+                await asyncio.shield(previous)
+            except asyncio.CancelledError:
+                # later queries with the key still wait for the previous one
+                if previous.done():
+                    self._finish(key, done)
+                else:
+                    previous.add_done_callback(
+                        partial(self._finish, key, done)
+                    )
+                raise
+        try:
+            if self.max_concurrency is None:
+                return await _awaitable(self._executor(query), query)
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            async with self._semaphore:
+                return await _awaitable(self._executor(query), query)
+        finally:
+            self._finish(key, done)
+
+    def _finish(self, key, done, *_):
+        if not done.done():
+            done.set_result(None)
+        if self._tails.get(key) is done:
+            del self._tails[key]
+
+
+class _HostLimit(object):
+    __slots__ = "limit", "in_flight", "waiters", "min_latency", "decreased"
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters = deque()
+        self.min_latency = None
+        self.decreased = float("-inf")
+
+
+class AdaptiveLimiter(object):
+    """A client which limits the number of concurrent requests per host.
+    Registered with :func:`~snug.clients.send_async`.
+
+    The limits adapt to the responses, using
+    additive increase/multiplicative decrease (AIMD):
+
+    * Each successful response increases the limit by
+      ``increase / limit``: about ``increase`` per round of requests.
+    * A response with a status in ``backoff_statuses``, an error,
+      or a latency over ``latency_tolerance`` times the lowest latency
+      seen for the host, multiplies the limit by ``backoff``.
+      The limit is decreased at most once per round of requests.
+
+    Parameters
+    ----------
+    client
+        The client to send requests with.
+        Its type must be registered with :func:`~snug.clients.send_async`.
+    initial_limit: int
+        The initial concurrency limit for each host
+    min_limit: int
+        The lowest concurrency limit
+    max_limit: int
+        The highest concurrency limit
+    increase: float
+        The additive increase per round of requests
+    backoff: float
+        The multiplicative decrease factor (between 0 and 1)
+    backoff_statuses: ~typing.Collection[int]
+        Response status codes which indicate overload
+    latency_tolerance: float or None
+        The latency (as a multiple of the lowest latency seen)
+        above which the host is considered overloaded.
+        If ``None``, latency does not affect the limits.
+
+    Example
+    -------
+
+    >>> client = snug.AdaptiveLimiter(aiohttp.ClientSession(),
+    ...                               initial_limit=4, max_limit=32)
+    >>> exec = snug.async_executor(client=client)
+    >>> await asyncio.gather(*map(exec, queries))
+    >>> client.limits
+    {'api.github.com': 12}
+    """
+
+    __slots__ = (
+        "client",
+        "initial_limit",
+        "min_limit",
+        "max_limit",
+        "increase",
+        "backoff",
+        "backoff_statuses",
+        "latency_tolerance",
+        "_hosts",
+    )
+
+    def __init__(
+        self,
+        client,
+        initial_limit=4,
+        min_limit=1,
+        max_limit=64,
+        increase=1,
+        backoff=0.5,
+        backoff_statuses=(429, 503),
+        latency_tolerance=None,
+    ):
+        self.client = client
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.backoff_statuses = frozenset(backoff_statuses)
+        self.latency_tolerance = latency_tolerance
+        self._hosts = {}
+
+    @property
+    def limits(self):
+        """The current concurrency limit per host
+
+        Returns
+        -------
+        ~typing.Dict[str, int]
+        """
+        return {host: int(h.limit) for host, h in self._hosts.items()}
+
+    @property
+    def in_flight(self):
+        """The number of requests currently in progress per host
+
+        Returns
+        -------
+        ~typing.Dict[str, int]
+        """
+        return {host: h.in_flight for host, h in self._hosts.items()}
+
+    async def _acquire(self, host):
+        if host.in_flight < int(host.limit) and not host.waiters:
+            host.in_flight += 1
+            return
+        import asyncio
+
+        future = asyncio.get_event_loop().create_future()
+        host.waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # a release may have skipped it already
+                if future in host.waiters:
+                    host.waiters.remove(future)
+            else:
+                # granted a slot just before being cancelled
+                self._release(host)
+            raise
+
+    def _release(self, host):
+        host.in_flight -= 1
+        while host.waiters and host.in_flight < int(host.limit):
+            future = host.waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                host.in_flight += 1
+
+    def _adjust(self, host, start, latency, overloaded):
+        if not overloaded and self.latency_tolerance is not None:
+            if host.min_latency is None or latency < host.min_latency:
+                host.min_latency = latency
+            overloaded = latency > host.min_latency * self.latency_tolerance
+        if overloaded:
+            # requests started before the last decrease don't reflect it
+            if start > host.decreased:
+                host.limit = max(self.min_limit, host.limit * self.backoff)
+                host.decreased = perf_counter()
+        else:
+            host.limit = min(
+                self.max_limit, host.limit + self.increase / host.limit
+            )
+
+    def __repr__(self):
+        return "AdaptiveLimiter({!r})".format(self.client)
+
+
+@send_async.register(AdaptiveLimiter)
+async def _adaptive_send(limiter, request):
+    """send a request asynchronously, within the limit of its host"""
+    name = _host(request.url)
+    try:
+        host = limiter._hosts[name]
+    except KeyError:
+        host = limiter._hosts[name] = _HostLimit(limiter.initial_limit)
+    await limiter._acquire(host)
+    start = perf_counter()
+    try:
+        response = await send_async(limiter.client, request)
+    except Exception:
+        limiter._adjust(host, start, perf_counter() - start, True)
+        raise
+    else:
+        limiter._adjust(
+            host,
+            start,
+            perf_counter() - start,
+            response.status_code in limiter.backoff_statuses,
+        )
+    finally:
+        limiter._release(host)
+    return response
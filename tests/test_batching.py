@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+
+import snug
+
+
+class user(snug.Query):
+    def __init__(self, id):
+        self.id = id
+
+    def __iter__(self):
+        response = yield snug.GET("/users/{}".format(self.id))
+        return json.loads(response.content)
+
+    @classmethod
+    def __batch__(cls, queries):
+        return users([q.id for q in queries])
+
+
+def users(ids):
+    response = yield snug.GET("/users", params={"ids": ids})
+    return json.loads(response.content)
+
+
+def item(id):
+    response = yield snug.GET("/items/{}".format(id))
+    return response.content.decode()
+
+
+@pytest.fixture
+def loopback():
+    requests = []
+
+    def handler(req):
+        requests.append(req)
+        if req.url == "/users":
+            ids = req.params["ids"]
+            if -1 in ids:
+                raise ValueError("unknown user")
+            return snug.Response(
+                200, json.dumps([{"id": i} for i in ids[:3]]).encode()
+            )
+        return snug.Response(200, req.url.encode())
+
+    return snug.Loopback(handler), requests
+
+
+def test_batches_same_tick(loop, loopback):
+    client, requests = loopback
+    exec = snug.BatchingExecutor(client=client)
+    results = loop.run_until_complete(
+        asyncio.gather(
+            exec(user(1)), exec(item(5)), exec(user(2)), exec(user(3))
+        )
+    )
+    assert results == [{"id": 1}, "/items/5", {"id": 2}, {"id": 3}]
+    assert [(r.url, dict(r.params)) for r in requests] == [
+        ("/items/5", {}),
+        ("/users", {"ids": [1, 2, 3]}),
+    ]
+
+
+def test_separate_ticks(loop, loopback):
+    client, requests = loopback
+    exec = snug.BatchingExecutor(client=client)
+
+    async def sequential():
+        return [await exec(user(1)), await exec(user(2))]
+
+    assert loop.run_until_complete(sequential()) == [{"id": 1}, {"id": 2}]
+    assert len(requests) == 2
+
+
+def test_window(loop, loopback):
+    client, requests = loopback
+    exec = snug.BatchingExecutor(client=client, window=0.01)
+
+    async def staggered(id, delay):
+        await asyncio.sleep(delay)
+        return await exec(user(id))
+
+    assert loop.run_until_complete(
+        asyncio.gather(staggered(1, 0), staggered(2, 0.001))
+    ) == [{"id": 1}, {"id": 2}]
+    assert len(requests) == 1
+
+
+def test_max_batch_size(loop, loopback):
+    client, requests = loopback
+    exec = snug.BatchingExecutor(client=client, max_batch_size=2)
+    results = loop.run_until_complete(
+        asyncio.gather(*(exec(user(i)) for i in range(3)))
+    )
+    assert results == [{"id": 0}, {"id": 1}, {"id": 2}]
+    assert [r.params["ids"] for r in requests] == [[0, 1], [2]]
+
+
+def test_errors(loop, loopback):
+    client, requests = loopback
+    exec = snug.BatchingExecutor(client=client)
+    with pytest.raises(ValueError, match="unknown user"):
+        loop.run_until_complete(asyncio.gather(exec(user(1)), exec(user(-1))))
+    with pytest.raises(ValueError, match="returned 3 results"):
+        loop.run_until_complete(
+            asyncio.gather(*(exec(user(i)) for i in range(4)))
+        )
+
+
+def page(number):
+    response = yield snug.GET("/items/{}".format(number))
+    return snug.Page(
+        [response.content.decode()],
+        next_query=page(number + 1) if number < 2 else None,
+    )
+
+
+def test_paginated(loop, loopback):
+    client, requests = loopback
+    exec = snug.BatchingExecutor(client=client)
+
+    async def pages():
+        return [items async for items in await exec(snug.paginated(page(0)))]
+
+    assert loop.run_until_complete(pages()) == [
+        ["/items/0"],
+        ["/items/1"],
+        ["/items/2"],
+    ]
+
+
+def test_batch_tasks_referenced(loop, loopback):
+    client, requests = loopback
+    exec = snug.BatchingExecutor(client=client)
+
+    async def run():
+        results = asyncio.ensure_future(
+            asyncio.gather(exec(user(1)), exec(user(2)))
+        )
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert len(exec._tasks) == 1
+        return await results
+
+    assert loop.run_until_complete(run()) == [{"id": 1}, {"id": 2}]
+    assert exec._tasks == set()
@@ -0,0 +1,246 @@
+import asyncio
+import multiprocessing
+import threading
+from http.client import HTTPMessage
+
+import pytest
+
+import snug
+
+
+class Origin:
+    """a handler counting requests, with validators on its responses"""
+
+    def __init__(self, headers=None, status=200):
+        self.headers = {"ETag": '"v1"'} if headers is None else headers
+        self.status = status
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        with self.lock:
+            self.requests.append(request)
+        etag = self.headers.get("ETag")
+        if etag is not None and request.headers.get("If-None-Match") == etag:
+            return snug.Response(304, b"", {})
+        return snug.Response(
+            self.status,
+            "{} {}".format(request.url, dict(request.params)).encode(),
+            self.headers,
+        )
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def _fill_cache(path, number):
+    client = snug.CachingClient(
+        snug.Loopback(Origin()), path, ttl=60, statuses=[200]
+    )
+    for i in range(number):
+        snug.send(client, snug.GET("https://test.dev/{}".format(i)))
+
+
+class TestCachingClient:
+    def test_fresh_responses_are_reused(self, db):
+        origin = Origin()
+        client = snug.CachingClient(snug.Loopback(origin), db, ttl=60)
+        first = snug.send(client, snug.GET("https://test.dev/a"))
+        second = snug.send(client, snug.GET("https://test.dev/a"))
+        assert second.content == first.content
+        assert second.headers["etag"] == '"v1"'
+        assert len(origin.requests) == 1
+
+        snug.send(client, snug.GET("https://test.dev/a", params={"p": "1"}))
+        snug.send(client, snug.GET("https://test.dev/a", headers={"X": "1"}))
+        assert len(origin.requests) == 3
+
+    def test_headers(self, db):
+        headers = HTTPMessage()
+        headers["Content-Type"] = "application/json"
+        headers["Link"] = "<https://test.dev/a?page=2>; rel=next"
+        headers["Link"] = "<https://test.dev/a?page=9>; rel=last"
+        client = snug.CachingClient(snug.Loopback(Origin(headers)), db)
+        snug.send(client, snug.GET("https://test.dev/a"))
+        cached = snug.send(client, snug.GET("https://test.dev/a"))
+        assert cached.headers["content-type"] == "application/json"
+        assert cached.headers.get_all("link") == headers.get_all("link")
+
+    def test_uncached_methods_and_statuses(self, db):
+        origin = Origin(status=500)
+        client = snug.CachingClient(snug.Loopback(origin), db)
+        snug.send(client, snug.GET("https://test.dev/a"))
+        snug.send(client, snug.GET("https://test.dev/a"))
+        snug.send(client, snug.POST("https://test.dev/a"))
+        snug.send(client, snug.POST("https://test.dev/a"))
+        assert len(origin.requests) == 4
+        assert len(client.cache) == 0
+
+    def test_no_store(self, db):
+        origin = Origin(headers={"Cache-Control": "private, no-store"})
+        client = snug.CachingClient(snug.Loopback(origin), db)
+        snug.send(client, snug.GET("https://test.dev/a"))
+        snug.send(client, snug.GET("https://test.dev/a"))
+        assert len(origin.requests) == 2
+
+    def test_revalidation(self, db):
+        origin = Origin()
+        client = snug.CachingClient(snug.Loopback(origin), db, ttl=0)
+        first = snug.send(client, snug.GET("https://test.dev/a"))
+        second = snug.send(client, snug.GET("https://test.dev/a"))
+        assert second.content == first.content
+        assert second.status_code == 200
+        assert [r.headers.get("If-None-Match") for r in origin.requests] == [
+            None,
+            '"v1"',
+        ]
+
+    def test_expired_without_validators(self, db):
+        origin = Origin(headers={"Last-Modified": "yesterday"})
+        client = snug.CachingClient(snug.Loopback(origin), db, ttl=0)
+        snug.send(client, snug.GET("https://test.dev/a"))
+        snug.send(client, snug.GET("https://test.dev/a"))
+        assert origin.requests[-1].headers == {
+            "If-Modified-Since": "yesterday"
+        }
+
+        origin = Origin(headers={})
+        client = snug.CachingClient(snug.Loopback(origin), db, ttl=0)
+        snug.send(client, snug.GET("https://test.dev/b"))
+        snug.send(client, snug.GET("https://test.dev/b"))
+        assert origin.requests[-1].headers == {}
+
+    def test_shared_between_processes(self, db):
+        process = multiprocessing.get_context("spawn").Process(
+            target=_fill_cache, args=(db, 20)
+        )
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+
+        origin = Origin()
+        client = snug.CachingClient(snug.Loopback(origin), db, ttl=60)
+        for i in range(20):
+            snug.send(client, snug.GET("https://test.dev/{}".format(i)))
+        assert origin.requests == []
+
+    def test_concurrent_threads(self, db):
+        origin = Origin()
+        client = snug.CachingClient(snug.Loopback(origin), db, ttl=60)
+
+        def fanout():
+            return (
+                yield snug.gather(
+                    *(
+                        snug.GET("https://test.dev/{}".format(i % 5))
+                        for i in range(20)
+                    )
+                )
+            )
+
+        responses = snug.execute(fanout(), client=client)
+        assert len(responses) == 20
+        assert len(client.cache) == 5
+
+    def test_send_async(self, db):
+        origin = Origin()
+        client = snug.CachingClient(snug.Loopback(origin), db, ttl=60)
+
+        async def main():
+            await snug.send_async(client, snug.GET("https://test.dev/a"))
+            return await snug.send_async(
+                client, snug.GET("https://test.dev/a")
+            )
+
+        response = asyncio.get_event_loop().run_until_complete(main())
+        assert response.status_code == 200
+        assert len(origin.requests) == 1
+
+    def test_prewarm(self, db):
+        origin = Origin()
+        client = snug.CachingClient(snug.Loopback(origin), db, ttl=60)
+
+        def page(number):
+            response = yield snug.GET(
+                "https://test.dev/pages", params={"page": str(number)}
+            )
+            return response.content
+
+        client.prewarm([page(1), page(2), page(3)])
+        assert len(origin.requests) == 3
+        client.prewarm([page(1), page(2), page(3)])
+        asyncio.get_event_loop().run_until_complete(
+            client.prewarm_async([page(3), page(4)])
+        )
+        assert len(origin.requests) == 4
+        assert snug.execute(page(2), client=client).endswith(b"'2'}")
+        assert len(origin.requests) == 4
+
+
+class TestSQLiteCache:
+    def test_persistent(self, db):
+        cache = snug.SQLiteCache(db)
+        cache.set("a", snug.Response(200, b"hello", {"ETag": "x"}), 1e10)
+        cache.close()
+
+        entry = snug.SQLiteCache(db).get("a")
+        assert entry.response.status_code == 200
+        assert entry.response.content == b"hello"
+        assert dict(entry.response.headers) == {"ETag": "x"}
+        assert entry.expires == 1e10
+        assert entry.etag == "x"
+        assert entry.last_modified is None
+
+    def test_hits_do_not_write(self, db):
+        cache = snug.SQLiteCache(db)
+        cache.set("a", snug.Response(200, b"x"), 1e10)
+        changes = cache._connection().total_changes
+        assert cache.get("a") is not None
+        assert cache.get("a") is not None
+        assert cache._connection().total_changes == changes
+
+    def test_access_times_flushed(self, db, mocker):
+        cache = snug.SQLiteCache(db)
+        cache.set("a", snug.Response(200, b"x"), 1e10)
+        clock = mocker.patch("snug.caching.time.time")
+        clock.return_value = cache._flushed + 1
+        cache.get("a")
+        clock.return_value = cache._flushed + 100
+        cache.get("a")
+        assert cache._accessed == {}
+        (accessed,) = (
+            cache._connection()
+            .execute("SELECT accessed FROM responses")
+            .fetchone()
+        )
+        assert accessed == clock.return_value
+
+    def test_eviction(self, db):
+        cache = snug.SQLiteCache(db, max_size=25)
+        for key in "abc":
+            cache.set(key, snug.Response(200, b"x" * 10), 1e10)
+        assert len(cache) == 2
+        assert cache.size == 20
+        assert cache.get("a") is None
+        # 'b' is now used more recently than 'c'
+        assert cache.get("b") is not None
+        cache.set("d", snug.Response(200, b"x" * 10), 1e10)
+        assert cache.get("c") is None
+        assert cache.get("b") is not None
+
+    def test_too_large(self, db):
+        cache = snug.SQLiteCache(db, max_size=5)
+        cache.set("a", snug.Response(200, b"x" * 10), 1e10)
+        assert len(cache) == 0
+
+    def test_refresh_and_clear(self, db):
+        cache = snug.SQLiteCache(db)
+        cache.set("a", snug.Response(200, None), 0)
+        cache.refresh("a", 100)
+        assert cache.get("a").expires == 100
+        assert cache.get("a").response.content is None
+        cache.clear()
+        assert len(cache) == 0
+        assert db in repr(cache)
@@ -1,6 +1,14 @@
 import asyncio
+import gzip
 import json
+import os
+import socketserver
+import subprocess
+import sys
+import threading
 import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
 
 import pytest
 
@@ -43,6 +51,251 @@ def test_async_send_with_unknown_client():
         snug.send_async(MyClass(), snug.GET("foo"))
 
 
+def test_send_with_client_of_other_kind():
+    def query():
+        return (yield snug.GET("foo"))
+
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(TypeError, match="not registered"):
+            snug.send(loop, snug.GET("foo"))
+        with pytest.raises(TypeError, match="not registered"):
+            snug.send(asyncio.Queue(), snug.GET("foo"))
+        with pytest.raises(TypeError, match="not registered"):
+            snug.executor(client=loop)(query())
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def restore_builtins():
+    yield
+    # singledispatch has no way to unregister
+    clients = snug.clients
+    snug.send.register(urllib.request.OpenerDirector, clients._urllib_send)
+    try:
+        import httpx
+    except ImportError:
+        return
+    snug.send_async.register(httpx.AsyncClient, clients._httpx_send_async)
+
+
+def test_builtins_do_not_override_user_registrations(restore_builtins):
+    def my_send(client, request):
+        return snug.Response(204)
+
+    snug.send.register(urllib.request.OpenerDirector, my_send)
+    with pytest.raises(TypeError, match="not registered"):
+        snug.send(urllib.request.Request("http://foo.com"), snug.GET("foo"))
+    assert snug.send.dispatch(urllib.request.OpenerDirector) is my_send
+
+    httpx = pytest.importorskip("httpx")
+    snug.send_async.register(httpx.AsyncClient, my_send)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200))
+    with httpx.Client(transport=transport) as client:
+        assert (
+            snug.send(client, snug.GET("http://foo.com/")).status_code == 200
+        )
+    assert snug.send_async.dispatch(httpx.AsyncClient) is my_send
+
+
+def test_import_does_not_load_clients():
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import sys, snug; "
+            "print(sorted(m for m in ('asyncio', 'aiohttp', 'requests', "
+            "'urllib.request', 'http.client') if m in sys.modules))",
+        ]
+    )
+    assert output.strip() == b"[]"
+
+
+def test_builtin_clients_registered_on_dispatch():
+    impl = snug.clients._dispatch(snug.send, urllib.request.OpenerDirector)
+    assert impl is snug.clients._urllib_send
+
+    class MyLoop(asyncio.SelectorEventLoop):
+        pass
+
+    impl = snug.clients._dispatch(snug.send_async, MyLoop)
+    assert impl is snug.clients._asyncio_send
+
+
+_BODY = json.dumps([{"id": i, "name": "item"} for i in range(500)]).encode()
+
+
+def _raw_deflate(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class CompressingHandler(BaseHTTPRequestHandler):
+    encodings = {
+        "/gzip": ("gzip", gzip.compress),
+        "/deflate": ("deflate", zlib.compress),
+        "/raw-deflate": ("deflate", _raw_deflate),
+        "/identity": (None, bytes),
+    }
+
+    def do_GET(self):
+        encoding, compress = self.encodings[self.path.split("?")[0]]
+        body = compress(_BODY)
+        self.send_response(200)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header(
+            "X-Accept-Encoding", self.headers.get("Accept-Encoding", "")
+        )
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def compressing_server():
+    server = HTTPServer(("127.0.0.1", 0), CompressingHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, args=(0.01,), daemon=True
+    )
+    thread.start()
+    yield "http://127.0.0.1:{}".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize(
+    "path", ["/gzip", "/deflate", "/raw-deflate", "/identity"]
+)
+class TestDecompression:
+    def test_urllib(self, compressing_server, path):
+        client = urllib.request.build_opener()
+        response = snug.send(client, snug.GET(compressing_server + path))
+        assert response.content == _BODY
+        assert "gzip" in response.headers["X-Accept-Encoding"]
+
+    def test_asyncio(self, compressing_server, path, loop):
+        response = loop.run_until_complete(
+            snug.send_async(loop, snug.GET(compressing_server + path))
+        )
+        assert response.content == _BODY
+        assert "deflate" in response.headers["X-Accept-Encoding"]
+
+
+def test_explicit_accept_encoding(compressing_server):
+    client = urllib.request.build_opener()
+    response = snug.send(
+        client,
+        snug.GET(
+            compressing_server + "/identity",
+            headers={"Accept-Encoding": "identity"},
+        ),
+    )
+    assert response.headers["X-Accept-Encoding"] == "identity"
+
+
+class UnixHTTPServer(socketserver.UnixStreamServer):
+    def get_request(self):
+        request, _ = super().get_request()
+        # the request handler expects a (host, port) client address
+        return request, ("local", 0)
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps(
+            {"path": self.path, "host": self.headers["Host"]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def unix_server(tmpdir):
+    path = str(tmpdir / "server.sock")
+    server = UnixHTTPServer(path, EchoHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, args=(0.01,), daemon=True
+    )
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+    os.unlink(path)
+
+
+@pytest.mark.skipif(
+    not hasattr(socketserver, "UnixStreamServer"), reason="no Unix sockets"
+)
+class TestUnixSockets:
+    @pytest.mark.parametrize("scheme", ["unix", "http+unix"])
+    def test_url_scheme(self, unix_server, scheme, loop):
+        url = "{}://{}/items".format(
+            scheme, urllib.parse.quote(unix_server, safe="")
+        )
+        req = snug.GET(url, params={"page": "2"})
+        expect = {"path": "/items?page=2", "host": "localhost"}
+        response = snug.execute(_fetch(req))
+        assert json.loads(response.content) == expect
+        response = loop.run_until_complete(snug.send_async(loop, req))
+        assert json.loads(response.content) == expect
+
+    def test_host_mapping(self, unix_server, compressing_server):
+        client = snug.unix_socket_opener({"api.local": unix_server})
+        response = snug.send(client, snug.GET("http://api.local/items"))
+        assert json.loads(response.content) == {
+            "path": "/items?",
+            "host": "api.local",
+        }
+        # other hosts are sent over TCP
+        response = snug.send(client, snug.GET(compressing_server + "/gzip"))
+        assert response.content == _BODY
+
+
+@pytest.fixture
+def echo_server():
+    server = HTTPServer(("127.0.0.1", 0), EchoHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, args=(0.01,), daemon=True
+    )
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize(
+    "netloc, host",
+    [
+        ("127.0.0.1:{}", "127.0.0.1:{}"),
+        ("user:secret@127.0.0.1:{}", "127.0.0.1:{}"),
+        ("user@LOCALHOST:{}", "localhost:{}"),
+    ],
+)
+def test_asyncio_host_header(echo_server, netloc, host, loop):
+    req = snug.GET("http://{}/items".format(netloc.format(echo_server)))
+    response = loop.run_until_complete(snug.send_async(loop, req))
+    assert json.loads(response.content)["host"] == host.format(echo_server)
+
+
+def test_host_header_ipv6():
+    url = urllib.parse.urlsplit("http://u:p@[::1]:8080/items")
+    assert snug.clients._host_header(url) == "[::1]:8080"
+
+
+def _fetch(req):
+    return (yield req)
+
+
 @pytest.mark.live
 class TestSendWithUrllib:
     def test_no_contenttype(self, mocker):
@@ -228,3 +481,277 @@ class TestAiohttpSend:
 
         with pytest.raises(ValueError, match="foo"):
             loop.run_until_complete(using_aiohttp(req))
+
+
+class H2EchoProtocol(asyncio.Protocol):
+    """a minimal HTTP/2 (cleartext) server, echoing each request"""
+
+    def __init__(self, connections):
+        import h2.config
+        import h2.connection
+
+        connections.append(self)
+        self.streams = {}
+        self.most_streams = 0
+        self.conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(
+                client_side=False, header_encoding="utf-8"
+            )
+        )
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.conn.initiate_connection()
+        transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        import h2.events
+
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                self.streams[event.stream_id] = (dict(event.headers), [])
+                self.most_streams = max(self.most_streams, len(self.streams))
+            elif isinstance(event, h2.events.DataReceived):
+                self.streams[event.stream_id][1].append(event.data)
+                self.conn.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                self._respond(event.stream_id)
+        self.transport.write(self.conn.data_to_send())
+
+    def _respond(self, stream_id):
+        headers, chunks = self.streams.pop(stream_id)
+        body = json.dumps(
+            {
+                "method": headers[":method"],
+                "path": headers[":path"],
+                "accept": headers.get("accept"),
+                "content": b"".join(chunks).decode(),
+            }
+        ).encode()
+        self.conn.send_headers(
+            stream_id,
+            [(":status", "200"), ("content-length", str(len(body)))],
+        )
+        self.conn.send_data(stream_id, body, end_stream=True)
+
+
+def test_httpx_send(compressing_server):
+    httpx = pytest.importorskip("httpx")
+    with httpx.Client() as client:
+        response = snug.send(
+            client,
+            snug.GET(
+                compressing_server + "/gzip",
+                params={"foo": "bar"},
+                headers={"Accept-Encoding": "gzip"},
+            ),
+        )
+    assert response.status_code == 200
+    assert response.content == _BODY
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["X-Accept-Encoding"] == "gzip"
+
+
+class TestHttpxAsyncSend:
+    def test_http2(self, loop):
+        httpx = pytest.importorskip("httpx")
+        pytest.importorskip("h2")
+        connections = []
+        server = loop.run_until_complete(
+            loop.create_server(
+                lambda: H2EchoProtocol(connections),
+                "127.0.0.1",
+                0,
+            )
+        )
+        url = "http://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+
+        async def run():
+            # prior knowledge HTTP/2, as there is no TLS to negotiate it
+            async with httpx.AsyncClient(http1=False, http2=True) as client:
+                return await asyncio.gather(
+                    *(
+                        snug.send_async(
+                            client,
+                            snug.POST(
+                                url + "/post",
+                                content=str(i).encode(),
+                                params={"n": str(i)},
+                                headers={"Accept": "application/json"},
+                            ),
+                        )
+                        for i in range(10)
+                    )
+                )
+
+        try:
+            responses = loop.run_until_complete(run())
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+        # concurrent streams, multiplexed over one connection
+        assert len(connections) == 1
+        assert connections[0].most_streams > 1
+        for i, response in enumerate(responses):
+            assert response.status_code == 200
+            assert json.loads(response.content) == {
+                "method": "POST",
+                "path": "/post?n={}".format(i),
+                "accept": "application/json",
+                "content": str(i),
+            }
+
+    def test_http1_fallback(self, loop, compressing_server):
+        httpx = pytest.importorskip("httpx")
+
+        async def run():
+            async with httpx.AsyncClient(http2=True) as client:
+                return await snug.send_async(
+                    client, snug.GET(compressing_server + "/gzip")
+                )
+
+        response = loop.run_until_complete(run())
+        assert response.status_code == 200
+        assert response.content == _BODY
+
+
+def echo(req):
+    return snug.Response(
+        200, req.content, headers={"X-Url": req.url, "X-Method": req.method}
+    )
+
+
+async def async_echo(req):
+    await asyncio.sleep(0)
+    return echo(req)
+
+
+class TestLoopback:
+    def test_send(self):
+        client = snug.Loopback(echo)
+        response = snug.send(client, snug.POST("my/url", b"foo"))
+        assert response == snug.Response(
+            200, b"foo", headers={"X-Url": "my/url", "X-Method": "POST"}
+        )
+
+    def test_send_async(self, loop):
+        for handler in [echo, async_echo]:
+            client = snug.Loopback(handler)
+            response = loop.run_until_complete(
+                snug.send_async(client, snug.POST("my/url", b"foo"))
+            )
+            assert response.content == b"foo"
+
+    def test_send_async_handler(self):
+        client = snug.Loopback(async_echo)
+        with pytest.raises(TypeError, match="send_async"):
+            snug.send(client, snug.GET("my/url"))
+
+    def test_latency(self, loop, mocker):
+        sleep = mocker.patch("time.sleep")
+        client = snug.Loopback(echo, latency=0.2)
+        snug.send(client, snug.GET("my/url"))
+        sleep.assert_called_once_with(0.2)
+
+        delays = []
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+
+        mocker.patch("asyncio.sleep", fake_sleep)
+        loop.run_until_complete(snug.send_async(client, snug.GET("my/url")))
+        assert delays == [0.2]
+
+    def test_execute(self):
+        client = snug.Loopback(echo)
+
+        def myquery():
+            response = yield snug.GET("my/url")
+            return response.headers["X-Url"]
+
+        assert snug.execute(myquery(), client=client) == "my/url"
+        assert "echo" in repr(client)
+
+    def test_wsgi(self):
+        def app(environ, start_response):
+            start_response("201 Created", [("Content-Type", "text/plain")])
+            return [
+                environ["REQUEST_METHOD"].encode(),
+                b" ",
+                environ["PATH_INFO"].encode(),
+                b"?",
+                environ["QUERY_STRING"].encode(),
+                b" ",
+                environ["HTTP_X_FOO"].encode(),
+                b" ",
+                environ["wsgi.input"].read(),
+            ]
+
+        client = snug.Loopback.wsgi(app)
+        response = snug.send(
+            client,
+            snug.POST(
+                "http://example.com/my/url?a=1",
+                b"body",
+                params={"b": "2"},
+                headers={"X-Foo": "bar"},
+            ),
+        )
+        assert response == snug.Response(
+            201,
+            b"POST /my/url?a=1&b=2 bar body",
+            headers={"Content-Type": "text/plain"},
+        )
+        assert "wsgi" in repr(client)
+
+    def test_asgi(self, loop):
+        async def app(scope, receive, send):
+            request = await receive()
+            assert (await receive())["type"] == "http.disconnect"
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 201,
+                    "headers": [(b"content-type", b"text/plain")],
+                }
+            )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": " ".join(
+                        [scope["method"], scope["path"], ""]
+                    ).encode(),
+                    "more_body": True,
+                }
+            )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": scope["query_string"]
+                    + b" "
+                    + dict(scope["headers"])[b"x-foo"]
+                    + b" "
+                    + request["body"],
+                }
+            )
+
+        client = snug.Loopback.asgi(app)
+        response = loop.run_until_complete(
+            snug.send_async(
+                client,
+                snug.POST(
+                    "http://example.com/my/url",
+                    b"body",
+                    params={"b": "2"},
+                    headers={"X-Foo": "bar"},
+                ),
+            )
+        )
+        assert response == snug.Response(
+            201,
+            b"POST /my/url b=2 bar body",
+            headers={"content-type": "text/plain"},
+        )
+        assert "asgi" in repr(client)
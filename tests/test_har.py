@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import pytest
+
+import snug
+
+
+def handler(req):
+    if req.url.endswith("error"):
+        raise ValueError("connection failed")
+    return snug.Response(
+        200, b'{"id": 1}', headers={"Content-Type": "application/json"}
+    )
+
+
+def fetch(url, content=None):
+    response = yield snug.Request(
+        "POST" if content else "GET",
+        url,
+        content=content,
+        params={"q": "foo"},
+        headers={"Content-Type": "text/plain"},
+    )
+    return response.status_code
+
+
+def test_record_and_export(tmpdir):
+    recorder = snug.HARRecorder(snug.Loopback(handler))
+    assert snug.execute(fetch("https://foo.com/a"), client=recorder) == 200
+    snug.execute(fetch("https://foo.com/b?x=1", b"\xff\x00"), client=recorder)
+    with pytest.raises(ValueError, match="connection failed"):
+        snug.execute(fetch("https://foo.com/error"), client=recorder)
+
+    har = recorder.to_har()
+    assert har["log"]["version"] == "1.2"
+    assert har["log"]["creator"]["name"] == "snug"
+    first, second, failed = har["log"]["entries"]
+
+    assert first["request"]["method"] == "GET"
+    assert first["request"]["url"] == "https://foo.com/a?q=foo"
+    assert first["request"]["queryString"] == [{"name": "q", "value": "foo"}]
+    assert first["request"]["headers"] == [
+        {"name": "Content-Type", "value": "text/plain"}
+    ]
+    assert "postData" not in first["request"]
+    assert first["response"]["status"] == 200
+    assert first["response"]["content"] == {
+        "mimeType": "application/json",
+        "text": '{"id": 1}',
+        "size": 9,
+    }
+    assert first["time"] >= 0
+    assert first["timings"]["wait"] == first["time"]
+    assert first["timings"]["connect"] == -1
+    assert first["startedDateTime"].endswith("+00:00")
+
+    assert second["request"]["url"] == "https://foo.com/b?x=1&q=foo"
+    assert second["request"]["bodySize"] == 2
+    assert second["request"]["postData"] == {
+        "mimeType": "text/plain",
+        "text": "/wA=",
+        "encoding": "base64",
+    }
+
+    assert failed["response"]["status"] == 0
+    assert "connection failed" in failed["response"]["_error"]
+
+    path = str(tmpdir / "out.har")
+    recorder.write(path)
+    with open(path) as infile:
+        assert json.load(infile) == har
+
+    recorder.clear()
+    assert recorder.to_har()["log"]["entries"] == []
+
+
+def test_limits():
+    recorder = snug.HARRecorder(
+        snug.Loopback(handler), max_entries=2, max_body_size=4
+    )
+    for path in "abc":
+        snug.execute(
+            fetch("https://foo.com/" + path, b"123456"), client=recorder
+        )
+    entries = recorder.to_har()["log"]["entries"]
+    assert [e["request"]["url"] for e in entries] == [
+        "https://foo.com/b?q=foo",
+        "https://foo.com/c?q=foo",
+    ]
+    assert entries[0]["request"]["postData"]["text"] == "1234"
+    assert entries[0]["response"]["content"]["text"] == '{"id'
+    # the sizes are of the original content
+    assert entries[0]["request"]["bodySize"] == 6
+    assert entries[0]["response"]["bodySize"] == 9
+    assert entries[0]["response"]["content"]["size"] == 9
+
+
+def test_sampling(mocker):
+    recorder = snug.HARRecorder(snug.Loopback(handler), sample_rate=0.5)
+    mocker.patch.object(recorder, "_random", side_effect=[0.2, 0.7, 0.4])
+    for path in "abc":
+        assert (
+            snug.execute(fetch("https://foo.com/" + path), client=recorder)
+            == 200
+        )
+    entries = recorder.to_har()["log"]["entries"]
+    assert [e["request"]["url"] for e in entries] == [
+        "https://foo.com/a?q=foo",
+        "https://foo.com/c?q=foo",
+    ]
+
+
+def test_async():
+    recorder = snug.HARRecorder(snug.Loopback(handler))
+    loop = asyncio.new_event_loop()
+    try:
+        result = loop.run_until_complete(
+            snug.execute_async(fetch("https://foo.com/a"), client=recorder)
+        )
+        with pytest.raises(ValueError):
+            loop.run_until_complete(
+                snug.execute_async(
+                    fetch("https://foo.com/error"), client=recorder
+                )
+            )
+    finally:
+        loop.close()
+    assert result == 200
+    ok, failed = recorder.to_har()["log"]["entries"]
+    assert ok["response"]["status"] == 200
+    assert failed["response"]["status"] == 0
+
+
+def test_repr():
+    assert "Loopback" in repr(snug.HARRecorder(snug.Loopback(handler)))
@@ -0,0 +1,276 @@
+import asyncio
+
+import pytest
+
+import snug
+
+
+class Recorder(snug.Hook):
+    def __init__(self):
+        self.events = []
+        self.parents = []
+
+    def query_start(self, query, time, parent):
+        self.events.append(("query_start", query))
+        self.parents.append(parent)
+
+    def query_end(self, query, time, error):
+        self.events.append(("query_end", query, error))
+
+    def generator_resume(self, query, time):
+        self.events.append(("generator_resume", query))
+
+    def generator_return(self, query, time):
+        self.events.append(("generator_return", query))
+
+    def request_sent(self, query, request, time):
+        self.events.append(("request_sent", query, request))
+
+    def response_received(self, query, request, response, time):
+        self.events.append(("response_received", query, request, response))
+
+
+class Timestamps(snug.Hook):
+    def __init__(self):
+        self.times = []
+
+    def generator_resume(self, query, time):
+        self.times.append(time)
+
+    def request_sent(self, query, request, time):
+        self.times.append(time)
+
+
+def echo(req):
+    return snug.Response(200, req.url.encode())
+
+
+class twostep(snug.Query):
+    def __iter__(self):
+        first = yield snug.GET("first")
+        second = yield snug.GET(first.content.decode() + "/second")
+        return second.content
+
+
+class failing(snug.Query):
+    def __iter__(self):
+        yield snug.GET("first")
+        raise ValueError("foo")
+
+
+class mylist(snug.Query):
+    def __init__(self, page=0):
+        self.page = page
+
+    def __iter__(self):
+        yield snug.GET("page/{}".format(self.page))
+        return snug.Page(
+            [self.page], next_query=mylist(1) if self.page == 0 else None
+        )
+
+
+def auth(req):
+    return req.with_headers({"Authorization": "me"})
+
+
+def test_default_hook_does_nothing():
+    hook = snug.Hook()
+    hook.query_start(None, 0, None)
+    hook.query_end(None, 0, None)
+    hook.generator_resume(None, 0)
+    hook.generator_return(None, 0)
+    hook.request_sent(None, None, 0)
+    hook.response_received(None, None, None, 0)
+
+
+def test_no_hooks_uses_plain_execution():
+    executor = snug.executor(client=snug.Loopback(echo))
+    executor(twostep())
+    assert list(executor._strategies.values()) == [executor._run]
+
+
+class TestExecute:
+    def test_events(self):
+        recorder = Recorder()
+        query = twostep()
+        result = snug.execute(
+            query, client=snug.Loopback(echo), auth=auth, hooks=[recorder]
+        )
+        assert result == b"first/second"
+        first = snug.GET("first", headers={"Authorization": "me"})
+        second = snug.GET("first/second", headers={"Authorization": "me"})
+        assert recorder.events == [
+            ("query_start", query),
+            ("generator_resume", query),
+            ("generator_return", query),
+            ("request_sent", query, first),
+            ("response_received", query, first, echo(first)),
+            ("generator_resume", query),
+            ("generator_return", query),
+            ("request_sent", query, second),
+            ("response_received", query, second, echo(second)),
+            ("generator_resume", query),
+            ("generator_return", query),
+            ("query_end", query, None),
+        ]
+
+    def test_timestamps_are_monotonic(self):
+        timestamps = Timestamps()
+        executor = snug.executor(
+            client=snug.Loopback(echo), hooks=[timestamps]
+        )
+        executor(twostep())
+        assert len(timestamps.times) == 5
+        assert timestamps.times == sorted(timestamps.times)
+
+    def test_error(self):
+        recorder = Recorder()
+        executor = snug.executor(client=snug.Loopback(echo), hooks=[recorder])
+        query = failing()
+        with pytest.raises(ValueError, match="foo"):
+            executor(query)
+        assert recorder.events[-2] == ("generator_return", query)
+        event, failed_query, error = recorder.events[-1]
+        assert event == "query_end"
+        assert isinstance(error, ValueError)
+
+    def test_custom_execute(self):
+        recorder = Recorder()
+
+        class MyQuery(object):
+            def __execute__(self, client, auth):
+                return snug.send(client, auth(snug.GET("my/url"))).content
+
+        query = MyQuery()
+        result = snug.execute(
+            query, client=snug.Loopback(echo), auth=auth, hooks=[recorder]
+        )
+        assert result == b"my/url"
+        assert recorder.events == [
+            ("query_start", query),
+            ("query_end", query, None),
+        ]
+
+    def test_custom_execute_error(self):
+        recorder = Recorder()
+
+        class MyQuery(object):
+            def __execute__(self, client, auth):
+                raise ValueError("foo")
+
+        with pytest.raises(ValueError, match="foo"):
+            snug.execute(
+                MyQuery(), client=snug.Loopback(echo), hooks=[recorder]
+            )
+        assert isinstance(recorder.events[-1][2], ValueError)
+
+    def test_paginated_propagates_hooks(self):
+        recorder = Recorder()
+        executor = snug.executor(
+            client=snug.Loopback(echo), auth=auth, hooks=[recorder]
+        )
+        assert list(executor(snug.paginated(mylist()))) == [[0], [1]]
+        requests = [e[2] for e in recorder.events if e[0] == "request_sent"]
+        assert requests == [
+            snug.GET("page/0", headers={"Authorization": "me"}),
+            snug.GET("page/1", headers={"Authorization": "me"}),
+        ]
+        starts = [e[1] for e in recorder.events if e[0] == "query_start"]
+        assert len(starts) == 3
+        assert isinstance(starts[0], snug.paginated)
+        assert recorder.parents == [None, starts[0], starts[0]]
+
+
+class TestExecuteAsync:
+    def test_events(self, loop):
+        recorder = Recorder()
+        query = twostep()
+        result = loop.run_until_complete(
+            snug.execute_async(
+                query, client=snug.Loopback(echo), hooks=[recorder]
+            )
+        )
+        assert result == b"first/second"
+        assert [e[0] for e in recorder.events] == [
+            "query_start",
+            "generator_resume",
+            "generator_return",
+            "request_sent",
+            "response_received",
+            "generator_resume",
+            "generator_return",
+            "request_sent",
+            "response_received",
+            "generator_resume",
+            "generator_return",
+            "query_end",
+        ]
+
+    def test_default_client(self, loop):
+        recorder = Recorder()
+        executor = snug.async_executor(hooks=[recorder])
+
+        class MyQuery:
+            def __execute_async__(self, client, auth):
+                assert isinstance(client, asyncio.AbstractEventLoop)
+                return asyncio.sleep(0, result=4)
+
+        assert loop.run_until_complete(executor(MyQuery())) == 4
+        assert [e[0] for e in recorder.events] == ["query_start", "query_end"]
+
+    def test_error(self, loop):
+        recorder = Recorder()
+        executor = snug.async_executor(
+            client=snug.Loopback(echo), hooks=[recorder]
+        )
+        with pytest.raises(ValueError, match="foo"):
+            loop.run_until_complete(executor(failing()))
+        assert isinstance(recorder.events[-1][2], ValueError)
+
+    def test_custom_execute(self, loop):
+        recorder = Recorder()
+
+        class MyQuery:
+            async def __execute_async__(self, client, auth):
+                response = await snug.send_async(
+                    client, auth(snug.GET("my/url"))
+                )
+                return response.content
+
+        query = MyQuery()
+        executor = snug.async_executor(
+            client=snug.Loopback(echo), hooks=[recorder]
+        )
+        assert loop.run_until_complete(executor(query)) == b"my/url"
+        assert recorder.events == [
+            ("query_start", query),
+            ("query_end", query, None),
+        ]
+
+    def test_custom_execute_error(self, loop):
+        recorder = Recorder()
+
+        class MyQuery:
+            async def __execute_async__(self, client, auth):
+                raise ValueError("foo")
+
+        executor = snug.async_executor(
+            client=snug.Loopback(echo), hooks=[recorder]
+        )
+        with pytest.raises(ValueError, match="foo"):
+            loop.run_until_complete(executor(MyQuery()))
+        assert isinstance(recorder.events[-1][2], ValueError)
+
+    def test_paginated_propagates_hooks(self, loop):
+        recorder = Recorder()
+        executor = snug.async_executor(
+            client=snug.Loopback(echo), hooks=[recorder]
+        )
+
+        async def consume():
+            return [page async for page in executor(snug.paginated(mylist()))]
+
+        assert loop.run_until_complete(consume()) == [[0], [1]]
+        starts = [e[1] for e in recorder.events if e[0] == "query_start"]
+        assert len(starts) == 3
+        assert recorder.parents == [None, starts[0], starts[0]]
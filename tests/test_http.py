@@ -1,5 +1,9 @@
+import json
 from collections.abc import Mapping
-from operator import attrgetter
+from datetime import datetime
+from operator import attrgetter, methodcaller
+
+import pytest
 
 import snug
 
@@ -68,6 +72,16 @@ class TestRequest:
         assert added == snug.GET("my/url", params={"foo": "bar", "bla": "qux"})
         assert isinstance(added.params, FrozenDict)
 
+    def test_with_json(self):
+        req = snug.POST("my/url", headers={"foo": "bar"})
+        encoded = req.with_json({"name": "test", "ids": [1, 2]})
+        assert isinstance(encoded.content, bytes)
+        assert json.loads(encoded.content) == {"name": "test", "ids": [1, 2]}
+        assert encoded.headers == {
+            "foo": "bar",
+            "Content-Type": "application/json",
+        }
+
     def test_equality(self):
         req = snug.Request("GET", "my/url")
         other = req.replace()
@@ -103,6 +117,136 @@ class TestResponse:
     def test_repr(self):
         assert "404" in repr(snug.Response(404))
 
+    def test_json(self):
+        rsp = snug.Response(200, b'{"foo": [1, 2]}')
+        assert rsp.json() == {"foo": [1, 2]}
+        assert rsp.json() is rsp.json()
+        # the decoded content does not affect equality
+        assert rsp == snug.Response(200, b'{"foo": [1, 2]}')
+        assert rsp.replace(content=b"[]").json() == []
+
+    def test_json_invalid(self):
+        with pytest.raises(ValueError):
+            snug.Response(200, b"{").json()
+
+
+class TestIterJsonArray:
+    ITEMS = [
+        {"id": 1, "name": "caf\u00e9 \U0001d11e", "tags": ["a", "b"]},
+        -1234567890123,
+        1.5e3,
+        None,
+        "]",
+        [[], {}],
+    ]
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 5, 1000])
+    def test_chunks(self, chunk_size):
+        content = json.dumps(self.ITEMS, ensure_ascii=False).encode()
+        response = snug.Response(200, content)
+        assert list(response.iter_json(chunk_size)) == self.ITEMS
+
+    def test_lazy(self):
+        items = snug.iter_json_array(iter([b'[{"id": 1},', b"{", None]))
+        assert next(items) == {"id": 1}
+
+    @pytest.mark.parametrize(
+        "content, items", [(b"[]", []), (b" \n[ 1 ,2\t]\r\n", [1, 2])]
+    )
+    def test_whitespace_and_empty(self, content, items):
+        assert list(snug.iter_json_array([content])) == items
+
+    @pytest.mark.parametrize(
+        "content, message",
+        [
+            (b'{"a": 1}', "expected a JSON array"),
+            (b"", "incomplete"),
+            (b"[1, 2", "incomplete"),
+            (b"[1 2]", "expected ',' or ']'"),
+            (b"[1, ]", "Expecting value"),
+            (b"[1] [2]", "extra data"),
+        ],
+    )
+    def test_invalid(self, content, message):
+        with pytest.raises(ValueError, match=message):
+            list(snug.iter_json_array([content[:3], content[3:]]))
+
+    def test_chunks_of_any_size(self):
+        chunks = [b"[", b"", b"1", b"2, 3", b"4]"]
+        assert list(snug.iter_json_array(chunks)) == [12, 34]
+
+
+class TestSetJsonBackend:
+    @pytest.fixture(autouse=True)
+    def reset(self):
+        yield
+        snug.set_json_backend()
+
+    def test_custom(self):
+        snug.set_json_backend(
+            lambda content: ("loaded", content),
+            lambda obj: repr(obj).encode(),
+        )
+        assert snug.Response(200, b"{}").json() == ("loaded", b"{}")
+        assert snug.POST("my/url").with_json([1]).content == b"[1]"
+
+    def test_reset(self):
+        snug.set_json_backend(json.loads, json.dumps)
+        snug.set_json_backend()
+        assert snug.POST("my/url").with_json([1]).content == b"[1]"
+
+    def test_incomplete(self):
+        with pytest.raises(TypeError, match="both"):
+            snug.set_json_backend(json.loads)
+
+
+class TestRequestTemplate:
+    def test_simple(self):
+        template = snug.RequestTemplate("GET", "my/url/")
+        assert template() == snug.GET("my/url/")
+        assert template(content=b"foo") == snug.GET("my/url/", b"foo")
+
+    def test_placeholders_params_and_headers(self):
+        template = snug.RequestTemplate(
+            "POST",
+            "repos/{owner}/{name}/issues",
+            params={"since": methodcaller("isoformat"), "state": str},
+            headers={"Accept": "application/json"},
+        )
+        req = template(
+            owner="octocat",
+            name="Hello-World",
+            since=datetime(2018, 3, 2),
+            state=None,
+        )
+        assert req == snug.POST(
+            "repos/octocat/Hello-World/issues",
+            params={"since": "2018-03-02T00:00:00"},
+            headers={"Accept": "application/json"},
+        )
+
+    def test_missing_placeholder(self):
+        template = snug.RequestTemplate("GET", "repos/{owner}/{name}")
+        with pytest.raises(TypeError, match="name"):
+            template(owner="octocat")
+
+    def test_unexpected_argument(self):
+        template = snug.RequestTemplate("GET", "users/{name}")
+        with pytest.raises(TypeError, match="foo"):
+            template(name="bob", foo=4)
+
+    def test_invalid_pattern(self):
+        with pytest.raises(ValueError, match="names"):
+            snug.RequestTemplate("GET", "users/{0}")
+        with pytest.raises(ValueError, match="names"):
+            snug.RequestTemplate("GET", "repos/{}/x")
+        with pytest.raises(ValueError, match="name"):
+            snug.RequestTemplate("GET", "users/{name}", params={"name": str})
+
+    def test_repr(self):
+        template = snug.RequestTemplate("GET", "users/{name}")
+        assert "GET users/{name}" in repr(template)
+
 
 def test_prefix_adder():
     req = snug.GET("my/url")
@@ -110,6 +254,22 @@ def test_prefix_adder():
     assert adder(req) == snug.GET("mysite.com/my/url")
 
 
+def test_gzip_compressor():
+    import gzip
+
+    compress = snug.gzip_compressor(min_size=10)
+    req = snug.POST("my/url", content=b"x" * 100, headers={"Accept": "*/*"})
+    compressed = compress(req)
+    assert compressed.headers == {"Accept": "*/*", "Content-Encoding": "gzip"}
+    assert gzip.decompress(compressed.content) == b"x" * 100
+    assert len(compressed.content) < 100
+
+    small = snug.POST("my/url", content=b"x" * 9)
+    assert compress(small) is small
+    assert compress(compressed) is compressed
+    assert compress(snug.GET("my/url")) == snug.GET("my/url")
+
+
 def test_header_adder():
     req = snug.GET("my/url", headers={"Accept": "application/json"})
     adder = snug.header_adder({"Authorization": "my-auth"})
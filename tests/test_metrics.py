@@ -0,0 +1,136 @@
+import pytest
+
+import snug
+
+
+def handler(req):
+    if req.url.endswith("missing"):
+        return snug.Response(404, b"")
+    elif req.url.endswith("error"):
+        raise ValueError("connection failed")
+    return snug.Response(200, b"hello")
+
+
+def fetch(url, content=None):
+    response = yield snug.POST(url, content)
+    return response.status_code
+
+
+class twohosts(snug.Query):
+    def __iter__(self):
+        yield snug.GET("https://api.foo.com/a")
+        yield snug.GET("http://user@bar.org:8080/b")
+
+
+@pytest.fixture
+def collector(mocker):
+    # every event takes place 0.25 seconds after the previous
+    mocker.patch(
+        "snug.query.perf_counter", side_effect=[i / 4 for i in range(1000)]
+    )
+    return snug.MetricsCollector(buckets=[0.1, 0.5, 1])
+
+
+def test_snapshot(collector):
+    executor = snug.executor(client=snug.Loopback(handler), hooks=[collector])
+    executor(fetch("https://api.foo.com/x", b"abc"))
+    executor(fetch("https://api.foo.com/missing"))
+    executor(twohosts())
+    with pytest.raises(ValueError):
+        executor(fetch("https://api.foo.com/error"))
+
+    snapshot = collector.snapshot()
+    assert snapshot["queries"] == {
+        "fetch": {"requests": 3},
+        "twohosts": {"requests": 2},
+    }
+    foo = snapshot["hosts"]["api.foo.com"]
+    assert foo["requests"] == 4
+    assert foo["errors"] == 1
+    assert foo["statuses"] == {200: 2, 404: 1}
+    assert foo["bytes_sent"] == 3
+    assert foo["bytes_received"] == 10
+    assert foo["latency"]["count"] == 3
+    assert foo["latency"]["sum"] == 0.75
+    assert foo["latency"]["buckets"] == {
+        0.1: 0,
+        0.5: 3,
+        1: 3,
+        float("inf"): 3,
+    }
+    assert snapshot["hosts"]["bar.org:8080"]["requests"] == 1
+    assert not collector._pending
+
+    collector.reset()
+    assert collector.snapshot() == {"hosts": {}, "queries": {}}
+
+
+def test_async(collector, loop):
+    executor = snug.async_executor(
+        client=snug.Loopback(handler), hooks=[collector]
+    )
+    loop.run_until_complete(executor(fetch("https://api.foo.com/x")))
+    assert collector.snapshot()["hosts"]["api.foo.com"]["statuses"] == {200: 1}
+
+
+def test_same_request_concurrently(collector, loop):
+    request = snug.GET("https://api.foo.com/x")
+
+    def query():
+        return (yield snug.gather(request, request, request))
+
+    executor = snug.async_executor(
+        client=snug.Loopback(handler, latency=0.01), hooks=[collector]
+    )
+    loop.run_until_complete(executor(query()))
+    snug.execute(
+        query(),
+        client=snug.Loopback(handler, latency=0.01),
+        hooks=[collector],
+    )
+    foo = collector.snapshot()["hosts"]["api.foo.com"]
+    assert foo["requests"] == 6
+    assert foo["statuses"] == {200: 6}
+    assert foo["latency"]["count"] == 6
+    assert not collector._pending
+
+
+def test_response_without_request(collector):
+    collector.response_received(
+        None, snug.GET("https://api.foo.com/x"), snug.Response(200), 1.0
+    )
+    assert collector.snapshot()["hosts"] == {}
+
+
+def test_relative_url(collector):
+    snug.execute(
+        fetch("my/url"), client=snug.Loopback(handler), hooks=[collector]
+    )
+    assert collector.snapshot()["hosts"][""]["requests"] == 1
+
+
+def test_prometheus(collector):
+    executor = snug.executor(client=snug.Loopback(handler), hooks=[collector])
+    executor(fetch("https://api.foo.com/x", b"abc"))
+    executor(fetch('https://api.foo.com/"quoted'))
+
+    text = collector.to_prometheus()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert "# TYPE snug_requests_total counter" in lines
+    assert 'snug_requests_total{host="api.foo.com"} 2' in lines
+    assert 'snug_request_bytes_total{host="api.foo.com"} 3' in lines
+    assert 'snug_response_bytes_total{host="api.foo.com"} 10' in lines
+    assert 'snug_responses_total{host="api.foo.com",status="200"} 2' in lines
+    assert 'snug_query_requests_total{query="fetch"} 2' in lines
+    assert "# TYPE snug_request_duration_seconds histogram" in lines
+    assert (
+        'snug_request_duration_seconds_bucket{host="api.foo.com",le="0.5"} 2'
+        in lines
+    )
+    assert (
+        'snug_request_duration_seconds_bucket{host="api.foo.com",le="+Inf"} 2'
+        in lines
+    )
+    assert 'snug_request_duration_seconds_count{host="api.foo.com"} 2' in lines
+    assert "myapp_requests_total" in collector.to_prometheus(prefix="myapp")
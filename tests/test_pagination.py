@@ -1,4 +1,6 @@
 import asyncio
+import json
+from itertools import chain
 
 import snug
 
@@ -122,3 +124,32 @@ class TestPaginate:
         assert loop.run_until_complete(
             consume_aiter(snug.execute_async(paginated, client=mock_client))
         )
+
+
+class streamed_page(snug.Query):
+    """a page of which the items are decoded one at a time"""
+
+    def __init__(self, number=0):
+        self.number = number
+
+    def __iter__(self):
+        response = yield snug.GET("items", params={"page": self.number})
+        return snug.Page(
+            response.iter_json(chunk_size=8),
+            next_query=(
+                streamed_page(self.number + 1) if self.number < 2 else None
+            ),
+        )
+
+
+def test_paginate_streamed_pages():
+    def handler(request):
+        start = request.params["page"] * 10
+        return snug.Response(
+            200, json.dumps(list(range(start, start + 10))).encode()
+        )
+
+    pages = snug.execute(
+        snug.paginated(streamed_page()), client=snug.Loopback(handler)
+    )
+    assert list(chain.from_iterable(pages)) == list(range(30))
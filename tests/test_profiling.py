@@ -0,0 +1,172 @@
+import json
+
+import pytest
+
+import snug
+
+
+def handler(req):
+    return snug.Response(200, b"x" * 10)
+
+
+class fetch(snug.Query):
+    def __init__(self, url):
+        self.url = url
+
+    def __iter__(self):
+        first = yield snug.POST(self.url, b"abc")
+        second = yield snug.GET(self.url + "/more")
+        return first.content + second.content
+
+
+class mylist(snug.Query):
+    def __init__(self, page=0):
+        self.page = page
+
+    def __iter__(self):
+        yield snug.GET("https://foo.com/page/{}".format(self.page))
+        return snug.Page(
+            [self.page], next_query=mylist(1) if self.page == 0 else None
+        )
+
+
+@pytest.fixture(autouse=True)
+def fake_clock(mocker):
+    mocker.patch(
+        "snug.query.perf_counter", side_effect=[i / 4 for i in range(1000)]
+    )
+
+
+def test_profile():
+    result, profile = snug.profile(
+        fetch("https://foo.com/a"), client=snug.Loopback(handler)
+    )
+    assert result == b"x" * 20
+    assert profile.name == "fetch"
+    assert profile.error is None
+    assert [s.kind for s in profile.steps] == [
+        "generator",
+        "send",
+        "generator",
+        "send",
+        "generator",
+    ]
+    assert profile.step_count == 2
+    assert profile.send_time == 0.5
+    assert profile.generator_time == 0.75
+    assert profile.duration == 2.75
+    assert profile.bytes_sent == 3
+    assert profile.bytes_received == 20
+    assert profile.steps[1].status == 200
+    assert profile.steps[1].request.url == "https://foo.com/a"
+    assert "fetch" in repr(profile)
+
+    breakdown = profile.as_dict()
+    json.dumps(breakdown)
+    assert breakdown["own"] == breakdown["total"]
+    assert breakdown["sends"][1]["request"] == "GET https://foo.com/a/more"
+
+
+def test_profile_async(loop):
+    result, profile = loop.run_until_complete(
+        snug.profile_async(
+            fetch("https://foo.com/a"), client=snug.Loopback(handler)
+        )
+    )
+    assert result == b"x" * 20
+    assert profile.step_count == 2
+
+
+def test_error():
+    class failing(snug.Query):
+        def __iter__(self):
+            yield snug.GET("foo")
+            raise ValueError("foo")
+
+    profiler = snug.Profiler()
+    with pytest.raises(ValueError):
+        snug.execute(
+            failing(), client=snug.Loopback(handler), hooks=[profiler]
+        )
+    [profile] = profiler.profiles
+    assert isinstance(profile.error, ValueError)
+    assert "ValueError" in profile.as_dict()["error"]
+
+
+def test_paginated():
+    profiler = snug.Profiler()
+    executor = snug.executor(client=snug.Loopback(handler), hooks=[profiler])
+    assert list(executor(snug.paginated(mylist()))) == [[0], [1]]
+
+    [profile] = profiler.profiles
+    assert profile.name == "paginated"
+    assert [c.name for c in profile.children] == ["mylist", "mylist"]
+    breakdown = profile.as_dict()
+    assert breakdown["own"]["steps"] == 0
+    assert breakdown["total"]["steps"] == 2
+    assert breakdown["total"]["bytes_received"] == 20
+    assert [c["total"]["steps"] for c in breakdown["children"]] == [1, 1]
+
+
+def test_folded():
+    profiler = snug.Profiler()
+    executor = snug.executor(client=snug.Loopback(handler), hooks=[profiler])
+    list(executor(snug.paginated(mylist())))
+    executor(fetch("https://bar.org/a"))
+
+    lines = profiler.folded().splitlines()
+    assert "paginated 250000" in lines
+    assert "paginated;mylist;send foo.com 250000" in lines
+    assert "paginated;mylist;generator 250000" in lines
+    assert "fetch;send bar.org 250000" in lines
+    for line in lines:
+        frames, value = line.rsplit(" ", 1)
+        assert int(value) > 0
+
+
+REQUEST = snug.GET("https://foo.com/same")
+
+
+def same_request():
+    return (yield REQUEST)
+
+
+def test_same_request_concurrently(loop):
+    def query():
+        return (yield snug.gather(REQUEST, REQUEST))
+
+    _, profile = loop.run_until_complete(
+        snug.profile_async(
+            query(), client=snug.Loopback(handler, latency=0.01)
+        )
+    )
+    assert profile.step_count == 2
+
+    def queries():
+        return (yield snug.gather(same_request(), same_request()))
+
+    _, profile = snug.profile(
+        queries(), client=snug.Loopback(handler, latency=0.01)
+    )
+    assert [c.step_count for c in profile.children] == [1, 1]
+
+
+def test_query_executed_again():
+    profiler = snug.Profiler()
+    executor = snug.executor(client=snug.Loopback(handler), hooks=[profiler])
+    query = fetch("https://foo.com/a")
+    executor(query)
+    executor(query)
+    assert [p.step_count for p in profiler.profiles] == [2, 2]
+    assert len(profiler._ended) == 1
+
+
+def test_ended_profiles_bounded(mocker):
+    mocker.patch("snug.profiling.MAX_ENDED_PROFILES", 2)
+    profiler = snug.Profiler()
+    executor = snug.executor(client=snug.Loopback(handler), hooks=[profiler])
+    queries = [fetch("https://foo.com/{}".format(i)) for i in range(3)]
+    for query in queries:
+        executor(query)
+    assert len(profiler.profiles) == 3
+    assert list(profiler._ended) == [id(queries[1]), id(queries[2])]
@@ -1,8 +1,11 @@
 import asyncio
 import inspect
+import threading
 import urllib.request
 from operator import methodcaller
 
+import pytest
+
 import snug
 
 
@@ -199,11 +202,120 @@ class TestExecuteAsync:
 def test_executor():
     executor = snug.executor(client="foo")
     assert executor.keywords == {"client": "foo"}
+    assert isinstance(executor, snug.Executor)
 
 
 def test_async_executor():
     executor = snug.async_executor(client="foo")
     assert executor.keywords == {"client": "foo"}
+    assert isinstance(executor, snug.AsyncExecutor)
+
+
+def test_async_executor_default_client(loop):
+    class myquery:
+        def __iter__(self):
+            raise NotImplementedError()
+
+        async def __execute_async__(self, client, auth):
+            return client
+
+    executor = snug.async_executor()
+    assert loop.run_until_complete(executor(myquery())) is loop
+    bound = executor._bound
+    assert loop.run_until_complete(executor(myquery())) is loop
+    assert executor._bound is bound
+    assert myquery in bound._strategies
+
+    async def run():
+        return await executor(myquery())
+
+    other = asyncio.new_event_loop()
+    try:
+        assert other.run_until_complete(run()) is other
+    finally:
+        other.close()
+    assert executor._bound is not bound
+
+
+def test_executor_unknown_argument():
+    with pytest.raises(TypeError, match="clinet"):
+        snug.executor(clinet="foo")
+    with pytest.raises(TypeError, match="clinet"):
+        snug.async_executor(clinet="foo")
+
+
+class TestExecutor:
+    def test_default_execution(self):
+        client = MockClient(snug.Response(204))
+        executor = snug.executor(client=client, auth=("user", "pw"))
+
+        assert executor(myquery()) == snug.Response(204)
+        assert client.request == snug.GET(
+            "my/url", headers={"Authorization": "Basic dXNlcjpwdw=="}
+        )
+        # strategies are reused for the same type
+        assert executor(myquery()) == snug.Response(204)
+        assert len(executor._strategies) == 1
+
+    def test_custom_execute(self):
+        client = MockClient(snug.Response(204))
+
+        class MyQuery(object):
+            def __execute__(self, client, auth):
+                return client.send(auth(snug.GET("my/url")))
+
+        executor = snug.executor(client=client, auth=("user", "pw"))
+        assert executor(MyQuery()) == snug.Response(204)
+        assert client.request == snug.GET(
+            "my/url", headers={"Authorization": "Basic dXNlcjpwdw=="}
+        )
+
+    def test_override_arguments(self):
+        client = MockClient(snug.Response(204))
+        executor = snug.executor(client=client, auth=("user", "pw"))
+
+        assert executor(myquery(), auth=None) == snug.Response(204)
+        assert client.request == snug.GET("my/url")
+
+    def test_unregistered_client(self):
+        executor = snug.executor(client=object())
+        with pytest.raises(TypeError, match="not registered"):
+            executor(myquery())
+
+
+class TestAsyncExecutor:
+    def test_default_execution(self, loop):
+        client = MockAsyncClient(snug.Response(204))
+        executor = snug.async_executor(client=client, auth=("user", "pw"))
+
+        result = loop.run_until_complete(executor(myquery()))
+        assert result == snug.Response(204)
+        assert client.request == snug.GET(
+            "my/url", headers={"Authorization": "Basic dXNlcjpwdw=="}
+        )
+        assert len(executor._strategies) == 1
+
+    def test_custom_execute(self, loop):
+        client = MockAsyncClient(snug.Response(204))
+
+        class MyQuery:
+            def __execute_async__(self, client, auth):
+                return client.send(auth(snug.GET("my/url")))
+
+        executor = snug.async_executor(client=client)
+        result = loop.run_until_complete(executor(MyQuery()))
+        assert result == snug.Response(204)
+        assert client.request == snug.GET("my/url")
+
+    def test_override_arguments(self, loop):
+        client = MockAsyncClient(snug.Response(204))
+        executor = snug.async_executor(client=client)
+
+        future = executor(myquery(), auth=("user", "pw"))
+        assert loop.run_until_complete(future) == snug.Response(204)
+        assert client.request == snug.GET(
+            "my/url", headers={"Authorization": "Basic dXNlcjpwdw=="}
+        )
 
 
 def test_relation():
@@ -276,3 +388,192 @@ def test__execute_async__(loop):
 
     result = loop.run_until_complete(future)
     assert result == "hello world"
+
+
+def echo(req):
+    return snug.Response(200, req.url.encode())
+
+
+def fanout(*paths):
+    responses = yield snug.gather(*(snug.GET(p) for p in paths))
+    return [r.content.decode() for r in responses]
+
+
+def nested():
+    first, rest = yield snug.gather(
+        snug.GET("/a"), fanout("/b", "/c"), max_workers=1
+    )
+    return [first.content.decode()] + rest
+
+
+class TestGather:
+    def test_execute(self):
+        client = snug.Loopback(echo)
+        assert snug.execute(fanout("/a", "/b"), client=client) == ["/a", "/b"]
+        assert snug.execute(nested(), client=client) == ["/a", "/b", "/c"]
+        assert snug.execute(fanout(), client=client) == []
+
+    def test_executor(self):
+        exec = snug.executor(client=snug.Loopback(echo), auth=("user", "pw"))
+        assert exec(nested()) == ["/a", "/b", "/c"]
+
+    def test_bounded_threads(self, mocker):
+        mocker.patch("snug.query.DEFAULT_MAX_WORKERS", 3)
+        threads = set()
+
+        def handler(req):
+            threads.add(threading.get_ident())
+            return echo(req)
+
+        paths = ["/{}".format(i) for i in range(20)]
+        client = snug.Loopback(handler)
+        assert snug.execute(fanout(*paths), client=client) == paths
+        assert len(threads) <= 3
+
+    def test_sends_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def handler(req):
+            barrier.wait()
+            return echo(req)
+
+        exec = snug.executor(client=snug.Loopback(handler))
+        assert exec(fanout("/a", "/b", "/c")) == ["/a", "/b", "/c"]
+
+    def test_error(self):
+        def handler(req):
+            if req.url == "/b":
+                raise ValueError("failed")
+            return echo(req)
+
+        with pytest.raises(ValueError, match="failed"):
+            snug.execute(fanout("/a", "/b"), client=snug.Loopback(handler))
+
+    def test_async(self, loop):
+        active, most = 0, 0
+
+        async def handler(req):
+            nonlocal active, most
+            active += 1
+            most = max(most, active)
+            await asyncio.sleep(0)
+            active -= 1
+            return echo(req)
+
+        client = snug.Loopback(handler)
+        assert loop.run_until_complete(
+            snug.execute_async(fanout("/a", "/b", "/c"), client=client)
+        ) == ["/a", "/b", "/c"]
+        assert most == 3
+        exec = snug.async_executor(client=client)
+        assert loop.run_until_complete(exec(nested())) == ["/a", "/b", "/c"]
+
+    def test_hooks(self, loop):
+        starts = []
+
+        class Recorder(snug.Hook):
+            def query_start(self, query, time, parent):
+                starts.append((query, parent))
+
+            def request_sent(self, query, request, time):
+                starts.append(request.url)
+
+        query = nested()
+        snug.execute(query, client=snug.Loopback(echo), hooks=[Recorder()])
+        (top, no_parent), first, (sub, parent), *rest = starts
+        assert top is query and no_parent is None
+        assert parent is query and sub is not query
+        assert first == "/a"
+        assert rest == ["/b", "/c"] or rest == ["/c", "/b"]
+
+        starts.clear()
+        query = nested()
+        exec = snug.async_executor(
+            client=snug.Loopback(echo), hooks=[Recorder()]
+        )
+        loop.run_until_complete(exec(query))
+        assert [s for s in starts if not isinstance(s, str)][1][1] is query
+
+    def test_repr(self):
+        assert repr(snug.gather(snug.GET("/a"))).startswith("gather(<Request")
+
+
+class TestPrefetch:
+    class repo(snug.Query):
+        def __init__(self, name):
+            self.name = name
+
+        def __iter__(self):
+            response = yield snug.GET("/repos/" + self.name)
+            return response.content.decode()
+
+        @snug.related
+        class issues(snug.Query):
+            def __init__(self, repo):
+                self.repo = repo
+
+            def __iter__(self):
+                yield snug.GET("/repos/{}/issues".format(self.repo.name))
+                return [1, 2]
+
+        @snug.related
+        class issue(snug.Query):
+            def __init__(self, repo, number):
+                self.repo, self.number = repo, number
+
+            def __iter__(self):
+                response = yield snug.GET(
+                    "/repos/{}/issues/{}".format(self.repo.name, self.number)
+                )
+                return response.content.decode()
+
+    def test_execute(self):
+        query = snug.prefetch(
+            self.repo("foo"),
+            "issues",
+            first=lambda repo, result: repo.issue(1),
+            missing=lambda repo, result: None,
+        )
+        result = snug.execute(query, client=snug.Loopback(echo))
+        assert result == snug.Prefetched(
+            "/repos/foo",
+            {
+                "issues": [1, 2],
+                "first": "/repos/foo/issues/1",
+                "missing": None,
+            },
+        )
+
+    def test_nested(self, loop):
+        query = snug.prefetch(
+            self.repo("foo"),
+            issues=lambda repo, _: snug.prefetch(
+                repo.issues(),
+                each=lambda _, numbers: [repo.issue(n) for n in numbers],
+                none=lambda _, numbers: [],
+            ),
+        )
+        expect = snug.Prefetched(
+            "/repos/foo",
+            {
+                "issues": snug.Prefetched(
+                    [1, 2],
+                    {
+                        "each": ["/repos/foo/issues/1", "/repos/foo/issues/2"],
+                        "none": [],
+                    },
+                )
+            },
+        )
+        client = snug.Loopback(echo)
+        assert snug.executor(client=client)(query) == expect
+        assert (
+            loop.run_until_complete(snug.execute_async(query, client=client))
+            == expect
+        )
+
+    def test_no_related(self):
+        query = snug.prefetch(self.repo("foo"))
+        result = snug.execute(query, client=snug.Loopback(echo))
+        assert result == ("/repos/foo", {})
+        assert repr(query).startswith("prefetch(")
@@ -0,0 +1,347 @@
+import asyncio
+
+import pytest
+
+import snug
+
+
+def fetch(path):
+    response = yield snug.GET(path)
+    return response.content.decode()
+
+
+class Gate:
+    """an async handler which blocks until opened"""
+
+    def __init__(self):
+        self.opened = asyncio.Event()
+        self.received = []
+
+    async def __call__(self, req):
+        self.received.append(req.url)
+        await self.opened.wait()
+        return snug.Response(200, req.url.encode())
+
+
+class TestPriorityExecutor:
+    def test_priority_order(self, loop):
+        gate = Gate()
+        exec = snug.PriorityExecutor(
+            max_concurrency=1, client=snug.Loopback(gate)
+        )
+
+        async def run():
+            tasks = [asyncio.ensure_future(exec(fetch("/first")))]
+            await asyncio.sleep(0)
+            for path, priority in [("/c", 5), ("/a", 1), ("/b", 1)]:
+                tasks.append(
+                    asyncio.ensure_future(exec(fetch(path), priority=priority))
+                )
+            await asyncio.sleep(0)
+            assert (exec.running, exec.queued) == (1, 3)
+            gate.opened.set()
+            return await asyncio.gather(*tasks)
+
+        assert loop.run_until_complete(run()) == ["/first", "/c", "/a", "/b"]
+        assert gate.received == ["/first", "/a", "/b", "/c"]
+        assert (exec.running, exec.queued) == (0, 0)
+
+    def test_concurrency(self, loop):
+        gate = Gate()
+        exec = snug.PriorityExecutor(
+            max_concurrency=2, client=snug.Loopback(gate)
+        )
+
+        async def run():
+            tasks = [
+                asyncio.ensure_future(exec(fetch("/" + p))) for p in "abc"
+            ]
+            await asyncio.sleep(0)
+            assert gate.received == ["/a", "/b"]
+            gate.opened.set()
+            return await asyncio.gather(*tasks)
+
+        assert loop.run_until_complete(run()) == ["/a", "/b", "/c"]
+
+    def test_load_shedding(self, loop):
+        gate = Gate()
+        exec = snug.PriorityExecutor(
+            max_concurrency=1, max_queued=2, client=snug.Loopback(gate)
+        )
+
+        async def run():
+            tasks = [asyncio.ensure_future(exec(fetch("/first")))]
+            await asyncio.sleep(0)
+            for path, priority in [("/a", 3), ("/b", 1), ("/c", 2)]:
+                tasks.append(
+                    asyncio.ensure_future(exec(fetch(path), priority=priority))
+                )
+            shed = asyncio.ensure_future(exec(fetch("/d"), priority=9))
+            await asyncio.sleep(0)
+            gate.opened.set()
+            with pytest.raises(snug.LoadShedError, match="priority 9"):
+                await shed
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        first, a, b, c = loop.run_until_complete(run())
+        assert (first, b, c) == ("/first", "/b", "/c")
+        assert isinstance(a, snug.LoadShedError)
+
+    def test_cancel_queued(self, loop):
+        gate = Gate()
+        exec = snug.PriorityExecutor(
+            max_concurrency=1, client=snug.Loopback(gate)
+        )
+
+        async def run():
+            first = asyncio.ensure_future(exec(fetch("/first")))
+            await asyncio.sleep(0)
+            queued = asyncio.ensure_future(exec(fetch("/queued")))
+            await asyncio.sleep(0)
+            queued.cancel()
+            await asyncio.sleep(0)
+            assert exec.queued == 0
+            gate.opened.set()
+            return await first
+
+        assert loop.run_until_complete(run()) == "/first"
+        assert exec.running == 0
+
+    def test_cancel_shed(self, loop):
+        gate = Gate()
+        exec = snug.PriorityExecutor(
+            max_concurrency=1, max_queued=1, client=snug.Loopback(gate)
+        )
+
+        async def run():
+            first = asyncio.ensure_future(exec(fetch("/first")))
+            await asyncio.sleep(0)
+            shed = asyncio.ensure_future(exec(fetch("/shed"), priority=2))
+            await asyncio.sleep(0)
+            queued = asyncio.ensure_future(exec(fetch("/queued"), priority=1))
+            await asyncio.sleep(0)
+            # shed, but cancelled before it handles the error
+            shed.cancel()
+            await asyncio.sleep(0)
+            assert shed.cancelled()
+            assert gate.received == ["/first"]
+            assert (exec.running, exec.queued) == (1, 1)
+            gate.opened.set()
+            return await asyncio.gather(first, queued)
+
+        assert loop.run_until_complete(run()) == ["/first", "/queued"]
+        assert exec.running == 0
+
+    def test_error(self, loop):
+        def handler(req):
+            raise ValueError("failed")
+
+        exec = snug.PriorityExecutor(client=snug.Loopback(handler))
+        with pytest.raises(ValueError):
+            loop.run_until_complete(exec(fetch("/a")))
+        assert exec.running == 0
+
+    def test_paginated(self, loop):
+        exec = snug.PriorityExecutor(client=snug.Loopback(Gate()))
+        with pytest.raises(TypeError, match="paginated"):
+            loop.run_until_complete(
+                exec(snug.paginated(fetch("/a")), priority=1)
+            )
+        assert exec.running == 0
+
+
+class TestAdaptiveLimiter:
+    def test_limits_per_host(self, loop):
+        gate = Gate()
+        client = snug.AdaptiveLimiter(snug.Loopback(gate), initial_limit=2)
+
+        async def run():
+            tasks = [
+                asyncio.ensure_future(
+                    snug.execute_async(fetch(url), client=client)
+                )
+                for url in [
+                    "https://a.com/1",
+                    "https://a.com/2",
+                    "https://a.com/3",
+                    "https://b.com/1",
+                ]
+            ]
+            await asyncio.sleep(0)
+            assert client.in_flight == {"a.com": 2, "b.com": 1}
+            assert len(gate.received) == 3
+            gate.opened.set()
+            return await asyncio.gather(*tasks)
+
+        loop.run_until_complete(run())
+        assert len(gate.received) == 4
+        assert client.in_flight == {"a.com": 0, "b.com": 0}
+
+    def test_cancel_waiting(self, loop):
+        gate = Gate()
+        client = snug.AdaptiveLimiter(snug.Loopback(gate), initial_limit=1)
+
+        async def run():
+            first = asyncio.ensure_future(
+                snug.execute_async(fetch("https://a.com/1"), client=client)
+            )
+            await asyncio.sleep(0)
+            waiting = asyncio.ensure_future(
+                snug.execute_async(fetch("https://a.com/2"), client=client)
+            )
+            await asyncio.sleep(0)
+            # the release of the first request skips the cancelled waiter
+            gate.opened.set()
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            return await first
+
+        assert loop.run_until_complete(run()) == "https://a.com/1"
+        assert client.in_flight == {"a.com": 0}
+
+    def test_aimd(self, loop):
+        statuses = []
+
+        def handler(req):
+            return snug.Response(statuses.pop(0), b"")
+
+        client = snug.AdaptiveLimiter(
+            snug.Loopback(handler), initial_limit=4, min_limit=2, max_limit=5
+        )
+        exec = snug.async_executor(client=client)
+
+        def run(*codes):
+            statuses.extend(codes)
+            for _ in codes:
+                loop.run_until_complete(exec(fetch("https://a.com/")))
+            return client.limits["a.com"]
+
+        # each success adds 1 / limit
+        assert run(200, 200, 200, 200) == 4
+        assert run(200, 200) == 5
+        assert run(503) == 2
+        assert run(429) == 2
+        assert run(200, 200) == 2
+        assert run(200) == 3
+
+    def test_error(self, loop):
+        def handler(req):
+            raise ValueError("failed")
+
+        client = snug.AdaptiveLimiter(snug.Loopback(handler), initial_limit=4)
+        with pytest.raises(ValueError):
+            loop.run_until_complete(
+                snug.execute_async(fetch("https://a.com/"), client=client)
+            )
+        assert client.limits == {"a.com": 2}
+        assert client.in_flight == {"a.com": 0}
+
+    def test_latency(self, loop, mocker):
+        mocker.patch(
+            "snug.scheduling.perf_counter",
+            side_effect=[0, 1, 10, 11, 20, 25, 30],
+        )
+        client = snug.AdaptiveLimiter(
+            snug.Loopback(lambda req: snug.Response(200, b"")),
+            initial_limit=4,
+            latency_tolerance=2,
+        )
+        exec = snug.async_executor(client=client)
+        loop.run_until_complete(exec(fetch("https://a.com/")))
+        loop.run_until_complete(exec(fetch("https://a.com/")))
+        assert client.limits == {"a.com": 4}
+        loop.run_until_complete(exec(fetch("https://a.com/")))
+        assert client.limits == {"a.com": 2}
+        assert "Loopback" in repr(client)
+
+
+class TestKeyedExecutor:
+    def test_order_per_key(self, loop):
+        events = []
+
+        async def handler(req):
+            events.append(("start", req.url))
+            await asyncio.sleep(0.01 if req.url.endswith("1") else 0)
+            events.append(("end", req.url))
+            return snug.Response(200, req.url.encode())
+
+        exec = snug.KeyedExecutor(client=snug.Loopback(handler))
+
+        async def run():
+            tasks = [
+                asyncio.ensure_future(exec(fetch(url), key=url[:2]))
+                for url in ["/a1", "/b1", "/a2", "/a3", "/b2"]
+            ]
+            await asyncio.sleep(0)
+            assert exec.keys == {"/a", "/b"}
+            return await asyncio.gather(*tasks)
+
+        assert loop.run_until_complete(run()) == [
+            "/a1",
+            "/b1",
+            "/a2",
+            "/a3",
+            "/b2",
+        ]
+        assert events[:2] == [("start", "/a1"), ("start", "/b1")]
+        for key in "ab":
+            assert [e for e in events if e[1][1] == key] == [
+                (event, "/{}{}".format(key, n))
+                for n in range(1, 4 if key == "a" else 3)
+                for event in ("start", "end")
+            ]
+        assert exec.keys == set()
+
+    def test_max_concurrency(self, loop):
+        gate = Gate()
+        exec = snug.KeyedExecutor(
+            max_concurrency=2, client=snug.Loopback(gate)
+        )
+
+        async def run():
+            tasks = [
+                asyncio.ensure_future(exec(fetch("/" + key), key=key))
+                for key in "abc"
+            ]
+            await asyncio.sleep(0)
+            assert gate.received == ["/a", "/b"]
+            gate.opened.set()
+            return await asyncio.gather(*tasks)
+
+        assert loop.run_until_complete(run()) == ["/a", "/b", "/c"]
+
+    def test_errors_and_cancellation(self, loop):
+        gate = Gate()
+
+        async def handler(req):
+            if req.url == "/error":
+                raise ValueError("failed")
+            return await gate(req)
+
+        exec = snug.KeyedExecutor(client=snug.Loopback(handler))
+
+        async def run():
+            first = asyncio.ensure_future(exec(fetch("/first"), key=1))
+            cancelled = asyncio.ensure_future(exec(fetch("/cancel"), key=1))
+            last = asyncio.ensure_future(exec(fetch("/last"), key=1))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            await asyncio.sleep(0)
+            # the last query still waits for the first
+            assert gate.received == ["/first"]
+            gate.opened.set()
+            with pytest.raises(ValueError):
+                await exec(fetch("/error"), key=2)
+            return await asyncio.gather(first, last)
+
+        assert loop.run_until_complete(run()) == ["/first", "/last"]
+        assert gate.received == ["/first", "/last"]
+
+    def test_paginated(self, loop):
+        exec = snug.KeyedExecutor(
+            max_concurrency=1, client=snug.Loopback(Gate())
+        )
+        with pytest.raises(TypeError, match="paginated"):
+            loop.run_until_complete(exec(snug.paginated(fetch("/a")), key=1))
+        assert exec.keys == set()